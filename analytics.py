@@ -0,0 +1,217 @@
+"""Vectorized fleet analytics over fuel_log.
+
+Usage: python analytics.py [--db fuel.db] [--vehicle NAME] [--window 5] [--method zscore|iqr]
+
+fuel_log is loaded once into NumPy column arrays ordered by (vehicle_id,
+date_day, id). Everything below then runs as whole-array operations with
+per-vehicle segments, never a Python loop per fill:
+
+    rolling km/L and RM/km over the last `window` fills of each vehicle
+    anomaly flags on km/L per vehicle (z-score or IQR): a fill far below
+    the vehicle's usual efficiency bought fuel the distance doesn't explain
+    (siphoning, a fuel card used for another vehicle); one far above it
+    points at a bad odometer reading or a missed fill
+    price trend: monthly mean price per litre and its yearly slope
+"""
+import argparse
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+import columnar
+import storage
+
+COLUMNS = ("id", "vehicle_id", "date_day", "total_rm", "price_per_litre", "distance_km", "litres", "km_per_litre")
+FETCH_SIZE = 50000
+DEFAULT_WINDOW = 5
+METHODS = ("zscore", "iqr")
+Z_THRESHOLD = 3.0
+IQR_K = 1.5
+
+LOW, HIGH = -1, 1  # anomaly flag values; 0 is normal
+
+Anomaly = namedtuple("Anomaly", "id vehicle_id date km_per_litre expected kind")
+PriceTrend = namedtuple("PriceTrend", "months monthly_mean first last change_pct slope_per_year")
+Report = namedtuple("Report", "columns rolling_km_l rolling_rm_km flags anomalies price_trend")
+
+
+# --- Loading ---
+
+def load_columns(vehicle_id=None, db_file=storage.DB_FILE, fetch_size=FETCH_SIZE):
+    """Returns the columnar.load_columns arrays for COLUMNS, ordered by
+    vehicle, date_day, id.
+
+    One vehicle is read in order from idx_fuel_log_vehicle_date_day. The
+    whole fleet is read in table order and sorted with NumPy instead: an
+    index-ordered walk over every row hops around the table and took
+    about 2.5x as long.
+    """
+    if vehicle_id is not None:
+        return columnar.load_columns(COLUMNS, vehicle_id, db_file, "date_day, id", fetch_size)
+    columns = columnar.load_columns(COLUMNS, None, db_file, fetch_size=fetch_size)
+    order = np.lexsort((columns["id"], columns["date_day"], columns["vehicle_id"]))
+    return columnar.take(columns, order)
+
+
+def segment_starts(vehicle_ids):
+    """Index where each vehicle's run starts in an array sorted by vehicle."""
+    return np.concatenate(([0], np.flatnonzero(np.diff(vehicle_ids)) + 1)).astype(np.int64)
+
+
+def _segment_index(vehicle_ids):
+    """(segment number per row, segment starts, segment lengths)."""
+    starts = segment_starts(vehicle_ids) if len(vehicle_ids) else np.zeros(0, dtype=np.int64)
+    counts = np.diff(np.append(starts, len(vehicle_ids)))
+    return np.repeat(np.arange(len(starts)), counts), starts, counts
+
+
+# --- Rolling metrics ---
+
+def rolling_ratio(numerator, denominator, vehicle_ids, window=DEFAULT_WINDOW):
+    """sum(numerator) / sum(denominator) over each fill and the window-1 before
+    it, restarting at every vehicle. Uses prefix sums: O(n) for any window."""
+    if window < 1:
+        raise ValueError("The rolling window must be at least one fill.")
+    segment, starts, _ = _segment_index(vehicle_ids)
+    index = np.arange(len(numerator))
+    first = np.maximum(index - window + 1, starts[segment])
+    num = np.concatenate(([0.0], np.cumsum(numerator)))
+    den = np.concatenate(([0.0], np.cumsum(denominator)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (num[index + 1] - num[first]) / (den[index + 1] - den[first])
+
+
+def rolling_km_per_litre(columns, window=DEFAULT_WINDOW):
+    return rolling_ratio(columns["distance_km"], columns["litres"], columns["vehicle_id"], window)
+
+
+def rolling_rm_per_km(columns, window=DEFAULT_WINDOW):
+    return rolling_ratio(columns["total_rm"], columns["distance_km"], columns["vehicle_id"], window)
+
+
+# --- Anomalies ---
+
+def zscore_flags(values, vehicle_ids, threshold=Z_THRESHOLD):
+    """LOW / HIGH where a value is more than threshold standard deviations from
+    its vehicle's mean. Returns (flags, expected value per row)."""
+    segment, _, counts = _segment_index(vehicle_ids)
+    mean = np.bincount(segment, values) / counts
+    std = np.sqrt(np.bincount(segment, (values - mean[segment]) ** 2) / counts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (values - mean[segment]) / std[segment]
+    z = np.nan_to_num(z, nan=0.0, posinf=0.0, neginf=0.0)  # a vehicle with one value, or all equal
+    return np.where(z < -threshold, LOW, np.where(z > threshold, HIGH, 0)).astype(np.int8), mean[segment]
+
+
+def _segment_quantile(sorted_values, starts, counts, q):
+    # Same as np.quantile's default 'linear' method, for every segment at once.
+    position = starts + (counts - 1) * q
+    lo = np.floor(position).astype(np.int64)
+    hi = np.minimum(lo + 1, starts + counts - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (position - lo)
+
+
+def iqr_flags(values, vehicle_ids, k=IQR_K):
+    """LOW / HIGH outside [Q1 - k*IQR, Q3 + k*IQR] of the value's vehicle.
+    Returns (flags, vehicle median per row)."""
+    segment, starts, counts = _segment_index(vehicle_ids)
+    # Sort by value, then stably by segment: the second sort is a radix sort
+    # on small integers, and both together beat np.lexsort on floats ~4x.
+    by_value = np.argsort(values)
+    seg_key = segment[by_value].astype(np.uint16 if len(starts) <= 2**16 else np.int64)
+    sorted_values = values[by_value[np.argsort(seg_key, kind="stable")]]
+    q1, median, q3 = (_segment_quantile(sorted_values, starts, counts, q) for q in (0.25, 0.5, 0.75))
+    spread = k * (q3 - q1)
+    low, high = (q1 - spread)[segment], (q3 + spread)[segment]
+    return np.where(values < low, LOW, np.where(values > high, HIGH, 0)).astype(np.int8), median[segment]
+
+
+def find_anomalies(columns, method="zscore"):
+    """Returns (flags array, [Anomaly]) for the km/L of every fill."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown anomaly method: {method}")
+    detect = zscore_flags if method == "zscore" else iqr_flags
+    flags, expected = detect(columns["km_per_litre"], columns["vehicle_id"])
+    rows = np.flatnonzero(flags)
+    dates = columns["date_day"][rows].astype("datetime64[D]").astype(str)
+    anomalies = [
+        Anomaly(int(columns["id"][i]), int(columns["vehicle_id"][i]), date,
+                float(columns["km_per_litre"][i]), float(expected[i]),
+                "low efficiency" if flags[i] == LOW else "high efficiency")
+        for i, date in zip(rows.tolist(), dates)
+    ]
+    return flags, anomalies
+
+
+# --- Price trend ---
+
+def price_trend(columns):
+    """Monthly mean price per litre across the loaded fills, plus a linear
+    trend in RM per litre per year. None without any fills."""
+    days, prices = columns["date_day"], columns["price_per_litre"]
+    if len(days) == 0:
+        return None
+    month = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    first_month = month.min()
+    counts = np.bincount(month - first_month)
+    sums = np.bincount(month - first_month, prices)
+    present = np.flatnonzero(counts)  # months with at least one fill
+    months = (present + first_month).astype("datetime64[M]")
+    monthly_mean = sums[present] / counts[present]
+    if days.min() == days.max():
+        slope = 0.0
+    else:
+        # Least-squares slope, centred for numerical stability.
+        x = days - days.mean()
+        slope = float((x * (prices - prices.mean())).sum() / (x * x).sum()) * 365.25
+    first, last = float(monthly_mean[0]), float(monthly_mean[-1])
+    return PriceTrend(months, monthly_mean, first, last, (last - first) / first * 100, slope)
+
+
+# --- All together ---
+
+def analyze(vehicle_id=None, window=DEFAULT_WINDOW, method="zscore", db_file=storage.DB_FILE):
+    """Loads fuel_log (or one vehicle) and computes every metric in one pass."""
+    columns = load_columns(vehicle_id, db_file)
+    flags, anomalies = find_anomalies(columns, method)
+    return Report(columns, rolling_km_per_litre(columns, window), rolling_rm_per_km(columns, window),
+                  flags, anomalies, price_trend(columns))
+
+
+def print_report(report, limit=20):
+    trend = report.price_trend
+    print(f"Fills analysed: {len(report.columns['id']):,}")
+    if trend is not None:
+        print(f"Price/L: RM {trend.first:.3f} ({trend.months[0]}) -> RM {trend.last:.3f} ({trend.months[-1]}), "
+              f"{trend.change_pct:+.1f}%, trend {trend.slope_per_year:+.3f} RM/L per year")
+    print(f"Anomalies: {len(report.anomalies):,}")
+    for a in report.anomalies[:limit]:
+        print(f"  #{a.id:<8} vehicle {a.vehicle_id:<5} {a.date}  {a.km_per_litre:7.2f} km/L "
+              f"(usual {a.expected:.2f})  {a.kind}")
+    if len(report.anomalies) > limit:
+        print(f"  ... and {len(report.anomalies) - limit:,} more")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rolling efficiency, anomalies and price trends.")
+    parser.add_argument("--db", default=storage.DB_FILE)
+    parser.add_argument("--vehicle", metavar="NAME", help="one vehicle (default: the whole fleet)")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="fills per rolling window")
+    parser.add_argument("--method", choices=METHODS, default="zscore")
+    args = parser.parse_args(argv)
+
+    conn = storage.get_connection(args.db)
+    storage.create_schema(conn)
+    vehicle_id = None
+    if args.vehicle:
+        row = conn.execute("SELECT id FROM vehicles WHERE name = ?", (args.vehicle,)).fetchone()
+        if row is None:
+            parser.error(f"no vehicle named '{args.vehicle}'")
+        vehicle_id = row[0]
+    print_report(analyze(vehicle_id, args.window, args.method, args.db))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""Shared fixture for the benchmarks: fuel_log rows generated in SQL.
+
+A recursive CTE numbers the fills i = 0 .. rows-1 and one INSERT ... SELECT
+writes them, so populating isn't dominated by Python row building. Each
+benchmark passes the SQL expressions it needs; the defaults give a fill a
+day from 2015-01-01 (wrapping after ten years) of RM 50 at RM 2.05/L over
+400 km. synthetic.py is the generator for realistic fleets.
+"""
+import storage
+
+
+def populate(conn, rows, vehicles=None, first_vehicle=1, start="2015-01-01", day="i % 3650",
+             total_rm="50.0", price_per_litre="2.05", distance_km="400.0"):
+    """Inserts `rows` fills in one transaction.
+
+    vehicles creates that many vehicles ("Vehicle <id>", ids from
+    first_vehicle) and deals the fills out to them in turn; without it
+    every fill goes to the default vehicle. day is the fill's day offset
+    from start; price_per_litre and distance_km may use i and random(),
+    and total_rm may also use those two columns.
+    """
+    vehicle = str(storage.DEFAULT_VEHICLE_ID)
+    with conn:
+        if vehicles:
+            conn.executemany("INSERT OR IGNORE INTO vehicles (id, name) VALUES (?, ?)",
+                             [(v, f"Vehicle {v}") for v in range(first_vehicle, first_vehicle + vehicles)])
+            vehicle = f"{first_vehicle} + i % {vehicles}"
+        conn.execute(f"""
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+        INSERT INTO fuel_log (date, total_rm, price_per_litre, distance_km, vehicle_id, date_day)
+        SELECT d, {total_rm}, price_per_litre, distance_km, v, {storage.DATE_DAY_SQL.format("d")}
+        FROM (SELECT i, {vehicle} AS v, date(?, '+' || ({day}) || ' days') AS d,
+                     {price_per_litre} AS price_per_litre, {distance_km} AS distance_km
+              FROM n)
+        """, (rows, start))
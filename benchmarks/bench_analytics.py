@@ -0,0 +1,169 @@
+"""Times the NumPy analytics pass against a pure-Python loop doing the same work.
+
+Usage: python benchmarks/bench_analytics.py [--rows 2000000] [--vehicles 200] [--window 5]
+
+Both versions compute rolling km/L and RM/km, z-score and IQR anomaly flags
+and monthly price means on the same loaded columns, and their results are
+checked against each other. Loading from SQLite is timed separately.
+"""
+import argparse
+import datetime
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict, deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+import _data  # noqa: E402
+import analytics  # noqa: E402
+import storage  # noqa: E402
+
+
+# --- Pure-Python baseline ---
+
+def rolling_python(vehicle_ids, numerator, denominator, window):
+    out = []
+    current, num_q, den_q, num_sum, den_sum = None, deque(), deque(), 0.0, 0.0
+    for v, a, b in zip(vehicle_ids, numerator, denominator):
+        if v != current:
+            current, num_q, den_q, num_sum, den_sum = v, deque(), deque(), 0.0, 0.0
+        num_q.append(a)
+        den_q.append(b)
+        num_sum += a
+        den_sum += b
+        if len(num_q) > window:
+            num_sum -= num_q.popleft()
+            den_sum -= den_q.popleft()
+        out.append(num_sum / den_sum)
+    return out
+
+
+def group(vehicle_ids, values):
+    groups = defaultdict(list)
+    for v, x in zip(vehicle_ids, values):
+        groups[v].append(x)
+    return groups
+
+
+def zscore_python(vehicle_ids, values, threshold):
+    stats = {}
+    for v, xs in group(vehicle_ids, values).items():
+        stats[v] = (statistics.fmean(xs), statistics.pstdev(xs))
+    flags = []
+    for v, x in zip(vehicle_ids, values):
+        mean, std = stats[v]
+        z = (x - mean) / std if std else 0.0
+        flags.append(-1 if z < -threshold else 1 if z > threshold else 0)
+    return flags
+
+
+def iqr_python(vehicle_ids, values, k):
+    bounds = {}
+    for v, xs in group(vehicle_ids, values).items():
+        if len(xs) > 1:
+            q1, _, q3 = statistics.quantiles(xs, n=4, method="inclusive")
+        else:
+            q1 = q3 = xs[0]
+        bounds[v] = (q1 - k * (q3 - q1), q3 + k * (q3 - q1))
+    return [-1 if x < bounds[v][0] else 1 if x > bounds[v][1] else 0
+            for v, x in zip(vehicle_ids, values)]
+
+
+def price_python(days, prices):
+    months = defaultdict(lambda: [0.0, 0])
+    for d, p in zip(days, prices):
+        month = _month(d)
+        months[month][0] += p
+        months[month][1] += 1
+    monthly = [s / c for _, (s, c) in sorted(months.items())]
+    mean_x, mean_y = statistics.fmean(days), statistics.fmean(prices)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(days, prices))
+    sxx = sum((x - mean_x) ** 2 for x in days)
+    return monthly, sxy / sxx * 365.25
+
+
+_EPOCH = datetime.date(1970, 1, 1).toordinal()
+
+
+def _month(day):
+    d = datetime.date.fromordinal(_EPOCH + day)
+    return d.year * 12 + d.month
+
+
+def run_python(cols, window):
+    v, days = cols["vehicle_id"], cols["date_day"]
+    return (
+        rolling_python(v, cols["distance_km"], cols["litres"], window),
+        rolling_python(v, cols["total_rm"], cols["distance_km"], window),
+        zscore_python(v, cols["km_per_litre"], analytics.Z_THRESHOLD),
+        iqr_python(v, cols["km_per_litre"], analytics.IQR_K),
+        price_python(days, cols["price_per_litre"]),
+    )
+
+
+def run_numpy(cols, window):
+    v = cols["vehicle_id"]
+    return (
+        analytics.rolling_km_per_litre(cols, window),
+        analytics.rolling_rm_per_km(cols, window),
+        analytics.zscore_flags(cols["km_per_litre"], v)[0],
+        analytics.iqr_flags(cols["km_per_litre"], v)[0],
+        analytics.price_trend(cols),
+    )
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--vehicles", type=int, default=200)
+    parser.add_argument("--window", type=int, default=analytics.DEFAULT_WINDOW)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "fuel.db")
+        conn = storage.get_connection(db)
+        storage.create_schema(conn)
+        t = time.perf_counter()
+        # Noisy efficiency per fill; about 1 in 500 fills buys double the fuel
+        # (the pattern of siphoning) to give the detectors something to find.
+        _data.populate(
+            conn, args.rows, args.vehicles, day=f"i * 3650 / {args.rows}",
+            total_rm="(25.0 + (abs(random()) % 1000) / 200.0) * (CASE WHEN abs(random()) % 500 = 0 THEN 2 ELSE 1 END)"
+                     " * price_per_litre",
+            price_per_litre=f"1.9 + (i * 0.4 / {args.rows}) + (abs(random()) % 100) / 1000.0",
+            distance_km="300.0 + abs(random()) % 200")
+        print(f"populated {args.rows:,} rows in {time.perf_counter() - t:.1f}s")
+
+        cols, load_s = timed(analytics.load_columns, None, db)
+        print(f"loaded columns in {load_s:.2f}s ({len(cols['id']) / load_s:,.0f} rows/sec)\n")
+        storage.close_all()
+
+    py_cols = {name: arr.tolist() for name, arr in cols.items()}
+    expected, py_s = timed(run_python, py_cols, args.window)
+    got, np_s = timed(run_numpy, cols, args.window)
+
+    ok = (np.allclose(got[0], expected[0]) and np.allclose(got[1], expected[1])
+          and (got[2] == np.array(expected[2])).all() and (got[3] == np.array(expected[3])).all()
+          and np.allclose(got[4].monthly_mean, expected[4][0])
+          and math.isclose(got[4].slope_per_year, expected[4][1], rel_tol=1e-6, abs_tol=1e-9))
+    print(f"pure Python: {py_s:8.2f}s")
+    print(f"NumPy:       {np_s:8.2f}s  ({py_s / np_s:.0f}x faster)")
+    print(f"flags: {np.count_nonzero(got[2]):,} z-score, {np.count_nonzero(got[3]):,} IQR; "
+          f"results {'match' if ok else 'DIFFER'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
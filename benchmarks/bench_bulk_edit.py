@@ -0,0 +1,63 @@
+"""Compares per-row admin edits with the batched bulk functions.
+
+Usage: python benchmarks/bench_bulk_edit.py [--rows 10000]
+
+The per-row path is what the admin panel used to do: one
+update_entry_in_db / delete_entry_from_db call, and one commit, per entry.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import _data  # noqa: E402
+import fuel_tracker  # noqa: E402
+import rollups  # noqa: E402
+import storage  # noqa: E402
+
+
+def timed(label, fn):
+    t = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - t
+    print(f"  {label:<34}{seconds:8.2f}s")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fuel_tracker.DB_FILE = os.path.join(tmp, "fuel.db")
+        fuel_tracker.setup_database()
+        conn = storage.get_connection(fuel_tracker.DB_FILE)
+        _data.populate(conn, 2 * args.rows)
+        ids = [row[0] for row in conn.execute("SELECT id FROM fuel_log ORDER BY id")]
+        first, second = ids[:args.rows], ids[args.rows:]
+
+        print(f"Edit price_per_litre on {args.rows:,} entries:")
+        rows = {r["id"]: r for r in fuel_tracker.get_entries(first)}
+        single = timed("update_entry_in_db per row", lambda: [
+            fuel_tracker.update_entry_in_db(i, rows[i]["date"], rows[i]["total_rm"], 2.10, rows[i]["distance_km"])
+            for i in first])
+        bulk = timed("update_entries (one transaction)", lambda: fuel_tracker.update_entries(second, price_per_litre=2.10))
+        print(f"  {'speed-up':<34}{single / bulk:7.0f}x\n")
+
+        print(f"Delete {args.rows:,} entries:")
+        single = timed("delete_entry_from_db per row", lambda: [fuel_tracker.delete_entry_from_db(i) for i in first])
+        bulk = timed("delete_entries (one transaction)", lambda: fuel_tracker.delete_entries(second))
+        print(f"  {'speed-up':<34}{single / bulk:7.0f}x")
+
+        drift = rollups.check(conn)
+        print(f"\nrollups {'consistent' if not drift else f'DRIFTED ({len(drift)} values)'}")
+        storage.close_all()
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
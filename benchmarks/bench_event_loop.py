@@ -0,0 +1,68 @@
+"""Measures how long the Tk event loop stays blocked while windows load.
+
+Usage: python benchmarks/bench_event_loop.py [--rows N]
+
+Opens the dashboard and history windows against a generated database twice:
+once with TaskRunner(inline=True) (queries and figure building on the Tk
+thread, the old behaviour) and once with the background worker. Needs a
+display.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import _data  # noqa: E402
+import fuel_tracker  # noqa: E402
+import gui  # noqa: E402
+import storage  # noqa: E402
+from tasks import EventLoopMonitor, TaskRunner  # noqa: E402
+
+
+def run(inline, settle=1.0):
+    root = tk.Tk()
+    root.withdraw()
+    app = gui.FuelTrackerApp(root, TaskRunner(root, inline=inline))
+    monitor = EventLoopMonitor(root)
+    monitor.start()
+    root.after(50, app.show_dashboard_window)
+    root.after(60, app.show_summary_window)
+
+    start = time.perf_counter()
+    # Pump the loop until both windows are done loading, then a bit longer.
+    while time.perf_counter() - start < settle or app.tasks.busy:
+        root.update()
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    monitor.stop()
+    app.tasks.shutdown()
+    app.export_tasks.shutdown()
+    root.destroy()
+    return monitor.stats(), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fuel_tracker.DB_FILE = os.path.join(tmp, "fuel.db")
+        conn = storage.get_connection(fuel_tracker.DB_FILE)
+        storage.create_schema(conn)
+        _data.populate(conn, args.rows, day="abs(random()) % 3650")
+
+        print(f"{args.rows:,} rows; event-loop stalls while dashboard + history load\n")
+        print(f"{'mode':<22}{'max ms':>10}{'p99 ms':>10}{'mean ms':>10}{'total s':>10}")
+        for label, inline in (("on Tk thread (before)", True), ("worker thread (after)", False)):
+            (worst, p99, mean), elapsed = run(inline)
+            print(f"{label:<22}{worst:>10.1f}{p99:>10.1f}{mean:>10.2f}{elapsed:>10.2f}")
+        storage.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measures export throughput and peak memory on a large fuel_log.
+
+Usage: python benchmarks/bench_export.py [--rows 5000000] [--formats csv,csv.gz,parquet,arrow]
+
+Each export runs in a fresh interpreter that reports its own peak RSS, so
+the numbers aren't inflated by populating the database. A CSV export of
+the last fifth of the date range is included for comparison: with a
+streaming exporter its peak RSS matches the full export.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import _data  # noqa: E402
+import storage  # noqa: E402
+
+VEHICLES = 50
+DAYS = 3650  # dates spread over 2015-01-01 .. 2024-12-29
+
+
+def peak_rss_kib():
+    # ru_maxrss survives fork + exec, so a worker would report the parent's
+    # peak (large after populating); VmHWM belongs to this process image only.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def worker(db, out, start):
+    """Runs one export in this process; prints rows, seconds and peak RSS (KiB)."""
+    import exporter
+
+    t = time.perf_counter()
+    count = exporter.export_file(out, db_file=db, start=start)
+    seconds = time.perf_counter() - t
+    print(count, seconds, peak_rss_kib())
+
+
+def run_worker(db, out, start=None):
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", db, out]
+    if start:
+        cmd.append(start)
+    result = subprocess.run(cmd, cwd=ROOT, check=True, capture_output=True, text=True)
+    count, seconds, rss_kib = result.stdout.split()
+    return int(count), float(seconds), int(rss_kib) / 1024
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        return worker(*sys.argv[2:4], sys.argv[4] if len(sys.argv) > 4 else None)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--formats", default="csv,csv.gz,parquet,arrow")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "fuel.db")
+        conn = storage.get_connection(db)
+        storage.create_schema(conn)
+        t = time.perf_counter()
+        _data.populate(conn, args.rows, VEHICLES, day=f"i * {DAYS} / {args.rows}")
+        print(f"populated {args.rows:,} rows in {time.perf_counter() - t:.1f}s\n")
+        storage.close_all()
+
+        runs = [(ext, None) for ext in args.formats.split(",")] + [("csv", "2023-01-01")]
+        print(f"{'Format':<10}{'Range':<14}{'Rows':>12}{'Seconds':>9}{'Rows/sec':>12}{'Peak RSS MB':>13}{'File MB':>9}")
+        for ext, start in runs:
+            out = os.path.join(tmp, f"export.{ext}")
+            try:
+                count, seconds, rss = run_worker(db, out, start)
+            except subprocess.CalledProcessError as e:
+                print(f"{ext:<10}failed: {e.stderr.strip().splitlines()[-1]}")
+                continue
+            size = os.path.getsize(out) / 2**20
+            print(f"{ext:<10}{(start + '..') if start else 'all':<14}{count:>12,}{seconds:>9.1f}"
+                  f"{count / seconds:>12,.0f}{rss:>13.1f}{size:>9.1f}")
+            os.remove(out)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""File size and insert throughput with stored vs generated derived metrics.
+
+Usage: python benchmarks/bench_generated.py [--rows 1000000] [--single 2000]
+
+"before" is schema v4: litres, km/L, L/100km and RM/km computed in Python
+and stored in every row, plus the covering plot indexes. It is then
+migrated in place to v5 (timed), where they are VIRTUAL generated columns
+and the plot indexes are gone, and compared with a fresh v5 file ("after")
+loaded with the same rows. Insert throughput is measured for bulk loads
+(executemany, IMPORT_CHUNK rows per transaction, like the importer) and
+for --single one-entry transactions (like the GUI form).
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import columnar  # noqa: E402
+import importer  # noqa: E402
+import rollups  # noqa: E402
+import storage  # noqa: E402
+
+IMPORT_CHUNK = 10000
+VEHICLES = 50
+
+V4_INSERT_SQL = f"""
+INSERT INTO fuel_log (date, total_rm, price_per_litre, distance_km, litres, km_per_litre, l_per_100km,
+                      rm_per_km, vehicle_id, date_day)
+VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, {storage.DATE_DAY_SQL.format("?1")})
+"""
+
+
+def make_rows(n, seed=1):
+    rng = random.Random(seed)
+    start = datetime.date(2015, 1, 1).toordinal()
+    rows = []
+    for i in range(n):
+        date = datetime.date.fromordinal(start + i * 3650 // n).isoformat()
+        rows.append((date, round(40 + rng.random() * 40, 2), round(1.9 + rng.random() * 0.5, 2),
+                     round(300 + rng.random() * 200, 1), 1 + i % VEHICLES))
+    return rows
+
+
+def v4_row(row):
+    date, rm, price, dist, vehicle = row
+    litres = rm / price
+    return date, rm, price, dist, litres, dist / litres, litres / dist * 100, rm / dist, vehicle
+
+
+def v5_row(row):
+    return row
+
+
+def load(conn, rows, sql, convert, single):
+    """(bulk rows/sec, single-entry inserts/sec)."""
+    bulk, tail = rows[:-single], rows[-single:]
+    t = time.perf_counter()
+    for i in range(0, len(bulk), IMPORT_CHUNK):
+        with conn:
+            conn.executemany(sql, map(convert, bulk[i:i + IMPORT_CHUNK]))
+    bulk_rate = len(bulk) / (time.perf_counter() - t)
+    t = time.perf_counter()
+    for row in tail:
+        with conn:
+            conn.execute(sql, convert(row))
+    return bulk_rate, len(tail) / (time.perf_counter() - t)
+
+
+def size_mb(conn, path):
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return os.path.getsize(path) / 2**20
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t
+
+
+def new_db(path, target):
+    conn = storage.get_connection(path)
+    storage.migrate(conn, target)
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO vehicles (id, name) VALUES (?, ?)",
+                         [(v, f"Vehicle {v}") for v in range(1, VEHICLES + 1)])
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--single", type=int, default=2000)
+    args = parser.parse_args()
+    rows = make_rows(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_db, after_db = os.path.join(tmp, "before.db"), os.path.join(tmp, "after.db")
+
+        conn = new_db(before_db, 4)
+        before_bulk, before_single = load(conn, rows, V4_INSERT_SQL, v4_row, args.single)
+        before_mb = size_mb(conn, before_db)
+        before_plot = timed(columnar.load_plot_columns, None, before_db)
+
+        migrate_s = timed(storage.migrate, conn)
+        migrated_mb = size_mb(conn, before_db)
+        ok = not rollups.check(conn)
+        storage.close_connection(before_db)
+
+        conn = new_db(after_db, storage.SCHEMA_VERSION)
+        after_bulk, after_single = load(conn, rows, importer.INSERT_SQL, v5_row, args.single)
+        after_mb = size_mb(conn, after_db)
+        after_plot = timed(columnar.load_plot_columns, None, after_db)
+        ok = ok and not rollups.check(conn)
+        storage.close_all()
+
+    print(f"{args.rows:,} rows ({args.rows - args.single:,} bulk + {args.single:,} single-entry transactions)\n")
+    print(f"{'':<30}{'Bulk rows/s':>12}{'Single/s':>10}{'File MB':>9}{'Plot load s':>13}")
+    print(f"{'before (v4, stored metrics)':<30}{before_bulk:>12,.0f}{before_single:>10,.0f}{before_mb:>9.1f}"
+          f"{before_plot:>13.2f}")
+    print(f"{'after (v5, generated)':<30}{after_bulk:>12,.0f}{after_single:>10,.0f}{after_mb:>9.1f}"
+          f"{after_plot:>13.2f}")
+    print(f"\nin-place migration v4 -> v5 (with VACUUM): {migrate_s:.1f}s, {before_mb:.1f} -> {migrated_mb:.1f} MB")
+    print(f"rollups {'consistent' if ok else 'DRIFTED'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Measures bulk import throughput for a generated CSV file.
+
+Usage: python benchmarks/bench_import.py [--rows N] [--chunk-size N]
+
+Target: 1M rows imported in seconds (the one-commit-per-row path in
+add_entry_to_db takes minutes for the same file).
+"""
+import argparse
+import csv
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import importer  # noqa: E402
+import storage  # noqa: E402
+
+
+def write_csv(path, rows, seed=42):
+    rng = random.Random(seed)
+    start = datetime.date(2015, 1, 1)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(importer.FIELDS)
+        for i in range(rows):
+            writer.writerow((
+                (start + datetime.timedelta(days=i % 3650)).isoformat(),
+                round(rng.uniform(20, 120), 2),
+                round(rng.uniform(1.9, 2.2), 2),
+                round(rng.uniform(100, 700), 1),
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=importer.DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "fills.csv")
+        db_path = os.path.join(tmp, "fuel.db")
+        t = time.perf_counter()
+        write_csv(csv_path, args.rows)
+        print(f"generated {args.rows:,} rows in {time.perf_counter() - t:.2f}s")
+
+        result = importer.import_file(csv_path, db_path, args.chunk_size)
+        print(f"imported  {result.inserted:,} rows in {result.seconds:.2f}s "
+              f"({result.inserted / result.seconds:,.0f} rows/sec, chunk={args.chunk_size})")
+        storage.close_all()
+
+
+if __name__ == "__main__":
+    main()
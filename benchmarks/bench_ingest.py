@@ -0,0 +1,113 @@
+"""Load test for server.py: requests/sec and latency of POST /fills on localhost.
+
+Usage: python benchmarks/bench_ingest.py [--requests 20000] [--clients 50] [--batch 1,50] [--flush-ms 0 5 20]
+
+Starts the server on a fresh database in a separate process, then keeps
+--clients keep-alive connections busy posting --batch records per request.
+Each batch size runs with one transaction per request (--flush-rows 1,
+like the GUI form) and with the grouped writer at each --flush-ms. A
+GET /summary at the end checks that every accepted record was stored.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def records(n, seq):
+    return [{"date": f"2024-{1 + (seq + i) % 12:02d}-{1 + (seq + i) % 28:02d}", "total_rm": 50.0,
+             "price_per_litre": 2.05, "distance_km": 400.0 + (seq + i) % 50,
+             "vehicle": f"Truck {(seq + i) % 20}"} for i in range(n)]
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def load(port, total, clients, batch):
+    latencies, statuses = [], {}
+    next_seq = 0
+
+    async def client():
+        nonlocal next_seq
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        while next_seq < total:
+            seq, next_seq = next_seq, next_seq + 1
+            t = time.perf_counter()
+            status, _ = await request(reader, writer, "POST", "/fills", records(batch, seq * batch))
+            latencies.append(time.perf_counter() - t)
+            statuses[status] = statuses.get(status, 0) + 1
+        writer.close()
+
+    t = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    seconds = time.perf_counter() - t
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, summary = await request(reader, writer, "GET", "/summary")
+    writer.close()
+    return seconds, sorted(latencies), statuses, summary["count"]
+
+
+def start_server(db, flush_rows, flush_ms):
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--db", db, "--port", "0",
+                             "--flush-rows", str(flush_rows), "--flush-ms", str(flush_ms)],
+                            cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()  # "Listening on http://host:port"
+    if not line:
+        raise RuntimeError("server failed to start")
+    return proc, int(line.rsplit(":", 1)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--batch", default="1,50", help="records per request, comma separated")
+    parser.add_argument("--flush-ms", type=float, nargs="+", default=[0, 5, 20],
+                        help="grouped writer time thresholds to try")
+    args = parser.parse_args()
+
+    print(f"{args.requests:,} requests over {args.clients} connections\n")
+    print(f"{'Records/req':>11}  {'Writer':<16}{'Req/sec':>9}{'Records/sec':>13}{'p50 ms':>8}{'p99 ms':>8}  Statuses")
+    ok = True
+    for batch in (int(b) for b in args.batch.split(",")):
+        writers = [("per request", 1, 0)] + [(f"grouped, {ms:g} ms", 1000, ms) for ms in args.flush_ms]
+        for label, flush_rows, flush_ms in writers:
+            with tempfile.TemporaryDirectory() as tmp:
+                proc, port = start_server(os.path.join(tmp, "fuel.db"), flush_rows, flush_ms)
+                try:
+                    seconds, latencies, statuses, stored = asyncio.run(
+                        load(port, args.requests, args.clients, batch))
+                finally:
+                    proc.terminate()
+                    proc.wait()
+            accepted = statuses.get(201, 0) * batch
+            ok &= stored == accepted
+            p50, p99 = (latencies[int(q * (len(latencies) - 1))] * 1000 for q in (0.50, 0.99))
+            print(f"{batch:>11}  {label:<16}{args.requests / seconds:>9,.0f}{accepted / seconds:>13,.0f}"
+                  f"{p50:>8.1f}{p99:>8.1f}  {statuses}{'' if stored == accepted else f' STORED {stored:,}'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Bytes per record of the column store against row objects, for 1M rows.
+
+Usage: python benchmarks/bench_memory.py [--rows 1000000]
+
+Memory is what tracemalloc sees the Python side hold once a load returns
+(NumPy reports its buffers to it too), plus the peak during the load.
+Compared, for a whole row and for the three plot fields:
+
+    sqlite3.Row list    fetchall() of SELECT *, as the history and summary
+                        windows used to hold
+    tuple list          the same with row_factory = None
+    Python lists        dates / km_l_values / rm_km_values as the old
+                        dashboard built them (datetime.date and float objects)
+    columnar            columnar.load_columns / load_plot_columns
+"""
+import argparse
+import datetime
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import _data  # noqa: E402
+import columnar  # noqa: E402
+import storage  # noqa: E402
+
+
+def row_objects(conn):
+    return conn.execute("SELECT * FROM fuel_log").fetchall()
+
+
+def row_tuples(conn):
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor.execute("SELECT * FROM fuel_log").fetchall()
+
+
+def plot_lists(conn):
+    rows = conn.execute("SELECT date, km_per_litre, rm_per_km FROM fuel_log ORDER BY date_day").fetchall()
+    dates = [datetime.datetime.strptime(row["date"], "%Y-%m-%d").date() for row in rows]
+    km_l_values = [row["km_per_litre"] for row in rows]
+    rm_km_values = [row["rm_per_km"] for row in rows]
+    return dates, km_l_values, rm_km_values
+
+
+def measure(fn, *args):
+    """(result, retained bytes, peak bytes, seconds); timed without tracing."""
+    gc.collect()
+    t = time.perf_counter()
+    fn(*args)
+    seconds = time.perf_counter() - t
+    gc.collect()
+    tracemalloc.start()
+    result = fn(*args)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, peak, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "fuel.db")
+        conn = storage.get_connection(db)
+        storage.create_schema(conn)
+        _data.populate(conn, args.rows, total_rm="40.0 + abs(random()) % 2000 / 100.0",
+                       distance_km="350.0 + abs(random()) % 100")
+
+        cases = [
+            ("whole row", "sqlite3.Row list", row_objects, (conn,)),
+            ("whole row", "tuple list", row_tuples, (conn,)),
+            ("whole row", "columnar", columnar.load_columns, (columnar.ALL_FIELDS, None, db)),
+            ("plot", "Python lists", plot_lists, (conn,)),
+            ("plot", "columnar", columnar.load_plot_columns, (None, db)),
+        ]
+        print(f"{args.rows:,} rows\n")
+        print(f"{'Fields':<11}{'Representation':<19}{'Bytes/row':>10}{'Peak B/row':>12}{'Load s':>8}")
+        ok = True
+        for fields, name, fn, fn_args in cases:
+            result, retained, peak, seconds = measure(fn, *fn_args)
+            count = len(result) if isinstance(result, list) else len(next(iter(
+                result.values() if isinstance(result, dict) else result)))
+            ok &= count == args.rows
+            print(f"{fields:<11}{name:<19}{retained / args.rows:>10.1f}{peak / args.rows:>12.1f}{seconds:>8.2f}")
+            del result
+        storage.close_all()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Cost of the perf instrumentation, off and on, for the data functions the windows call.
+
+Usage: python benchmarks/bench_perf.py [--rows 50000] [--calls 1000] [--rounds 5]
+
+Each workload runs --calls times with perf.recorder disabled (the
+default: one attribute check per timed function and statement), then
+enabled, alternating for --rounds and keeping the best of each, with the
+query cache off so every call reaches SQLite. The
+recorder's own report for the enabled runs is printed at the end, with
+--slow-sql-ms set low enough to show the slow log.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import _data  # noqa: E402
+import fuel_tracker  # noqa: E402
+import perf  # noqa: E402
+import storage  # noqa: E402
+
+VEHICLES = 20
+
+
+WORKLOADS = (
+    ("get_summary", lambda i: fuel_tracker.get_summary(1 + i % VEHICLES)),
+    ("get_entries_page", lambda i: fuel_tracker.get_entries_page(vehicle_id=1 + i % VEHICLES)),
+    ("get_period_summaries", lambda i: fuel_tracker.get_period_summaries("month", 1 + i % VEHICLES)),
+    ("add_entry_to_db", lambda i: fuel_tracker.add_entry_to_db("2025-06-01", 50.0, 2.05, 400.0, 1)),
+)
+
+
+def run(fn, calls):
+    t = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - t) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--slow-sql-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fuel_tracker.DB_FILE = os.path.join(tmp, "fuel.db")
+        fuel_tracker.setup_database()
+        _data.populate(storage.get_connection(fuel_tracker.DB_FILE), args.rows, VEHICLES)
+        fuel_tracker.query_cache.enabled = False
+        perf.recorder.slow_sql_ms = args.slow_sql_ms
+
+        print(f"{args.rows:,} rows, {args.calls:,} calls each\n")
+        print(f"{'Workload':<24}{'Off us/call':>12}{'On us/call':>12}{'Overhead':>10}")
+        for name, fn in WORKLOADS:
+            run(fn, min(args.calls, 100))  # warm the statement cache and page cache
+            off = on = float("inf")
+            for _ in range(args.rounds):
+                perf.recorder.enabled = False
+                off = min(off, run(fn, args.calls))
+                perf.recorder.enabled = True
+                on = min(on, run(fn, args.calls))
+            print(f"{name:<24}{off:>12.1f}{on:>12.1f}{(on - off) / off:>10.1%}")
+        perf.recorder.enabled = False
+        storage.close_all()
+
+    print("\n" + perf.recorder.report(limit=5))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Times repeated window loads with and without the query result cache.
+
+Usage: python benchmarks/bench_query_cache.py [--rows 50000] [--opens 200] [--write-every 20]
+
+Each "open" runs what the windows ask for (get_summary_data for one
+vehicle, get_plot_data, the first history page and the monthly stats);
+every --write-every opens an entry is added, which must invalidate the
+cache. Results with the cache are compared with uncached ones after every
+write, and the hit/miss counters are printed.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import _data  # noqa: E402
+import fuel_tracker  # noqa: E402
+import storage  # noqa: E402
+
+VEHICLES = 20
+
+
+def open_windows(vehicle_id):
+    return (fuel_tracker.get_summary_data(vehicle_id), fuel_tracker.get_plot_data(vehicle_id),
+            fuel_tracker.get_entries_page(vehicle_id=vehicle_id),
+            fuel_tracker.get_period_summaries("month", vehicle_id))
+
+
+def as_plain(results):
+    return [[tuple(r) for r in rows] if isinstance(rows, list) else rows for rows in results]
+
+
+def run(opens, write_every, check=False):
+    ok = True
+    t = time.perf_counter()
+    for i in range(opens):
+        vehicle_id = 1 + i % 3  # a user flipping between a few vehicles
+        if i and i % write_every == 0:
+            fuel_tracker.add_entry_to_db("2025-06-01", 50.0, 2.05, 400.0, vehicle_id)
+        results = open_windows(vehicle_id)
+        if check:
+            fuel_tracker.query_cache.enabled = False
+            ok &= as_plain(results) == as_plain(open_windows(vehicle_id))
+            fuel_tracker.query_cache.enabled = True
+    return time.perf_counter() - t, ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--opens", type=int, default=200)
+    parser.add_argument("--write-every", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fuel_tracker.DB_FILE = os.path.join(tmp, "fuel.db")
+        fuel_tracker.setup_database()
+        _data.populate(storage.get_connection(fuel_tracker.DB_FILE), args.rows, VEHICLES)
+
+        fuel_tracker.query_cache.enabled = False
+        uncached, _ = run(args.opens, args.write_every)
+        fuel_tracker.query_cache.enabled = True
+        cached, _ = run(args.opens, args.write_every)
+        stats = fuel_tracker.query_cache.stats()
+        _, ok = run(args.opens, args.write_every, check=True)
+        storage.close_all()
+
+    per_open = 1000 / args.opens
+    print(f"{args.opens} window opens over {args.rows:,} rows, a write every {args.write_every}:")
+    print(f"  uncached  {uncached * per_open:8.2f} ms/open")
+    print(f"  cached    {cached * per_open:8.2f} ms/open  ({uncached / cached:.1f}x)")
+    print(f"  hits {stats.hits}, misses {stats.misses} ({stats.hits / (stats.hits + stats.misses):.0%} hit rate), "
+          f"invalidations {stats.invalidations}, evictions {stats.evictions}, "
+          f"{stats.entries} entries / {stats.rows:,} rows held")
+    print(f"  cached results {'match' if ok else 'DIFFER FROM'} fresh queries")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
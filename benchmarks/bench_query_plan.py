@@ -0,0 +1,70 @@
+"""Checks that the history and plot queries never sort fuel_log, and times them.
+
+Usage: python benchmarks/bench_query_plan.py [--rows N]
+
+Fails (exit 1) if EXPLAIN QUERY PLAN shows a temp B-tree sort or an
+index isn't used where expected.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import _data  # noqa: E402
+import storage  # noqa: E402
+
+HISTORY_SQL = "SELECT * FROM fuel_log ORDER BY date_day DESC, id DESC"
+PLOT_SQL = """
+SELECT date_day, km_per_litre, rm_per_km FROM fuel_log
+WHERE date_day IS NOT NULL ORDER BY date_day ASC
+"""
+
+# (query, substrings every plan must contain). The plot used a covering
+# index until the metrics became generated columns, which SQLite never
+# reads from an index; it now walks the same index as the history.
+EXPECTED = (
+    ("history", HISTORY_SQL, ("USING INDEX idx_fuel_log_date_day",)),
+    ("plot", PLOT_SQL, ("USING INDEX idx_fuel_log_date_day",)),
+)
+
+
+def plan(conn, sql):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "fuel.db")
+        conn = storage.get_connection(db)
+        storage.create_schema(conn)
+        t = time.perf_counter()
+        _data.populate(conn, args.rows, day="abs(random()) % 3650")
+        print(f"populated {args.rows:,} rows in {time.perf_counter() - t:.1f}s\n")
+
+        for name, sql, must_have in EXPECTED:
+            steps = plan(conn, sql)
+            sorts = [s for s in steps if "TEMP B-TREE" in s]
+            missing = [m for m in must_have if not any(m in s for s in steps)]
+            status = "OK" if not sorts and not missing else "FAIL"
+            ok = ok and status == "OK"
+
+            t = time.perf_counter()
+            first = conn.execute(sql).fetchmany(100)
+            first_ms = (time.perf_counter() - t) * 1000
+            print(f"[{status}] {name}: {' | '.join(steps)}")
+            print(f"       first 100 rows in {first_ms:.2f} ms ({len(first)} returned)")
+        storage.close_all()
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
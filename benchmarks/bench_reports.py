@@ -0,0 +1,71 @@
+"""Report generation: full runs by pool size, and incremental reruns after no change and one edit.
+
+Usage: python benchmarks/bench_reports.py [--rows 1000] [--vehicles 5] [--workers 1 4]
+                                          [--format png pdf html] [--checksum-rows 100000]
+
+A synthetic fleet of --rows fills is reported in full (force=True) once
+per --workers value; a pool only pays off with that many CPUs free. Then
+the same directory is brought up to date with nothing changed (only the
+checksums are computed) and after one fill is edited (one report is
+redrawn). Finally period_checksums is timed on a --checksum-rows fleet,
+the cost every incremental run pays before it draws anything.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import reports  # noqa: E402
+import storage  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def run(label, out_dir, db_file, formats, **kwargs):
+    start = time.perf_counter()
+    result = reports.generate_reports(out_dir, db_file, formats, **kwargs)
+    elapsed = time.perf_counter() - start
+    per_report = f"{elapsed / result.generated * 1000:>12.1f}" if result.generated else f"{'-':>12}"
+    print(f"{label:<28}{result.generated:>9}{result.unchanged:>11}{elapsed:>10.2f}{per_report}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--vehicles", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--format", nargs="+", default=list(reports.FORMATS), choices=reports.FORMATS)
+    parser.add_argument("--checksum-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "fleet.db")
+        synthetic.generate(db_file, args.rows, args.vehicles)
+        out_dir = os.path.join(tmp, "reports")
+        print(f"{args.rows:,} fills, {args.vehicles} vehicles, {os.cpu_count()} CPUs, formats {' '.join(args.format)}\n")
+        print(f"{'Run':<28}{'Written':>9}{'Unchanged':>11}{'Seconds':>10}{'ms/report':>12}")
+        for workers in dict.fromkeys(args.workers):
+            run(f"full, {workers} worker(s)", out_dir, db_file, args.format, workers=workers, force=True)
+        run("nothing changed", out_dir, db_file, args.format)
+
+        conn = storage.get_connection(db_file)
+        with conn:
+            conn.execute("UPDATE fuel_log SET total_rm = total_rm + 1 WHERE id = (SELECT max(id) FROM fuel_log)")
+        storage.bump_data_version(db_file)
+        run("one fill edited", out_dir, db_file, args.format, workers=max(args.workers))
+
+        big = os.path.join(tmp, "checksums.db")
+        synthetic.generate(big, args.checksum_rows)
+        start = time.perf_counter()
+        count = len(reports.period_checksums(big))
+        elapsed = time.perf_counter() - start
+        print(f"\nperiod_checksums: {args.checksum_rows:,} fills, {count:,} vehicle-months in {elapsed:.2f}s "
+              f"({elapsed / args.checksum_rows * 1e6:.2f} us/fill)")
+        storage.close_all()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
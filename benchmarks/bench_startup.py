@@ -0,0 +1,62 @@
+"""Measures cold-process startup of the headless CLI against the GUI imports.
+
+Usage: python benchmarks/bench_startup.py [--runs N]
+
+Each run is a fresh interpreter, so nothing is cached between runs.
+`fuel_tracker summary` should cost milliseconds more than a bare
+interpreter, not the ~0.5 s a matplotlib + Tk backend import takes.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def time_command(cmd, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "fuel.db")
+        py = sys.executable
+        # Create the schema once so the timed runs don't include the migration.
+        subprocess.run([py, "fuel_tracker.py", "--db", db, "summary"], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL)
+
+        cases = (
+            ("bare interpreter", [py, "-c", "pass"]),
+            ("fuel_tracker summary", [py, "fuel_tracker.py", "--db", db, "summary"]),
+            ("import matplotlib+tkagg", [py, "-c", "import matplotlib.backends.backend_tkagg"]),
+        )
+        print(f"median of {args.runs} cold runs\n")
+        results = {}
+        for label, cmd in cases:
+            results[label] = time_command(cmd, args.runs)
+            print(f"{label:<26}{results[label]:>8.1f} ms")
+
+        heavy = subprocess.run(
+            [py, "-c", "import sys, fuel_tracker, cli; "
+                       "print(sorted(m for m in ('tkinter', 'matplotlib', 'numpy') if m in sys.modules))"],
+            cwd=ROOT, check=True, capture_output=True, text=True).stdout.strip()
+        print(f"\nheavy modules loaded by fuel_tracker + cli: {heavy}")
+        print(f"summary overhead over bare interpreter: "
+              f"{results['fuel_tracker summary'] - results['bare interpreter']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
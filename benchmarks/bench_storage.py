@@ -0,0 +1,80 @@
+"""Compares ops/sec of the pooled WAL connection against connect-per-call.
+
+Usage: python benchmarks/bench_storage.py [--ops N]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import fuel_tracker  # noqa: E402
+import storage  # noqa: E402
+
+
+# --- Baseline: the old behaviour, one connection (and journal fsync) per call ---
+
+def legacy_add(db_file, date, total_rm, price_per_litre, distance_km):
+    conn = sqlite3.connect(db_file)
+    conn.execute("""
+    INSERT INTO fuel_log (date, total_rm, price_per_litre, distance_km)
+    VALUES (?, ?, ?, ?)
+    """, (date, total_rm, price_per_litre, distance_km))
+    conn.commit()
+    conn.close()
+
+
+def legacy_summary(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.execute("SELECT COUNT(id), SUM(total_rm), SUM(litres), SUM(distance_km) FROM fuel_log").fetchone()
+    conn.close()
+
+
+def timed(label, ops, fn):
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {ops / elapsed:>12,.0f} ops/sec")
+    return ops / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.db")
+        pooled_db = os.path.join(tmp, "pooled.db")
+
+        # Legacy db keeps the default rollback journal.
+        fuel_tracker.DB_FILE = legacy_db
+        fuel_tracker.setup_database()
+        storage.close_connection(legacy_db)
+        sqlite3.connect(legacy_db).execute("PRAGMA journal_mode = DELETE").fetchone()
+
+        fuel_tracker.DB_FILE = pooled_db
+        fuel_tracker.setup_database()
+
+        print(f"{args.ops} operations each\n")
+        old_ins = timed("insert (connect per call)", args.ops,
+                        lambda i: legacy_add(legacy_db, "2025-01-01", 50.0, 2.05, 400.0))
+        new_ins = timed("insert (pooled, WAL)", args.ops,
+                        lambda i: fuel_tracker.add_entry_to_db("2025-01-01", 50.0, 2.05, 400.0))
+        old_sum = timed("summary (connect per call)", args.ops,
+                        lambda i: legacy_summary(legacy_db))
+        new_sum = timed("summary (pooled, WAL)", args.ops,
+                        lambda i: storage.get_connection(pooled_db).execute(
+                            "SELECT COUNT(id), SUM(total_rm), SUM(litres), SUM(distance_km) FROM fuel_log").fetchone())
+
+        print(f"\ninsert speedup:  {new_ins / old_ins:.1f}x")
+        print(f"summary speedup: {new_sum / old_sum:.1f}x")
+        storage.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Shows per-vehicle query latency staying flat as the fleet grows.
+
+Usage: python benchmarks/bench_vehicles.py [--vehicles 500] [--fills 5000] [--steps 4]
+
+The fleet is grown in steps up to --vehicles vehicles with --fills fills
+each. After every step a sample of vehicles is queried through the
+fuel_tracker API (history page, chart data, summaries) and timed, next to
+the same chart query forced through a full-table filter (NOT INDEXED) for
+contrast. Fails (exit 1) if any per-vehicle query plan scans fuel_log.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import _data  # noqa: E402
+import fuel_tracker  # noqa: E402
+import storage  # noqa: E402
+
+SAMPLE = 20  # vehicles timed per step
+
+# (name, SQL, parameters) as the fuel_tracker API issues them for vehicle 1
+PLANS = (
+    ("history page", """
+     SELECT * FROM fuel_log WHERE vehicle_id = ? AND date_day IS NOT NULL
+     ORDER BY date_day DESC, id DESC LIMIT 200""", (1,)),
+    ("next page", """
+     SELECT * FROM fuel_log WHERE vehicle_id = ? AND (date_day, id) < (?, ?)
+     ORDER BY date_day DESC, id DESC LIMIT 200""", (1, 20000, 1)),
+    ("chart data", """
+     SELECT date_day, km_per_litre, rm_per_km FROM fuel_log
+     WHERE vehicle_id = ? AND date_day IS NOT NULL ORDER BY date_day ASC""", (1,)),
+    ("summary", """
+     SELECT count, total_rm, total_litres, total_distance FROM fuel_rollup
+     WHERE vehicle_id = ? AND granularity = 'all' AND period = ''""", (1,)),
+)
+
+FULL_FILTER_SQL = """
+SELECT date_day, km_per_litre, rm_per_km FROM fuel_log NOT INDEXED
+WHERE vehicle_id = ? AND date_day IS NOT NULL ORDER BY date_day ASC
+"""
+
+
+def add_vehicles(conn, first, last, fills):
+    """Adds vehicles first..last (inclusive ids), each with `fills` fills two days apart."""
+    count = last - first + 1
+    _data.populate(conn, fills * count, count, first, start="2010-01-01", day=f"i / {count} * 2",
+                   distance_km="350.0 + abs(random()) % 100")
+
+
+def median_ms(fn, vehicle_ids):
+    times = []
+    for vehicle_id in vehicle_ids:
+        t = time.perf_counter()
+        fn(vehicle_id)
+        times.append((time.perf_counter() - t) * 1000)
+    return statistics.median(times)
+
+
+def first_page(vehicle_id):
+    return fuel_tracker.get_entries_page(vehicle_id=vehicle_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=500)
+    parser.add_argument("--fills", type=int, default=5000)
+    parser.add_argument("--steps", type=int, default=4)
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        fuel_tracker.DB_FILE = os.path.join(tmp, "fuel.db")
+        fuel_tracker.setup_database()
+        conn = storage.get_connection(fuel_tracker.DB_FILE)
+
+        for name, sql, params in PLANS:
+            steps = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            bad = [s for s in steps if s.startswith("SCAN") or "TEMP B-TREE" in s]
+            ok = ok and not bad
+            print(f"[{'FAIL' if bad else 'OK'}] {name}: {' | '.join(steps)}")
+
+        print(f"\n{'Vehicles':>8}{'Rows':>12}{'Page ms':>10}{'Chart ms':>10}{'Summary ms':>12}"
+              f"{'Monthly ms':>12}{'Full-filter chart ms':>22}")
+        done = 0
+        for step in range(1, args.steps + 1):
+            target = args.vehicles * step // args.steps
+            t = time.perf_counter()
+            add_vehicles(conn, done + 1, target, args.fills)
+            populate_s = time.perf_counter() - t
+            done = target
+
+            sample = random.sample(range(1, done + 1), min(SAMPLE, done))
+            page = median_ms(first_page, sample)
+            chart = median_ms(fuel_tracker.get_plot_data, sample)
+            summary = median_ms(fuel_tracker.get_summary, sample)
+            monthly = median_ms(lambda v: fuel_tracker.get_period_summaries("month", v), sample)
+            full = median_ms(lambda v: conn.execute(FULL_FILTER_SQL, (v,)).fetchall(), sample[:3])
+            print(f"{done:>8}{done * args.fills:>12,}{page:>10.2f}{chart:>10.2f}{summary:>12.3f}"
+                  f"{monthly:>12.3f}{full:>22.1f}   (+{populate_s:.0f}s to populate)")
+        storage.close_all()
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
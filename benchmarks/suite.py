@@ -0,0 +1,308 @@
+"""Benchmark suite: the app's main operations on generated fleets, saved as JSON and compared run to run.
+
+Usage: python benchmarks/suite.py [--sizes 10000 100000 1000000 10000000] [--only plot history ...]
+                                  [--repeat 5] [--threshold 0.2] [--baseline FILE] [--data-dir DIR]
+
+For each size a fleet is generated with synthetic.generate (same seed, so
+the same data every run; --data-dir keeps the databases between runs, as
+10M rows take minutes to build). Every benchmark is then timed like
+timeit: calls are looped until a sample takes at least MIN_SAMPLE seconds,
+--repeat samples are taken (fewer if a benchmark has used up MAX_SECONDS),
+and the best and median seconds per call are kept. The query cache is off
+throughout, so reads reach SQLite, and the rows the insert benchmarks
+add are deleted again before the next benchmark.
+
+Results go to --results-dir as <timestamp>.json with the commit, Python
+and SQLite versions. Each benchmark is compared on its best time with
+--baseline, or by default its newest earlier result there (so a run with
+--only doesn't hide the rest); one more than --threshold slower is
+flagged as a regression and the exit status is then 1.
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import columnar  # noqa: E402
+import exporter  # noqa: E402
+import fuel_tracker  # noqa: E402
+import importer  # noqa: E402
+import series  # noqa: E402
+import storage  # noqa: E402
+import synthetic  # noqa: E402
+
+MIN_SAMPLE = 0.2
+MAX_SECONDS = 30
+SEED = 1
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+class Context:
+    """The generated database plus the keys benchmarks need from it."""
+
+    def __init__(self, db_file, tmp):
+        self.db_file = db_file
+        self.tmp = tmp
+        conn = storage.get_connection(db_file)
+        # The busiest vehicle and a key halfway down the history, for paging.
+        self.vehicle_id = conn.execute("""
+        SELECT vehicle_id FROM fuel_rollup WHERE granularity = 'all' AND vehicle_id != ?
+        ORDER BY count DESC LIMIT 1
+        """, (fuel_tracker.FLEET,)).fetchone()[0]
+        count = fuel_tracker.get_summary()["count"]
+        self.middle = tuple(conn.execute(
+            "SELECT date_day, id FROM fuel_log ORDER BY date_day DESC, id DESC LIMIT 1 OFFSET ?",
+            (count // 2,)).fetchone())
+        last = conn.execute("SELECT max(date) FROM fuel_log").fetchone()[0]
+        self.last_year = (str(datetime.date.fromisoformat(last) - datetime.timedelta(days=364)), last)
+
+
+# --- Benchmarks ---
+# name -> fn(ctx); each call is one operation as the app performs it.
+# Inserted rows are all INSERTED and are deleted again after each insert.* benchmark.
+
+INSERTED = ("2025-06-01", 120.0, 2.05, 540.0)
+
+
+def insert_entry(ctx):
+    fuel_tracker.add_entry_to_db(*INSERTED, ctx.vehicle_id)
+
+
+def insert_batch(ctx):
+    """1,000 records in one transaction, as the importer and server write them."""
+    records = [INSERTED + (None,)] * 1000
+    conn = storage.get_connection(ctx.db_file)
+    with conn:
+        importer.insert_records(conn, records, ctx.vehicle_id, {})
+    storage.bump_data_version(ctx.db_file)
+
+
+def summary_fleet(ctx):
+    fuel_tracker.get_summary()
+
+
+def summary_monthly(ctx):
+    fuel_tracker.get_period_summaries("month")
+
+
+def plot_fleet(ctx):
+    columnar.load_plot_columns(None, ctx.db_file)
+
+
+def plot_vehicle(ctx):
+    columnar.load_plot_columns(ctx.vehicle_id, ctx.db_file)
+
+
+def history_first_page(ctx):
+    fuel_tracker.get_entries_page()
+
+
+def history_middle_page(ctx):
+    fuel_tracker.get_entries_page(after=ctx.middle)
+
+
+def history_sorted_by_efficiency(ctx):
+    fuel_tracker.get_entries_page("km_per_litre")
+
+
+def export_csv_last_year(ctx):
+    exporter.export_file(os.path.join(ctx.tmp, "export.csv"), None, ctx.db_file, *ctx.last_year)
+
+
+def export_csv_vehicle(ctx):
+    exporter.export_file(os.path.join(ctx.tmp, "vehicle.csv"), None, ctx.db_file, vehicle_id=ctx.vehicle_id)
+
+
+def _dashboard(ctx, vehicle_id):
+    import charts
+
+    plot = series.SeriesCache(lambda: columnar.load_plot_columns(vehicle_id, ctx.db_file)).series(0)
+    charts.render_dashboard(plot)
+
+
+def dashboard_fleet(ctx):
+    """Opening the fleet dashboard: load, downsample, build and draw (Agg)."""
+    _dashboard(ctx, None)
+
+
+def dashboard_vehicle(ctx):
+    _dashboard(ctx, ctx.vehicle_id)
+
+
+BENCHMARKS = {
+    "insert.entry": insert_entry,
+    "insert.batch_1000": insert_batch,
+    "summary.fleet": summary_fleet,
+    "summary.monthly": summary_monthly,
+    "plot.fleet": plot_fleet,
+    "plot.vehicle": plot_vehicle,
+    "history.first_page": history_first_page,
+    "history.middle_page": history_middle_page,
+    "history.by_efficiency": history_sorted_by_efficiency,
+    "export.csv_last_year": export_csv_last_year,
+    "export.csv_vehicle": export_csv_vehicle,
+    "dashboard.fleet": dashboard_fleet,
+    "dashboard.vehicle": dashboard_vehicle,
+}
+
+
+def time_benchmark(fn, ctx, repeat):
+    """(best, median) seconds per call."""
+    fn(ctx)  # warm-up: imports, statement cache, page cache
+    number, samples, spent = 1, [], 0.0
+    while len(samples) < repeat and not (len(samples) >= 2 and spent > MAX_SECONDS):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(ctx)
+        elapsed = time.perf_counter() - start
+        spent += elapsed
+        if elapsed < MIN_SAMPLE and not samples:
+            number *= max(2, min(10, int(MIN_SAMPLE / max(elapsed, 1e-9))))
+            continue
+        samples.append(elapsed / number)
+    return min(samples), statistics.median(samples)
+
+
+def cleanup(ctx):
+    """Deletes the rows the insert benchmarks added."""
+    conn = storage.get_connection(ctx.db_file)
+    with conn:
+        conn.execute(f"""
+        DELETE FROM fuel_log WHERE date_day = {storage.DATE_DAY_SQL.format("?")}
+            AND total_rm = ? AND price_per_litre = ? AND distance_km = ?
+        """, INSERTED)
+    storage.bump_data_version(ctx.db_file)
+
+
+def fleet_db(size, data_dir):
+    """Path of the generated database for size, building it if needed."""
+    path = os.path.join(data_dir, f"fleet-{size}-seed{SEED}.db")
+    if os.path.exists(path):
+        return path
+    print(f"generating {size:,} rows into {path} ...", file=sys.stderr, flush=True)
+    building = path + ".building"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(building + suffix):
+            os.remove(building + suffix)
+    result = synthetic.generate(building, size, seed=SEED)
+    storage.close_connection(building)
+    os.replace(building, path)
+    print(f"  {result.vehicles:,} vehicles in {result.seconds:.0f}s", file=sys.stderr)
+    return path
+
+
+def machine_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def load_baseline(results_dir, path=None):
+    """{key: result} from path, or else for each benchmark its newest result in results_dir."""
+    files = [path] if path else sorted(glob.glob(os.path.join(results_dir, "*.json")), reverse=True)
+    baseline = {}
+    for file in files:
+        with open(file) as f:
+            for key, result in json.load(f)["results"].items():
+                baseline.setdefault(key, result)
+    return baseline
+
+
+def compare(results, baseline, threshold):
+    """Prints each benchmark against the baseline. Returns the regressed keys."""
+    regressions = []
+    print(f"\n{'Benchmark':<24}{'Rows':>11}{'Best ms':>11}{'Median ms':>11}{'Baseline':>11}{'Change':>9}")
+    for key, r in results.items():
+        name, size = key.rsplit("@", 1)
+        old = baseline.get(key)
+        line = f"{name:<24}{int(size):>11,}{r['best'] * 1000:>11.3f}{r['median'] * 1000:>11.3f}"
+        if old:
+            change = r["best"] / old["best"] - 1
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(key)
+            elif change < -threshold:
+                flag = "  faster"
+            line += f"{old['best'] * 1000:>11.3f}{change:>+9.1%}{flag}"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--only", nargs="+", metavar="PREFIX",
+                        help="run benchmarks whose names start with these (e.g. plot history.first_page)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="flag benchmarks this much slower than the baseline (default: %(default)s)")
+    parser.add_argument("--baseline", help="results JSON to compare with (default: each benchmark's newest "
+                                           "result in --results-dir)")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--data-dir", help="keep the generated databases here (default: a temporary directory)")
+    parser.add_argument("--no-save", action="store_true", help="don't write this run's results")
+    args = parser.parse_args()
+
+    names = [n for n in BENCHMARKS if not args.only or any(n.startswith(p) for p in args.only)]
+    if not names:
+        parser.error("no benchmark matches --only")
+    fuel_tracker.query_cache.enabled = False
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        for size in args.sizes:
+            fuel_tracker.DB_FILE = fleet_db(size, data_dir)
+            ctx = Context(fuel_tracker.DB_FILE, tmp)
+            try:
+                for name in names:
+                    try:
+                        best, median = time_benchmark(BENCHMARKS[name], ctx, args.repeat)
+                    finally:
+                        if name.startswith("insert."):
+                            cleanup(ctx)
+                    results[f"{name}@{size}"] = {"best": best, "median": median}
+                    print(f"  {name:<24}{size:>11,} rows {best * 1000:>10.3f} ms", file=sys.stderr, flush=True)
+            finally:
+                storage.close_all()
+
+    regressions = compare(results, load_baseline(args.results_dir, args.baseline), args.threshold)
+
+    if not args.no_save:
+        os.makedirs(args.results_dir, exist_ok=True)
+        path = os.path.join(args.results_dir, datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+        with open(path, "w") as f:
+            json.dump({"meta": dict(machine_info(), seed=SEED, repeat=args.repeat), "results": results}, f,
+                      indent=1)
+        print(f"\nresults saved to {path}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""In-memory LRU cache of query results, invalidated by the data version.
+
+Opening a window re-ran the same read queries and rebuilt the same
+sqlite3.Row lists even when nothing had changed. QueryCache memoizes them
+per (database file, query, parameters) and drops every result for a file
+as soon as storage.data_version() moves past the version they were read
+at: our own writes bump it, and PRAGMA data_version catches commits from
+other connections and processes.
+
+Results are shared between callers and must be treated as read-only.
+"""
+import functools
+import threading
+from collections import OrderedDict, namedtuple
+
+import storage
+
+MAX_ENTRIES = 256
+# Bound on the rows held across all entries; a larger result is returned
+# uncached rather than evicting everything else.
+MAX_ROWS = 100_000
+
+CacheStats = namedtuple("CacheStats", "hits misses invalidations evictions entries rows")
+
+
+def _cost(result):
+    """Rows in a result: its length for a list, the first list in a tuple, else 1."""
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        result = result[0]
+    return max(len(result), 1) if isinstance(result, list) else 1
+
+
+class QueryCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_rows=MAX_ROWS):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.enabled = True
+        self._entries = OrderedDict()  # (db_file, key) -> (cost, result)
+        self._versions = {}  # db_file -> data version the entries were read at
+        self._rows = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.invalidations = self.evictions = 0
+
+    def get(self, db_file, key, loader):
+        """Returns the cached result for key, or loader() (cached if it fits)."""
+        if not self.enabled:
+            return loader()
+        version = storage.data_version(db_file)
+        with self._lock:
+            if version != self._versions.get(db_file):
+                self._drop(db_file)
+                self._versions[db_file] = version
+            entry = self._entries.get((db_file, key))
+            if entry is not None:
+                self._entries.move_to_end((db_file, key))
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        result = loader()
+        cost = _cost(result)
+        with self._lock:
+            # Another thread may have moved the version on while we loaded.
+            if cost <= self.max_rows and self._versions.get(db_file) == version:
+                old = self._entries.pop((db_file, key), None)
+                self._rows += cost - (old[0] if old else 0)
+                self._entries[(db_file, key)] = (cost, result)
+                while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                    self._rows -= self._entries.popitem(last=False)[1][0]
+                    self.evictions += 1
+        return result
+
+    def _drop(self, db_file):
+        stale = [k for k in self._entries if k[0] == db_file]
+        for k in stale:
+            self._rows -= self._entries.pop(k)[0]
+        if stale:
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._rows = 0
+
+    def stats(self):
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.invalidations, self.evictions,
+                              len(self._entries), self._rows)
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.invalidations = self.evictions = 0
+
+    def cached(self, db_file):
+        """Decorator caching fn's results in this cache, keyed by its
+        arguments with defaults filled in (so f(), f(None) and
+        f(vehicle_id=None) share an entry). db_file() returns the database
+        the call reads."""
+        def decorate(fn):
+            code = fn.__code__
+            names = code.co_varnames[:code.co_argcount]
+            defaults = dict(zip(names[len(names) - len(fn.__defaults__ or ()):], fn.__defaults__ or ()))
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                # inspect.signature would do this too, but importing it costs
+                # more start-up time than the rest of the data layer.
+                try:
+                    if not kwargs.keys() <= set(names[len(args):]):
+                        raise TypeError
+                    key = (fn.__name__, args + tuple(
+                        kwargs[n] if n in kwargs else defaults[n] for n in names[len(args):]))
+                    hash(key)
+                except (KeyError, TypeError):  # a bad call (fn raises), or an unhashable argument
+                    return fn(*args, **kwargs)
+                return self.get(db_file(), key, lambda: fn(*args, **kwargs))
+            return wrapper
+        return decorate
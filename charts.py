@@ -0,0 +1,76 @@
+"""The dashboard's efficiency and cost charts, independent of any GUI toolkit.
+
+build_dashboard() lays the two charts out on a matplotlib Figure;
+the Tk dashboard wraps that figure in FigureCanvasTkAgg, and
+render_dashboard() draws it off-screen with Agg (benchmarks, reports).
+Importing this module imports matplotlib, so callers that may never chart
+import it lazily.
+"""
+from collections import namedtuple
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.dates import DateFormatter
+from matplotlib.figure import Figure
+
+MARKER_LIMIT = 200  # markers only while the lines are this sparse
+FIGSIZE = (8, 6)
+DPI = 100
+
+DashboardLines = namedtuple("DashboardLines", "ax1 ax2 km_l rm_km")
+
+
+def build_dashboard(fig, series):
+    """Adds the efficiency and cost charts for a series.PlotSeries to fig."""
+    # One Figure holds two subplots sharing the date axis
+    fig.subplots_adjust(hspace=0.4) # Add space between plots
+    ax1 = fig.add_subplot(2, 1, 1) # (rows, columns, plot_number)
+    ax2 = fig.add_subplot(2, 1, 2, sharex=ax1)
+
+    # --- Plot 1: Efficiency (km/L) ---
+    km_l_line, = ax1.plot(series.days, series.km_l, marker='o', linestyle='-', color='b')
+    ax1.set_title("Fuel Efficiency Over Time")
+    ax1.set_ylabel("Efficiency (km/L)")
+    ax1.grid(True)
+
+    # --- Plot 2: Cost (RM/km) ---
+    rm_km_line, = ax2.plot(series.days, series.rm_km, marker='s', linestyle='--', color='r')
+    ax2.set_title("Cost Per Kilometre Over Time")
+    ax2.set_ylabel("Cost (RM/km)")
+    ax2.set_xlabel("Date")
+    ax2.grid(True)
+
+    # Format the x-axis for both plots to show dates nicely
+    date_format = DateFormatter("%Y-%m-%d")
+    ax1.xaxis.set_major_formatter(date_format)
+    ax2.xaxis.set_major_formatter(date_format)
+    fig.autofmt_xdate() # Auto-rotate dates to prevent overlap
+
+    lines = DashboardLines(ax1, ax2, km_l_line, rm_km_line)
+    set_series(lines, series, rescale=False)
+    return lines
+
+
+def set_series(lines, series, rescale):
+    """Swaps a new PlotSeries into the lines; rescale refits both axes to it."""
+    sparse = len(series.days) <= MARKER_LIMIT
+    lines.km_l.set_data(series.days, series.km_l)
+    lines.km_l.set_marker('o' if sparse else 'None')
+    lines.rm_km.set_data(series.days, series.rm_km)
+    lines.rm_km.set_marker('s' if sparse else 'None')
+    if rescale:
+        for ax in (lines.ax1, lines.ax2):
+            ax.relim()
+            ax.autoscale_view()
+
+
+def render_dashboard(series, path=None, figsize=FIGSIZE, dpi=DPI):
+    """Draws the dashboard off-screen; saves it to path (format from the
+    extension) if given. Returns the Figure."""
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    build_dashboard(fig, series)
+    if path is None:
+        fig.canvas.draw()
+    else:
+        fig.savefig(path)
+    return fig
@@ -0,0 +1,248 @@
+"""Command-line interface, run through `python fuel_tracker.py COMMAND`.
+
+Commands: add, import, summary, stats, export, vehicles, analyze, report,
+serve (see --help for each). Most take --vehicle NAME. Each command imports
+only what it needs, so none of them load Tk, and only report loads
+matplotlib (with its off-screen Agg backend).
+
+--profile prints per-operation timings and slow SQL (perf.py) to stderr
+when the command finishes; --cprofile FILE runs it under cProfile, saves
+the stats to FILE and prints the top functions.
+"""
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import sys
+
+import fuel_tracker
+import perf
+
+
+def _vehicle_id(args, default=None):
+    return fuel_tracker.get_vehicle_id(args.vehicle) if args.vehicle else default
+
+
+def cmd_add(args):
+    vehicle_id = _vehicle_id(args, fuel_tracker.DEFAULT_VEHICLE_ID)
+    metrics = fuel_tracker.add_entry_to_db(args.date, args.total_rm, args.price_per_litre, args.distance_km,
+                                           vehicle_id)
+    print(
+        f"Entry Added for {args.date}:\n"
+        f"  Litres: {metrics['litres']:.2f} L\n"
+        f"  Efficiency: {metrics['km_per_litre']:.2f} km/L\n"
+        f"  Consumption: {metrics['l_per_100km']:.2f} L/100km\n"
+        f"  Cost: RM {metrics['rm_per_km']:.3f} per km"
+    )
+
+
+def cmd_import(args):
+    import importer
+
+    vehicle_id = _vehicle_id(args, fuel_tracker.DEFAULT_VEHICLE_ID)
+    result = importer.import_file(args.file, fuel_tracker.DB_FILE, args.chunk_size, vehicle_id=vehicle_id)
+    return importer.print_report(result)
+
+
+def cmd_summary(args):
+    summary = fuel_tracker.get_summary(_vehicle_id(args))
+    if args.json:
+        print(json.dumps(summary))
+        return
+    print(
+        f"Total Entries: {summary['count']} | Total Distance: {summary['total_distance']:.2f} km | Total Spent: RM {summary['total_rm']:.2f}\n"
+        f"Avg. Efficiency: {summary['avg_km_l']:.2f} km/L | "
+        f"Avg. Consumption: {summary['avg_l_100km']:.2f} L/100km | "
+        f"Avg. Cost: RM {summary['avg_rm_km']:.3f}/km"
+    )
+
+
+def cmd_stats(args):
+    periods = fuel_tracker.get_period_summaries(args.by, _vehicle_id(args))
+    if args.json:
+        print(json.dumps([dict(summary, period=period) for period, summary in periods]))
+        return
+    print(f"{'Period':<8}{'Entries':>8}{'Dist(km)':>12}{'RM':>11}{'km/L':>8}{'L/100km':>9}{'RM/km':>8}")
+    for period, s in periods:
+        print(f"{period:<8}{s['count']:>8}{s['total_distance']:>12.1f}{s['total_rm']:>11.2f}"
+              f"{s['avg_km_l']:>8.2f}{s['avg_l_100km']:>9.2f}{s['avg_rm_km']:>8.3f}")
+
+
+def cmd_export(args):
+    import exporter
+
+    filters = dict(start=args.start, end=args.end, vehicle_id=_vehicle_id(args))
+    if args.output == "-":
+        if args.format not in (None, "csv"):
+            raise ValueError(f"{args.format} can't be written to stdout; use -o FILE")
+        sys.stdout.flush()
+        count = exporter.export_stream(sys.stdout.buffer, fuel_tracker.DB_FILE, compress=bool(args.gzip), **filters)
+    else:
+        count = exporter.export_file(args.output, args.format, fuel_tracker.DB_FILE, compress=args.gzip, **filters)
+    print(f"Exported {count} rows", file=sys.stderr)
+
+
+def cmd_vehicles(args):
+    if args.add:
+        vehicle_id = fuel_tracker.add_vehicle(args.add)
+        print(f"Added vehicle {vehicle_id}: {args.add.strip()}")
+        return
+    vehicles = fuel_tracker.get_vehicles()
+    if args.json:
+        print(json.dumps([dict(v) for v in vehicles]))
+        return
+    print(f"{'ID':>5}  {'Entries':>8}  Name")
+    for v in vehicles:
+        print(f"{v['id']:>5}  {v['count']:>8}  {v['name']}")
+
+
+def cmd_analyze(args):
+    import analytics
+
+    report = analytics.analyze(_vehicle_id(args), args.window, args.method, fuel_tracker.DB_FILE)
+    if not args.json:
+        analytics.print_report(report, args.limit)
+        return
+    trend = report.price_trend
+    print(json.dumps({
+        "fills": len(report.columns["id"]),
+        "anomalies": [a._asdict() for a in report.anomalies],
+        "price_trend": None if trend is None else {
+            "first": trend.first, "last": trend.last,
+            "change_pct": trend.change_pct, "slope_per_year": trend.slope_per_year,
+        },
+    }))
+
+
+def cmd_report(args):
+    import reports
+
+    def progress(done, total):
+        print(f"\r{done:,} / {total:,} reports", end="", file=sys.stderr, flush=True)
+
+    result = reports.generate_reports(args.output, fuel_tracker.DB_FILE, args.format or reports.FORMATS,
+                                      _vehicle_id(args), args.start, args.end, args.workers, args.force, progress)
+    if result.generated:
+        print(file=sys.stderr)
+    print(f"{result.generated} reports written, {result.unchanged} unchanged, {result.removed} removed "
+          f"in {result.seconds:.1f}s; see {os.path.join(args.output, 'index.html')}")
+
+
+def cmd_serve(args):
+    import server
+
+    server.main(["--db", fuel_tracker.DB_FILE, "--host", args.host, "--port", str(args.port)])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="fuel_tracker", description="Fuel & Expense Tracker (headless).")
+    parser.add_argument("--db", default=fuel_tracker.DB_FILE, help="database file (default: %(default)s)")
+    parser.add_argument("--profile", action="store_true", help="print operation timings and slow SQL to stderr")
+    parser.add_argument("--slow-sql-ms", type=float, default=perf.SLOW_SQL_MS,
+                        help="with --profile, report statements slower than this (default: %(default)s)")
+    parser.add_argument("--cprofile", metavar="FILE", help="run under cProfile and save the stats to FILE")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("add", help="log one fill")
+    p.add_argument("total_rm", type=float, help="amount paid (RM)")
+    p.add_argument("price_per_litre", type=float, help="price per litre (RM)")
+    p.add_argument("distance_km", type=float, help="distance since the last fill (km)")
+    p.add_argument("--date", default=datetime.date.today().isoformat(), help="YYYY-MM-DD (default: today)")
+    p.add_argument("--vehicle", help="vehicle name (default: the first vehicle)")
+    p.set_defaults(func=cmd_add)
+
+    p = sub.add_parser("import", help="bulk import a CSV or JSON Lines file")
+    p.add_argument("file")
+    p.add_argument("--chunk-size", type=int, default=10000)
+    p.add_argument("--vehicle", help="vehicle for records without a 'vehicle' field")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("summary", help="overall totals and averages")
+    p.add_argument("--vehicle", help="one vehicle (default: the whole fleet)")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_summary)
+
+    p = sub.add_parser("stats", help="per-month or per-year averages")
+    p.add_argument("--by", choices=("month", "year"), default="month")
+    p.add_argument("--vehicle", help="one vehicle (default: the whole fleet)")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("vehicles", help="list vehicles, or add one")
+    p.add_argument("--add", metavar="NAME", help="create a vehicle")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_vehicles)
+
+    p = sub.add_parser("analyze", help="rolling efficiency, anomalous fills and price trend")
+    p.add_argument("--vehicle", help="one vehicle (default: the whole fleet)")
+    p.add_argument("--window", type=int, default=5, help="fills per rolling window (default: %(default)s)")
+    p.add_argument("--method", choices=("zscore", "iqr"), default="zscore", help="anomaly test")
+    p.add_argument("--limit", type=int, default=20, help="anomalies to list (default: %(default)s)")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("export", help="export entries as CSV, Parquet or Arrow")
+    p.add_argument("-o", "--output", default="-",
+                   help="output file; .csv, .csv.gz, .parquet or .arrow (default: CSV to stdout)")
+    p.add_argument("--format", choices=("csv", "parquet", "arrow"), help="override the format implied by -o")
+    p.add_argument("--from", dest="start", metavar="DATE", help="first date to include (YYYY-MM-DD)")
+    p.add_argument("--to", dest="end", metavar="DATE", help="last date to include (YYYY-MM-DD)")
+    p.add_argument("--vehicle", help="one vehicle (default: the whole fleet)")
+    p.add_argument("--gzip", action="store_true", default=None, help="compress (implied by a .gz name)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("report", help="monthly PNG/PDF/HTML reports per vehicle, redrawn only where data changed")
+    p.add_argument("-o", "--output", default="reports", help="output directory (default: %(default)s)")
+    p.add_argument("--from", dest="start", metavar="YYYY-MM", help="first month to report")
+    p.add_argument("--to", dest="end", metavar="YYYY-MM", help="last month to report")
+    p.add_argument("--vehicle", help="one vehicle (default: all of them)")
+    p.add_argument("--format", nargs="+", choices=("png", "pdf", "html"),
+                   help="files per report (default: all three; html includes png)")
+    p.add_argument("--workers", type=int, help="rendering processes (default: one per CPU)")
+    p.add_argument("--force", action="store_true", help="redraw reports whose data hasn't changed too")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("serve", help="accept fills over HTTP/JSON (see server.py)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8095)
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def _print_profile(args, profiler):
+    if profiler is not None:
+        profiler.disable()
+        import pstats
+
+        profiler.dump_stats(args.cprofile)
+        print(f"\ncProfile stats saved to {args.cprofile}; top functions by cumulative time:", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+    if args.profile:
+        print("\n" + perf.recorder.report(), file=sys.stderr)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fuel_tracker.DB_FILE = args.db
+    profiler = None
+    if args.profile:
+        perf.recorder.enabled = True
+        perf.recorder.slow_sql_ms = args.slow_sql_ms
+    if args.cprofile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        fuel_tracker.setup_database()
+        return args.func(args) or 0
+    except (ValueError, OSError, ImportError, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        _print_profile(args, profiler)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Compact column store for fuel_log: one NumPy array per field.
+
+A fuel_log row as a sqlite3.Row costs a few hundred bytes (the Row, its
+tuple, a str date and a float object per metric); copied into Python
+lists for a chart it is still ~100. Here dates are int32 days since
+1970-01-01 (date_day), ids int64, vehicle ids int32 and metrics float64,
+so a plot series is 20 bytes per fill and the full row 72.
+benchmarks/bench_memory.py measures both against the row objects.
+
+Rows are converted fetch_size at a time through a reused scratch buffer,
+so no full list of Python rows ever exists. Entries without a parseable
+date (date_day NULL) are left out.
+"""
+import numpy as np
+
+import rollups
+import storage
+
+FIELD_TYPES = {
+    "id": np.int64,
+    "vehicle_id": np.int32,
+    "date_day": np.int32,
+    "total_rm": np.float64,
+    "price_per_litre": np.float64,
+    "distance_km": np.float64,
+    "litres": np.float64,
+    "km_per_litre": np.float64,
+    "l_per_100km": np.float64,
+    "rm_per_km": np.float64,
+}
+ALL_FIELDS = tuple(FIELD_TYPES)
+PLOT_FIELDS = ("date_day", "km_per_litre", "rm_per_km")
+FETCH_SIZE = 50000
+
+
+def load_columns(fields=ALL_FIELDS, vehicle_id=None, db_file=storage.DB_FILE, order=None,
+                 fetch_size=FETCH_SIZE, days=None):
+    """Returns {field: array} for fuel_log rows with a date.
+
+    vehicle_id limits it to one vehicle and days, a (first, last) pair of
+    epoch days, to a date range; order is an optional ORDER BY
+    clause over the table's columns (without it rows come in table order,
+    which is the fastest way to read the whole log).
+    """
+    unknown = [f for f in fields if f not in FIELD_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown fuel_log field: {unknown[0]}")
+    conn = storage.get_connection(db_file)
+    # The rollup count sizes the arrays up front; they grow if it's behind
+    # (or, for a date range, from nothing).
+    capacity = None if days is not None else conn.execute(
+        "SELECT count FROM fuel_rollup WHERE vehicle_id = ? AND granularity = 'all'",
+        (rollups.FLEET if vehicle_id is None else vehicle_id,)).fetchone()
+    capacity = max(capacity[0] if capacity else 0, 0)
+    columns = {f: np.empty(capacity, dtype=FIELD_TYPES[f]) for f in fields}
+
+    cursor = conn.cursor()
+    cursor.row_factory = None  # plain tuples convert to arrays much faster than Rows
+    where, params = "date_day IS NOT NULL", ()
+    if days is not None:
+        where, params = "date_day BETWEEN ? AND ?", tuple(days)
+    if vehicle_id is not None:
+        where, params = "vehicle_id = ? AND " + where, (vehicle_id,) + params
+    cursor.execute(f"SELECT {', '.join(fields)} FROM fuel_log WHERE {where}"
+                   + (f" ORDER BY {order}" if order else ""), params)
+
+    scratch = np.empty((fetch_size, len(fields)), dtype=np.float64)
+    n = 0
+    while True:
+        batch = cursor.fetchmany(fetch_size)
+        if not batch:
+            break
+        k = len(batch)
+        scratch[:k] = batch
+        if n + k > capacity:
+            capacity = max(2 * capacity, n + k)
+            columns = {f: np.resize(a, capacity) for f, a in columns.items()}
+        for i, f in enumerate(fields):
+            columns[f][n:n + k] = scratch[:k, i]
+        n += k
+    return {f: a[:n].copy() if n < len(a) else a for f, a in columns.items()}
+
+
+def load_plot_columns(vehicle_id=None, db_file=storage.DB_FILE):
+    """(days, km_per_litre, rm_per_km) arrays ordered by date (then id).
+
+    One vehicle is read in order from idx_fuel_log_vehicle_date_day. The
+    whole fleet is read in table order and sorted here: the metrics are
+    generated columns, so no index covers them and an index-ordered walk
+    would visit the table row by row in date order.
+    """
+    if vehicle_id is not None:
+        columns = load_columns(PLOT_FIELDS, vehicle_id, db_file, order="date_day, id")
+    else:
+        columns = load_columns(PLOT_FIELDS, None, db_file)
+        columns = take(columns, np.argsort(columns["date_day"], kind="stable"))
+    return tuple(columns[f] for f in PLOT_FIELDS)
+
+
+def take(columns, indices):
+    """The rows at indices (an index array or boolean mask), as new columns."""
+    return {f: a[indices] for f, a in columns.items()}
+
+
+def nbytes(columns):
+    """Bytes held by the column arrays."""
+    return sum(a.nbytes for a in columns.values())
@@ -0,0 +1,201 @@
+"""Streaming export of fuel_log to CSV, Parquet or Arrow.
+
+Usage: python exporter.py OUT [--db fuel.db] [--from DATE] [--to DATE] [--vehicle NAME] [--gzip]
+
+Rows are read with fetchmany in FETCH_SIZE batches and written as they
+arrive, so memory use doesn't depend on the size of the table. The format
+follows OUT's extension: .csv (.csv.gz), .parquet or .arrow. Parquet and
+Arrow need pyarrow; CSV needs nothing beyond the standard library.
+"""
+import argparse
+import csv
+import datetime
+import gzip
+import io
+import os
+import sys
+
+import storage
+
+EXPORT_COLUMNS = (
+    "id", "date", "vehicle", "total_rm", "price_per_litre", "distance_km",
+    "litres", "km_per_litre", "l_per_100km", "rm_per_km",
+)
+FETCH_SIZE = 5000
+# Parquet/Arrow write one row group (record batch) per fetch; larger
+# groups compress and scan better, at a still-bounded cost in memory.
+COLUMNAR_FETCH_SIZE = 65536
+
+FORMATS = ("csv", "parquet", "arrow")
+EXTENSIONS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+_SELECT = """
+SELECT f.id, f.date, v.name, f.total_rm, f.price_per_litre, f.distance_km,
+       f.litres, f.km_per_litre, f.l_per_100km, f.rm_per_km
+FROM fuel_log f JOIN vehicles v ON v.id = f.vehicle_id
+"""
+
+
+def _parse_date(text):
+    date = storage.normalize_date(text)
+    try:
+        datetime.date.fromisoformat(date)
+    except ValueError:
+        raise ValueError(f"Invalid date '{text}', expected YYYY-MM-DD.")
+    return date
+
+
+def iter_batches(db_file=storage.DB_FILE, fetch_size=FETCH_SIZE, start=None, end=None, vehicle_id=None):
+    """Yields lists of fuel_log rows (EXPORT_COLUMNS), oldest first.
+
+    start / end (YYYY-MM-DD, inclusive) and vehicle_id narrow the export;
+    each is a range on idx_fuel_log_date_day or idx_fuel_log_vehicle_date_day.
+    Entries with an unparseable date are only included without a date range.
+    """
+    conditions, params = [], []
+    if vehicle_id is not None:
+        conditions.append("f.vehicle_id = ?")
+        params.append(vehicle_id)
+    if start is not None:
+        conditions.append(f"f.date_day >= {storage.DATE_DAY_SQL.format('?')}")
+        params.append(_parse_date(start))
+    if end is not None:
+        conditions.append(f"f.date_day <= {storage.DATE_DAY_SQL.format('?')}")
+        params.append(_parse_date(end))
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+
+    # Run the query now, so bad filters raise before anything is written.
+    conn = storage.get_connection(db_file)
+    cursor = conn.execute(f"{_SELECT} {where} ORDER BY f.date_day, f.id", params)
+    return _fetch_batches(cursor, fetch_size)
+
+
+def _fetch_batches(cursor, fetch_size):
+    while True:
+        batch = cursor.fetchmany(fetch_size)
+        if not batch:
+            return
+        yield batch
+
+
+def export_csv(out, db_file=storage.DB_FILE, start=None, end=None, vehicle_id=None):
+    """Writes fuel_log as CSV to the text file object out. Returns the row count."""
+    batches = iter_batches(db_file, FETCH_SIZE, start, end, vehicle_id)
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for batch in batches:
+        writer.writerows(batch)
+        count += len(batch)
+    return count
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ImportError("Parquet and Arrow export need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def export_columnar(path, fmt, db_file=storage.DB_FILE, start=None, end=None, vehicle_id=None, compress=False):
+    """Writes fuel_log to a Parquet or Arrow IPC file, one row group per batch.
+
+    compress uses gzip inside Parquet files (Arrow files use zstd). Returns
+    the row count.
+    """
+    pa = _pyarrow()
+    batches = iter_batches(db_file, COLUMNAR_FETCH_SIZE, start, end, vehicle_id)
+    schema = pa.schema([("id", pa.int64()), ("date", pa.string()), ("vehicle", pa.string())]
+                       + [(name, pa.float64()) for name in EXPORT_COLUMNS[3:]])
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(path, schema, compression="gzip" if compress else "snappy")
+    else:
+        options = pa.ipc.IpcWriteOptions(compression="zstd" if compress else None)
+        writer = pa.ipc.new_file(path, schema, options=options)
+    count = 0
+    with writer:
+        for batch in batches:
+            columns = zip(*batch)
+            writer.write_batch(pa.record_batch(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema))
+            count += len(batch)
+    return count
+
+
+def format_for(path):
+    """Guesses the format from path's extension, ignoring a trailing .gz."""
+    root, ext = os.path.splitext(path.lower())
+    if ext == ".gz":
+        ext = os.path.splitext(root)[1]
+    return EXTENSIONS.get(ext, "csv")
+
+
+def export_file(path, fmt=None, db_file=storage.DB_FILE, start=None, end=None, vehicle_id=None, compress=None):
+    """Exports fuel_log to path and returns the row count.
+
+    fmt defaults to format_for(path); compress defaults to whether path ends
+    in .gz. The file is written under a temporary name and renamed when
+    complete, so a failed export never leaves a truncated file behind.
+    """
+    fmt = fmt or format_for(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if compress is None:
+        compress = path.lower().endswith(".gz")
+    partial = path + ".part"
+    try:
+        if fmt == "csv":
+            opener = gzip.open if compress else open
+            with opener(partial, "wt", newline="", encoding="utf-8") as f:
+                count = export_csv(f, db_file, start, end, vehicle_id)
+        else:
+            count = export_columnar(partial, fmt, db_file, start, end, vehicle_id, compress)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return count
+
+
+def export_stream(out, db_file=storage.DB_FILE, start=None, end=None, vehicle_id=None, compress=False):
+    """Writes CSV to the binary stream out (e.g. stdout), gzipped if compress."""
+    raw = gzip.GzipFile(fileobj=out, mode="wb") if compress else out
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    try:
+        return export_csv(text, db_file, start, end, vehicle_id)
+    finally:
+        text.flush()
+        text.detach()
+        if compress:
+            raw.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export fuel entries to CSV, Parquet or Arrow.")
+    parser.add_argument("output", help="output file; .csv, .csv.gz, .parquet or .arrow")
+    parser.add_argument("--db", default=storage.DB_FILE)
+    parser.add_argument("--format", choices=FORMATS, help="override the format implied by the extension")
+    parser.add_argument("--from", dest="start", metavar="DATE", help="first date to include (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", metavar="DATE", help="last date to include (YYYY-MM-DD)")
+    parser.add_argument("--vehicle", metavar="NAME", help="one vehicle (default: every vehicle)")
+    parser.add_argument("--gzip", action="store_true", default=None, help="compress the output")
+    args = parser.parse_args(argv)
+
+    conn = storage.get_connection(args.db)
+    storage.create_schema(conn)
+    vehicle_id = None
+    if args.vehicle:
+        row = conn.execute("SELECT id FROM vehicles WHERE name = ?", (args.vehicle,)).fetchone()
+        if row is None:
+            parser.error(f"no vehicle named '{args.vehicle}'")
+        vehicle_id = row[0]
+    count = export_file(args.output, args.format, args.db, args.start, args.end, vehicle_id, args.gzip)
+    print(f"Exported {count} rows to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
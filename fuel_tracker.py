@@ -1,82 +1,124 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import sqlite3
+"""Fuel & Expense Tracker: headless data API and entry point.
+
+Importing this module pulls in nothing heavier than sqlite3, so scripts,
+cron jobs and servers can use it without a display. Errors are raised as
+exceptions. Run without arguments for the Tkinter GUI (gui.py), or with a
+command for the CLI (cli.py):
+
+    python fuel_tracker.py                 # GUI
+    python fuel_tracker.py summary         # CLI, see --help
+"""
 import datetime
+import math
+import sqlite3
 import sys
 
-# --- New Imports for Charting ---
-try:
-    from matplotlib.figure import Figure
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    from matplotlib.dates import DateFormatter
-except ImportError:
-    print("Matplotlib not found. Please install it: pip install matplotlib")
-    messagebox.showerror("Missing Library", "Matplotlib is required for charts. Please install it:\n\npip install matplotlib")
-    sys.exit()
-# ----------------------------------
+import cache
+import perf
+import rollups
+import storage
 
-DB_FILE = "fuel.db"
-ADMIN_PASSWORD = "Viishnu15!"
+DB_FILE = storage.DB_FILE
+DEFAULT_VEHICLE_ID = storage.DEFAULT_VEHICLE_ID
+FLEET = rollups.FLEET
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
 
-# --- Database Functions (Unchanged) ---
+# Reads marked @_cached return shared results from query_cache until the
+# data version changes; treat them as read-only.
+query_cache = cache.QueryCache()
+_cached = query_cache.cached(lambda: DB_FILE)
+
+def _timed(fn):
+    """Records fn's calls as db.<name> while perf.recorder is enabled."""
+    return perf.timed("db." + fn.__name__)(fn)
+
+# --- Database Functions ---
+# All functions share the pooled connection from storage.get_connection().
 
 def setup_database():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS fuel_log (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        date TEXT NOT NULL,
-        total_rm REAL NOT NULL,
-        price_per_litre REAL NOT NULL,
-        distance_km REAL NOT NULL,
-        litres REAL NOT NULL,
-        km_per_litre REAL NOT NULL,
-        l_per_100km REAL NOT NULL,
-        rm_per_km REAL NOT NULL
-    )
-    """)
-    conn.commit()
-    conn.close()
-
-def add_entry_to_db(date, total_rm, price_per_litre, distance_km):
+    storage.create_schema(storage.get_connection(DB_FILE))
+
+def _positive(number):
+    # NaN fails every comparison and inf passes them, so check for both first.
+    return math.isfinite(number) and number > 0
+
+def _litres_finite(total_rm, price_per_litre):
+    # Finite inputs can still overflow, e.g. 1e308 / 1e-300, and the
+    # fuel_log_finite_* triggers would then abort the write.
+    return math.isfinite(total_rm / price_per_litre)
+
+def validate_entry(date, total_rm, price_per_litre, distance_km):
+    """Raises ValueError unless the entry has a date and positive, finite numbers
+    whose litres are finite too."""
+    if not date or not all(_positive(n) for n in (total_rm, price_per_litre, distance_km)):
+        raise ValueError("All fields must be filled with positive numbers.")
+    if not _litres_finite(total_rm, price_per_litre):
+        raise ValueError("Total RM / price per litre is too large.")
+
+# --- Vehicles ---
+
+@_timed
+def add_vehicle(name):
+    """Creates a vehicle and returns its id. Raises ValueError if the name is empty or taken."""
+    name = name.strip()
+    if not name:
+        raise ValueError("Vehicle name must not be empty.")
+    conn = storage.get_connection(DB_FILE)
     try:
-        litres = total_rm / price_per_litre
-        km_per_litre = distance_km / litres
-        l_per_100km = (litres / distance_km) * 100
-        rm_per_km = total_rm / distance_km
-
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute("""
-        INSERT INTO fuel_log (date, total_rm, price_per_litre, distance_km, litres, km_per_litre, l_per_100km, rm_per_km)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (date, total_rm, price_per_litre, distance_km, litres, km_per_litre, l_per_100km, rm_per_km))
-        conn.commit()
-        conn.close()
-        
-        return {
-            "litres": litres, "km_per_litre": km_per_litre,
-            "l_per_100km": l_per_100km, "rm_per_km": rm_per_km
-        }
-    except Exception as e:
-        messagebox.showerror("Database Error", f"Failed to add entry: {e}")
-        return None
-
-def get_summary_data():
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM fuel_log ORDER BY date DESC")
-    all_entries = cursor.fetchall()
-    
-    cursor.execute("SELECT COUNT(id), SUM(total_rm), SUM(litres), SUM(distance_km) FROM fuel_log")
-    totals = cursor.fetchone()
-    conn.close()
-    
-    count, total_rm, total_litres, total_distance = totals
-    
+        with conn:
+            vehicle_id = conn.execute("INSERT INTO vehicles (name) VALUES (?)", (name,)).lastrowid
+    except sqlite3.IntegrityError:
+        raise ValueError(f"Vehicle '{name}' already exists.")
+    storage.bump_data_version(DB_FILE)
+    return vehicle_id
+
+@_timed
+def get_vehicles():
+    """Returns (id, name, count) rows for every vehicle, by name."""
+    conn = storage.get_connection(DB_FILE)
+    return conn.execute("""
+    SELECT v.id, v.name, COALESCE(r.count, 0) AS count
+    FROM vehicles v LEFT JOIN fuel_rollup r
+        ON r.vehicle_id = v.id AND r.granularity = 'all' AND r.period = ''
+    ORDER BY v.name
+    """).fetchall()
+
+@_timed
+def get_vehicle_id(name):
+    """Returns the id of the vehicle called name. Raises ValueError if there is none."""
+    conn = storage.get_connection(DB_FILE)
+    row = conn.execute("SELECT id FROM vehicles WHERE name = ?", (name.strip(),)).fetchone()
+    if row is None:
+        raise ValueError(f"No vehicle named '{name}'.")
+    return row[0]
+
+# --- Entries ---
+# Functions taking vehicle_id=None cover the whole fleet; given a vehicle,
+# they read only that vehicle's range of the (vehicle_id, ...) indexes.
+
+@_timed
+def add_entry_to_db(date, total_rm, price_per_litre, distance_km, vehicle_id=DEFAULT_VEHICLE_ID):
+    """Inserts one entry for a vehicle and returns its derived metrics.
+
+    Raises ValueError for invalid input and sqlite3.Error if the write fails.
+    """
+    validate_entry(date, total_rm, price_per_litre, distance_km)
+    date = storage.normalize_date(date)
+
+    conn = storage.get_connection(DB_FILE)
+    with conn:
+        # The metrics are generated columns (storage.DERIVED_COLUMNS). RETURNING
+        # gives them without REAL affinity, so 50 / 2 would come back as 25.
+        metrics = conn.execute(f"""
+        INSERT INTO fuel_log (date, total_rm, price_per_litre, distance_km, vehicle_id, date_day)
+        VALUES (?, ?, ?, ?, ?, {storage.DATE_DAY_SQL.format("?")})
+        RETURNING CAST(litres AS REAL) AS litres, CAST(km_per_litre AS REAL) AS km_per_litre,
+                  CAST(l_per_100km AS REAL) AS l_per_100km, CAST(rm_per_km AS REAL) AS rm_per_km
+        """, (date, total_rm, price_per_litre, distance_km, vehicle_id, date)).fetchone()
+    storage.bump_data_version(DB_FILE)
+    return dict(metrics)
+
+def _summarize(count, total_rm, total_litres, total_distance):
     if total_distance and total_litres:
         avg_km_l = total_distance / total_litres
         avg_l_100km = (total_litres / total_distance) * 100
@@ -84,394 +126,280 @@ def get_summary_data():
     else:
         avg_km_l, avg_l_100km, avg_rm_km = 0, 0, 0
         
-    summary = {
+    return {
         "count": count or 0, "total_rm": total_rm or 0,
         "total_litres": total_litres or 0, "total_distance": total_distance or 0,
         "avg_km_l": avg_km_l, "avg_l_100km": avg_l_100km, "avg_rm_km": avg_rm_km
     }
-    return all_entries, summary
 
+@_timed
+def get_summary(vehicle_id=None):
+    """Overall totals and averages, read from the trigger-maintained rollup."""
+    conn = storage.get_connection(DB_FILE)
+    totals = conn.execute("""
+    SELECT count, total_rm, total_litres, total_distance FROM fuel_rollup
+    WHERE vehicle_id = ? AND granularity = 'all' AND period = ''
+    """, (FLEET if vehicle_id is None else vehicle_id,)).fetchone() or (0, 0, 0, 0)
+    return _summarize(*totals)
+
+@_timed
+@_cached
+def get_summary_data(vehicle_id=None):
+    """Every entry (newest first) plus the overall summary.
+
+    Loads the whole table, or one vehicle's range of it; the history windows
+    page through it with get_entries_page instead.
+    """
+    conn = storage.get_connection(DB_FILE)
+    if vehicle_id is None:
+        all_entries = conn.execute("SELECT * FROM fuel_log ORDER BY date_day DESC, id DESC").fetchall()
+    else:
+        all_entries = conn.execute("""
+        SELECT * FROM fuel_log WHERE vehicle_id = ? ORDER BY date_day DESC, id DESC
+        """, (vehicle_id,)).fetchall()
+    return all_entries, get_summary(vehicle_id)
+
+SORTABLE_COLUMNS = (
+    "id", "date_day", "total_rm", "price_per_litre", "distance_km",
+    "litres", "km_per_litre", "l_per_100km", "rm_per_km",
+)
+NULLABLE_SORT_COLUMNS = ("date_day",)
+PAGE_SIZE = 200
+
+@_timed
+@_cached
+def get_entries_page(order_by="date_day", descending=True, after=None, limit=PAGE_SIZE, vehicle_id=None):
+    """Returns up to `limit` rows ordered by (order_by, id), starting after the
+    (value, id) key `after` (None for the first page).
+
+    Keyset pagination: each page is a range scan from the last key, so the
+    cost doesn't grow with how far the user has scrolled. date_day and id
+    are indexed (per vehicle too); the other columns fall back to a bounded
+    top-N sort.
+    """
+    if order_by not in SORTABLE_COLUMNS:
+        raise ValueError(f"Cannot sort by {order_by}")
+    conn = storage.get_connection(DB_FILE)
+    op, direction = ("<", "DESC") if descending else (">", "ASC")
+
+    def select(conditions, params, order, n):
+        if vehicle_id is not None:
+            conditions, params = ["vehicle_id = ?"] + conditions, (vehicle_id,) + params
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return conn.execute(f"""
+        SELECT * FROM fuel_log {where} ORDER BY {order} LIMIT ?
+        """, params + (n,)).fetchall()
+
+    def values_page(after_key, n):
+        if after_key is not None:
+            conditions, params = [f"({order_by}, id) {op} (?, ?)"], tuple(after_key)
+        elif order_by in NULLABLE_SORT_COLUMNS:
+            conditions, params = [f"{order_by} IS NOT NULL"], ()
+        else:
+            conditions, params = [], ()
+        return select(conditions, params, f"{order_by} {direction}, id {direction}", n)
+
+    def nulls_page(after_id, n):
+        conditions, params = [f"{order_by} IS NULL"], ()
+        if after_id is not None:
+            conditions, params = conditions + [f"id {op} ?"], (after_id,)
+        return select(conditions, params, f"id {direction}", n)
+
+    if order_by not in NULLABLE_SORT_COLUMNS:
+        return values_page(after, limit)
+
+    # A (NULL, id) key can't be compared with row values, so NULLs are paged
+    # separately. SQLite sorts NULL lowest: last when descending, first when ascending.
+    if descending:
+        if after is not None and after[0] is None:
+            return nulls_page(after[1], limit)
+        rows = values_page(after, limit)
+        if len(rows) < limit:
+            rows += nulls_page(None, limit - len(rows))
+        return rows
+    if after is None or after[0] is None:
+        rows = nulls_page(None if after is None else after[1], limit)
+        if len(rows) < limit:
+            rows += values_page(None, limit - len(rows))
+        return rows
+    return values_page(after, limit)
+
+@_timed
+@_cached
+def get_period_summaries(granularity="month", vehicle_id=None):
+    """Returns [(period, summary)] per 'month' (YYYY-MM) or 'year' (YYYY), oldest first."""
+    if granularity not in ("month", "year"):
+        raise ValueError(f"Unknown granularity: {granularity}")
+    conn = storage.get_connection(DB_FILE)
+    rows = conn.execute("""
+    SELECT period, count, total_rm, total_litres, total_distance FROM fuel_rollup
+    WHERE vehicle_id = ? AND granularity = ? ORDER BY period ASC
+    """, (FLEET if vehicle_id is None else vehicle_id, granularity)).fetchall()
+    return [(row[0], _summarize(*row[1:])) for row in rows]
+
+@_timed
 def update_entry_in_db(entry_id, date, total_rm, price_per_litre, distance_km):
-    try:
-        litres = total_rm / price_per_litre
-        km_per_litre = distance_km / litres
-        l_per_100km = (litres / distance_km) * 100
-        rm_per_km = total_rm / distance_km
-        
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute("""
-        UPDATE fuel_log 
-        SET date = ?, total_rm = ?, price_per_litre = ?, distance_km = ?, 
-            litres = ?, km_per_litre = ?, l_per_100km = ?, rm_per_km = ?
+    """Rewrites one entry; its derived metrics follow from the new values.
+
+    Raises ValueError for invalid input and sqlite3.Error if the write fails.
+    """
+    validate_entry(date, total_rm, price_per_litre, distance_km)
+    date = storage.normalize_date(date)
+
+    conn = storage.get_connection(DB_FILE)
+    with conn:
+        conn.execute(f"""
+        UPDATE fuel_log
+        SET date = ?, total_rm = ?, price_per_litre = ?, distance_km = ?,
+            date_day = {storage.DATE_DAY_SQL.format("?")}
         WHERE id = ?
-        """, (date, total_rm, price_per_litre, distance_km, 
-              litres, km_per_litre, l_per_100km, rm_per_km, 
-              entry_id))
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        messagebox.showerror("Update Error", f"Failed to update entry: {e}")
-        return False
+        """, (date, total_rm, price_per_litre, distance_km, date, entry_id))
+    storage.bump_data_version(DB_FILE)
+    return True
 
+@_timed
 def delete_entry_from_db(entry_id):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM fuel_log WHERE id = ?", (entry_id,))
-    conn.commit()
-    conn.close()
+    conn = storage.get_connection(DB_FILE)
+    with conn:
+        conn.execute("DELETE FROM fuel_log WHERE id = ?", (entry_id,))
+    storage.bump_data_version(DB_FILE)
     return True
 
+# --- Bulk Edits ---
+# Each runs as a single transaction, so the rollup triggers and the data
+# version see one change however many rows it touches.
+
+ID_CHUNK = 500  # ids per IN (...) lookup
+
+@_timed
+def get_entries(entry_ids):
+    """Returns the fuel_log rows with these ids (missing ids are skipped)."""
+    conn = storage.get_connection(DB_FILE)
+    entry_ids = list(entry_ids)
+    rows = []
+    for i in range(0, len(entry_ids), ID_CHUNK):
+        chunk = entry_ids[i:i + ID_CHUNK]
+        rows += conn.execute(
+            f"SELECT * FROM fuel_log WHERE id IN ({', '.join('?' * len(chunk))})", chunk).fetchall()
+    return rows
+
+@_timed
+def delete_entries(entry_ids):
+    """Deletes every entry in entry_ids in one transaction. Returns the number deleted."""
+    conn = storage.get_connection(DB_FILE)
+    with conn:
+        deleted = conn.executemany("DELETE FROM fuel_log WHERE id = ?", [(i,) for i in entry_ids]).rowcount
+    storage.bump_data_version(DB_FILE)
+    return deleted
+
+# Unchanged fields keep their stored value (the named parameter is NULL).
+_BULK_UPDATE_SQL = """
+UPDATE fuel_log SET
+    date = COALESCE(:date, date),
+    date_day = CASE WHEN :date IS NULL THEN date_day ELSE {date_day} END,
+    vehicle_id = COALESCE(:vehicle_id, vehicle_id),
+    total_rm = COALESCE(:total_rm, total_rm),
+    price_per_litre = COALESCE(:price_per_litre, price_per_litre),
+    distance_km = COALESCE(:distance_km, distance_km)
+WHERE id = :id
+""".format(date_day=storage.DATE_DAY_SQL.format(":date"))
+
+@_timed
+def update_entries(entry_ids, date=None, total_rm=None, price_per_litre=None, distance_km=None, vehicle_id=None):
+    """Sets the given fields on every entry in entry_ids in one transaction;
+    litres, km/L, L/100km and RM/km follow from each row's new values.
+
+    Fields left as None keep each entry's own value. Returns the updated rows.
+    Raises ValueError if nothing is set or a number isn't positive.
+    """
+    values = {"total_rm": total_rm, "price_per_litre": price_per_litre, "distance_km": distance_km}
+    if date is None and vehicle_id is None and all(v is None for v in values.values()):
+        raise ValueError("Nothing to change.")
+    if any(v is not None and not _positive(v) for v in values.values()):
+        raise ValueError("All fields must be positive numbers.")
+    if total_rm is not None and price_per_litre is not None and not _litres_finite(total_rm, price_per_litre):
+        raise ValueError("Total RM / price per litre is too large.")
+    if date is not None:
+        date = storage.normalize_date(date)
+        if not date:
+            raise ValueError("The date must not be empty.")
+    params = dict(values, date=date, vehicle_id=vehicle_id)
+
+    entry_ids = list(entry_ids)
+    conn = storage.get_connection(DB_FILE)
+    with conn:
+        conn.executemany(_BULK_UPDATE_SQL, (dict(params, id=i) for i in entry_ids))
+    storage.bump_data_version(DB_FILE)
+    return get_entries(entry_ids)
+
+def _entry_filter(start=None, end=None, vehicle_id=None, min_id=None, max_id=None):
+    """WHERE clause and parameters for the filters that are set."""
+    conditions, params = [], []
+    for value, condition in (
+        (vehicle_id, "vehicle_id = ?"),
+        (start, f"date_day >= {storage.DATE_DAY_SQL.format('?')}"),
+        (end, f"date_day <= {storage.DATE_DAY_SQL.format('?')}"),
+        (min_id, "id >= ?"),
+        (max_id, "id <= ?"),
+    ):
+        if value is not None:
+            if condition.startswith("date_day"):
+                value = storage.normalize_date(value)
+                datetime.date.fromisoformat(value)  # raises ValueError for a bad date
+            conditions.append(condition)
+            params.append(value)
+    if not conditions:
+        raise ValueError("Give at least one filter.")
+    return " AND ".join(conditions), params
+
+@_timed
+def count_entries_where(**filters):
+    """Counts the entries delete_entries_where(**filters) would delete."""
+    where, params = _entry_filter(**filters)
+    conn = storage.get_connection(DB_FILE)
+    return conn.execute(f"SELECT COUNT(*) FROM fuel_log WHERE {where}", params).fetchone()[0]
+
+@_timed
+def delete_entries_where(**filters):
+    """Deletes the entries matching every filter (start / end dates, vehicle_id,
+    min_id / max_id, all inclusive) in one statement. Returns their ids."""
+    where, params = _entry_filter(**filters)
+    conn = storage.get_connection(DB_FILE)
+    with conn:
+        deleted = [row[0] for row in conn.execute(f"DELETE FROM fuel_log WHERE {where} RETURNING id", params)]
+    storage.bump_data_version(DB_FILE)
+    return deleted
+
 # --- NEW: Function to get data specifically for plotting ---
-def get_plot_data():
+@_timed
+@_cached
+def get_plot_data(vehicle_id=None):
     """Fetches data sorted correctly for time-series plotting."""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    # Order by date ASCENDING for line plots
-    cursor.execute("SELECT date, km_per_litre, rm_per_km FROM fuel_log ORDER BY date ASC")
-    data = cursor.fetchall()
-    conn.close()
-    return data
-
-# --- Main Application Class (Modified) ---
-
-class FuelTrackerApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("🚗 Fuel & Expense Tracker")
-        
-        main_frame = ttk.Frame(root, padding="10")
-        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        
-        # --- Input Fields ---
-        ttk.Label(main_frame, text="Date:").grid(row=0, column=0, sticky=tk.W, pady=2)
-        self.date_entry = ttk.Entry(main_frame, width=30)
-        self.date_entry.grid(row=0, column=1, sticky=tk.W, pady=2)
-        self.date_entry.insert(0, datetime.date.today().isoformat())
-
-        ttk.Label(main_frame, text="Amount (RM):").grid(row=1, column=0, sticky=tk.W, pady=2)
-        self.rm_entry = ttk.Entry(main_frame, width=30)
-        self.rm_entry.grid(row=1, column=1, sticky=tk.W, pady=2)
-
-        ttk.Label(main_frame, text="Price/Litre (RM):").grid(row=2, column=0, sticky=tk.W, pady=2)
-        self.price_entry = ttk.Entry(main_frame, width=30)
-        self.price_entry.grid(row=2, column=1, sticky=tk.W, pady=2)
-        self.price_entry.insert(0, "1.99")
-
-        ttk.Label(main_frame, text="Distance (km):").grid(row=3, column=0, sticky=tk.W, pady=2)
-        self.distance_entry = ttk.Entry(main_frame, width=30)
-        self.distance_entry.grid(row=3, column=1, sticky=tk.W, pady=2)
-        
-        # --- Buttons ---
-        self.add_button = ttk.Button(main_frame, text="Add Entry", command=self.submit_entry)
-        self.add_button.grid(row=4, column=0, columnspan=2, pady=10)
-
-        self.summary_button = ttk.Button(main_frame, text="Show Full History", command=self.show_summary_window)
-        self.summary_button.grid(row=5, column=0, columnspan=2, pady=5)
-        
-        # --- NEW: Dashboard Button ---
-        self.dashboard_button = ttk.Button(main_frame, text="📊 Show Dashboard", command=self.show_dashboard_window)
-        self.dashboard_button.grid(row=6, column=0, columnspan=2, pady=5)
-        
-        # --- Admin Section ---
-        ttk.Separator(main_frame, orient='horizontal').grid(row=7, column=0, columnspan=2, sticky='ew', pady=10)
-        
-        self.admin_button = ttk.Button(main_frame, text="Modify/Delete Entries (Admin)", command=self.open_admin_panel)
-        self.admin_button.grid(row=8, column=0, columnspan=2, pady=5)
-        
-        # --- Status & Result ---
-        self.status_label = ttk.Label(main_frame, text="Enter details and click 'Add Entry'")
-        self.status_label.grid(row=9, column=0, columnspan=2, pady=(10,5))
-        
-        ttk.Label(main_frame, text="Last Entry Metrics:", font=('Helvetica', 10, 'bold')).grid(row=10, column=0, columnspan=2, sticky=tk.W, pady=(5,0))
-        self.result_text = tk.Text(main_frame, height=6, width=45, wrap=tk.WORD)
-        self.result_text.grid(row=11, column=0, columnspan=2, pady=5)
-        self.result_text.config(state=tk.DISABLED)
-
-    def submit_entry(self):
-        try:
-            date = self.date_entry.get()
-            total_rm = float(self.rm_entry.get())
-            price_per_litre = float(self.price_entry.get())
-            distance_km = float(self.distance_entry.get())
-            
-            if not date or total_rm <= 0 or price_per_litre <= 0 or distance_km <= 0:
-                raise ValueError("All fields must be filled with positive numbers.")
-
-            metrics = add_entry_to_db(date, total_rm, price_per_litre, distance_km)
-            
-            if metrics:
-                self.result_text.config(state=tk.NORMAL)
-                self.result_text.delete(1.0, tk.END)
-                result_str = (
-                    f"Entry Added for {date}:\n"
-                    f"  Litres: {metrics['litres']:.2f} L\n"
-                    f"  Efficiency: {metrics['km_per_litre']:.2f} km/L\n"
-                    f"  Consumption: {metrics['l_per_100km']:.2f} L/100km\n"
-                    f"  Cost: RM {metrics['rm_per_km']:.3f} per km"
-                )
-                self.result_text.insert(tk.END, result_str)
-                self.result_text.config(state=tk.DISABLED)
-                
-                self.status_label.config(text=f"✅ Entry added successfully for {date}!", foreground="green")
-                self.rm_entry.delete(0, tk.END)
-                self.distance_entry.delete(0, tk.END)
-                
-        except ValueError as e:
-            messagebox.showerror("Input Error", f"Invalid input: {e}\nPlease enter valid numbers.")
-        except Exception as e:
-            messagebox.showerror("Error", f"An unexpected error occurred: {e}")
-
-    def show_summary_window(self):
-        summary_win = tk.Toplevel(self.root)
-        summary_win.title("Full History & Summary")
-        summary_win.geometry("800x600")
-        
-        frame = ttk.Frame(summary_win, padding="10")
-        frame.pack(fill=tk.BOTH, expand=True)
-
-        all_entries, summary = get_summary_data()
-        
-        summary_frame = ttk.LabelFrame(frame, text="Overall Averages")
-        summary_frame.pack(fill=tk.X, pady=5)
-        
-        avg_text = (
-            f"Total Entries: {summary['count']} | Total Distance: {summary['total_distance']:.2f} km | Total Spent: RM {summary['total_rm']:.2f}\n"
-            f"Avg. Efficiency: {summary['avg_km_l']:.2f} km/L | "
-            f"Avg. Consumption: {summary['avg_l_100km']:.2f} L/100km | "
-            f"Avg. Cost: RM {summary['avg_rm_km']:.3f}/km"
-        )
-        ttk.Label(summary_frame, text=avg_text, justify=tk.LEFT).pack(anchor=tk.W, padx=10, pady=5)
-
-        history_frame = ttk.LabelFrame(frame, text="All Entries")
-        history_frame.pack(fill=tk.BOTH, expand=True, pady=5)
-        
-        cols = ('ID', 'Date', 'RM', 'Price/L', 'Dist(km)', 'Litres', 'km/L', 'L/100km', 'RM/km')
-        tree = ttk.Treeview(history_frame, columns=cols, show='headings')
-        
-        for col in cols:
-            tree.heading(col, text=col)
-            tree.column(col, width=80, anchor=tk.CENTER)
-        tree.column('Date', anchor=tk.W, width=90)
-        tree.column('ID', width=30)
-        
-        for entry in all_entries:
-            tree.insert("", tk.END, values=(
-                entry['id'], entry['date'], f"{entry['total_rm']:.2f}",
-                f"{entry['price_per_litre']:.2f}", f"{entry['distance_km']:.1f}",
-                f"{entry['litres']:.2f}", f"{entry['km_per_litre']:.2f}",
-                f"{entry['l_per_100km']:.2f}", f"{entry['rm_per_km']:.3f}"
-            ))
-            
-        scrollbar = ttk.Scrollbar(history_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-    def open_admin_panel(self):
-        password = simpledialog.askstring("Password Required", "Enter Admin Password:", show='*')
-        
-        if password == ADMIN_PASSWORD:
-            self.create_admin_window()
-        elif password is not None:
-            messagebox.showerror("Access Denied", "Incorrect password.")
-            
-    def create_admin_window(self):
-        admin_win = tk.Toplevel(self.root)
-        admin_win.title("🔒 Admin Panel - Modify/Delete Entries")
-        admin_win.geometry("900x600")
-        admin_win.grab_set()
-        
-        frame = ttk.Frame(admin_win, padding="10")
-        frame.pack(fill=tk.BOTH, expand=True)
+    conn = storage.get_connection(DB_FILE)
+    # Order by date ASCENDING for line plots, along idx_fuel_log_date_day
+    # (or idx_fuel_log_vehicle_date_day for one vehicle). Rows whose date
+    # SQLite can't parse have no date_day and are left out.
+    if vehicle_id is None:
+        return conn.execute("""
+        SELECT date_day, km_per_litre, rm_per_km FROM fuel_log
+        WHERE date_day IS NOT NULL ORDER BY date_day ASC
+        """).fetchall()
+    return conn.execute("""
+    SELECT date_day, km_per_litre, rm_per_km FROM fuel_log
+    WHERE vehicle_id = ? AND date_day IS NOT NULL ORDER BY date_day ASC
+    """, (vehicle_id,)).fetchall()
 
-        tree_frame = ttk.Frame(frame)
-        tree_frame.pack(fill=tk.BOTH, expand=True)
-        
-        cols = ('ID', 'Date', 'RM', 'Price/L', 'Dist(km)', 'Litres', 'km/L', 'L/100km', 'RM/km')
-        tree = ttk.Treeview(tree_frame, columns=cols, show='headings')
-        
-        for col in cols:
-            tree.heading(col, text=col)
-            tree.column(col, width=80, anchor=tk.CENTER)
-        tree.column('Date', anchor=tk.W, width=90)
-        tree.column('ID', width=30)
-        
-        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        def refresh_tree():
-            for item in tree.get_children():
-                tree.delete(item)
-            all_entries, _ = get_summary_data()
-            for entry in all_entries:
-                tree.insert("", tk.END, values=(
-                    entry['id'], entry['date'], f"{entry['total_rm']:.2f}",
-                    f"{entry['price_per_litre']:.2f}", f"{entry['distance_km']:.1f}",
-                    f"{entry['litres']:.2f}", f"{entry['km_per_litre']:.2f}",
-                    f"{entry['l_per_100km']:.2f}", f"{entry['rm_per_km']:.3f}"
-                ))
-        
-        button_frame = ttk.Frame(frame)
-        button_frame.pack(fill=tk.X, pady=10)
-        
-        def on_modify():
-            selected_item = tree.focus()
-            if not selected_item:
-                messagebox.showwarning("No Selection", "Please select an entry to modify.")
-                return
-            item_data = tree.item(selected_item, 'values')
-            self.create_modify_window(admin_win, item_data, refresh_tree)
-        
-        def on_delete():
-            selected_item = tree.focus()
-            if not selected_item:
-                messagebox.showwarning("No Selection", "Please select an entry to delete.")
-                return
-            item_data = tree.item(selected_item, 'values')
-            entry_id = item_data[0]
-            
-            if messagebox.askyesno("Confirm Delete", f"Are you sure you want to permanently delete entry ID {entry_id} ({item_data[1]})?"):
-                if delete_entry_from_db(entry_id):
-                    messagebox.showinfo("Success", f"Entry ID {entry_id} deleted.")
-                    refresh_tree()
-                else:
-                    messagebox.showerror("Error", f"Failed to delete entry ID {entry_id}.")
-
-        modify_btn = ttk.Button(button_frame, text="Modify Selected Entry", command=on_modify)
-        modify_btn.pack(side=tk.LEFT, padx=5)
-        delete_btn = ttk.Button(button_frame, text="Delete Selected Entry", command=on_delete)
-        delete_btn.pack(side=tk.LEFT, padx=5)
-        refresh_btn = ttk.Button(button_frame, text="Refresh", command=refresh_tree)
-        refresh_btn.pack(side=tk.RIGHT, padx=5)
-        
-        refresh_tree()
-        
-    def create_modify_window(self, parent_win, item_data, refresh_callback):
-        entry_id = item_data[0]
-        modify_win = tk.Toplevel(parent_win)
-        modify_win.title(f"Edit Entry ID: {entry_id}")
-        modify_win.grab_set()
-        
-        frame = ttk.Frame(modify_win, padding="15")
-        frame.pack()
-        
-        ttk.Label(frame, text="Date:").grid(row=0, column=0, sticky=tk.W, pady=5)
-        date_var = tk.StringVar(value=item_data[1])
-        date_e = ttk.Entry(frame, textvariable=date_var, width=25)
-        date_e.grid(row=0, column=1)
-        
-        ttk.Label(frame, text="Amount (RM):").grid(row=1, column=0, sticky=tk.W, pady=5)
-        rm_var = tk.StringVar(value=item_data[2])
-        rm_e = ttk.Entry(frame, textvariable=rm_var, width=25)
-        rm_e.grid(row=1, column=1)
-
-        ttk.Label(frame, text="Price/Litre (RM):").grid(row=2, column=0, sticky=tk.W, pady=5)
-        price_var = tk.StringVar(value=item_data[3])
-        price_e = ttk.Entry(frame, textvariable=price_var, width=25)
-        price_e.grid(row=2, column=1)
-        
-        ttk.Label(frame, text="Distance (km):").grid(row=3, column=0, sticky=tk.W, pady=5)
-        dist_var = tk.StringVar(value=item_data[4])
-        dist_e = ttk.Entry(frame, textvariable=dist_var, width=25)
-        dist_e.grid(row=3, column=1)
-        
-        def on_update():
-            try:
-                new_date = date_var.get()
-                new_rm = float(rm_var.get())
-                new_price = float(price_var.get())
-                new_dist = float(dist_var.get())
-                
-                if not new_date or new_rm <= 0 or new_price <= 0 or new_dist <= 0:
-                    raise ValueError("All fields must be positive values.")
-                
-                if update_entry_in_db(entry_id, new_date, new_rm, new_price, new_dist):
-                    messagebox.showinfo("Success", f"Entry ID {entry_id} updated successfully.", parent=modify_win)
-                    refresh_callback()
-                    modify_win.destroy()
-                else:
-                    messagebox.showerror("Error", "Failed to update database.", parent=modify_win)
-                    
-            except ValueError as e:
-                messagebox.showerror("Input Error", f"Invalid data: {e}", parent=modify_win)
-
-        update_btn = ttk.Button(frame, text="Update Entry", command=on_update)
-        update_btn.grid(row=4, column=0, columnspan=2, pady=10)
-
-    # --- NEW DASHBOARD/CHARTING METHOD ---
-
-    def show_dashboard_window(self):
-        """Creates a new window and displays Matplotlib charts."""
-        
-        plot_data = get_plot_data()
-        
-        if len(plot_data) < 2:
-            messagebox.showinfo("Not Enough Data", "You need at least two entries to draw a chart.")
-            return
 
-        dash_win = tk.Toplevel(self.root)
-        dash_win.title("📊 Data Dashboard")
-        dash_win.geometry("900x700")
+# --- Main execution ---
 
-        frame = ttk.Frame(dash_win, padding="10")
-        frame.pack(fill=tk.BOTH, expand=True)
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # GUI and CLI are only imported for the mode actually being run
+    if argv:
+        import cli
+        return cli.main(argv)
+    import gui
+    return gui.main()
 
-        # --- Process Data for Plotting ---
-        dates = []
-        km_l_values = []
-        rm_km_values = []
-        
-        for row in plot_data:
-            try:
-                # Convert date string (YYYY-MM-DD) to datetime object
-                dates.append(datetime.datetime.strptime(row['date'], '%Y-%m-%d').date())
-                km_l_values.append(row['km_per_litre'])
-                rm_km_values.append(row['rm_per_km'])
-            except ValueError:
-                print(f"Skipping bad date format: {row['date']}")
-                continue
-
-        # --- Create the Matplotlib Figure and Subplots ---
-        # We create one Figure that holds two subplots (ax1, ax2)
-        fig = Figure(figsize=(8, 6), dpi=100)
-        fig.subplots_adjust(hspace=0.4) # Add space between plots
-        
-        ax1 = fig.add_subplot(2, 1, 1) # (rows, columns, plot_number)
-        ax2 = fig.add_subplot(2, 1, 2)
-
-        # --- Plot 1: Efficiency (km/L) ---
-        ax1.plot(dates, km_l_values, marker='o', linestyle='-', color='b')
-        ax1.set_title("Fuel Efficiency Over Time")
-        ax1.set_ylabel("Efficiency (km/L)")
-        ax1.grid(True)
-        
-        # --- Plot 2: Cost (RM/km) ---
-        ax2.plot(dates, rm_km_values, marker='s', linestyle='--', color='r')
-        ax2.set_title("Cost Per Kilometre Over Time")
-        ax2.set_ylabel("Cost (RM/km)")
-        ax2.set_xlabel("Date")
-        ax2.grid(True)
-        
-        # Format the x-axis for both plots to show dates nicely
-        date_format = DateFormatter("%Y-%m-%d")
-        ax1.xaxis.set_major_formatter(date_format)
-        ax2.xaxis.set_major_formatter(date_format)
-        fig.autofmt_xdate() # Auto-rotate dates to prevent overlap
-
-        # --- Embed the Figure in the Tkinter Window ---
-        canvas = FigureCanvasTkAgg(fig, master=frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-        
-
-# --- Main execution ---
 if __name__ == "__main__":
-    setup_database()
-    root_window = tk.Tk()
-    app = FuelTrackerApp(root_window)
-    root_window.mainloop()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,962 @@
+"""Tkinter GUI for the fuel tracker. Start it with `python fuel_tracker.py`.
+
+matplotlib (and NumPy, for the chart series) are only imported when the
+dashboard is first opened, so the main window comes up without them.
+"""
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, simpledialog
+import datetime
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+
+import fuel_tracker
+from fuel_tracker import (
+    DEFAULT_VEHICLE_ID, EPOCH_ORDINAL, PAGE_SIZE, SORTABLE_COLUMNS, add_entry_to_db, add_vehicle,
+    count_entries_where, delete_entries, delete_entries_where, get_entries, get_entries_page,
+    get_summary, get_vehicles, setup_database, update_entries, update_entry_in_db,
+    validate_entry,
+)
+from exporter import export_file
+import perf
+import storage
+from tasks import TaskRunner
+
+ADMIN_PASSWORD = "Viishnu15!"
+
+# --- Paged History Table ---
+
+HISTORY_COLUMNS = ('ID', 'Date', 'RM', 'Price/L', 'Dist(km)', 'Litres', 'km/L', 'L/100km', 'RM/km')
+# Treeview heading -> fuel_log column used for ORDER BY
+HISTORY_SORT_KEYS = dict(zip(HISTORY_COLUMNS, SORTABLE_COLUMNS))
+
+def format_entry_values(entry):
+    return (
+        entry['id'], entry['date'], f"{entry['total_rm']:.2f}",
+        f"{entry['price_per_litre']:.2f}", f"{entry['distance_km']:.1f}",
+        f"{entry['litres']:.2f}", f"{entry['km_per_litre']:.2f}",
+        f"{entry['l_per_100km']:.2f}", f"{entry['rm_per_km']:.3f}"
+    )
+
+class PagedTreeview:
+    """History table that only ever holds a window of MAX_ROWS entries.
+
+    Pages are fetched with get_entries_page as the user scrolls near either
+    edge, and pages that scroll far out of view are dropped again, so memory
+    stays flat however large fuel_log gets. Clicking a heading re-sorts in
+    SQLite and starts again from the first page. With a vehicle_id only
+    that vehicle's entries are shown.
+    """
+    MAX_ROWS = 5 * PAGE_SIZE
+    EDGE = 0.1  # load more when the view is within 10% of either end
+
+    def __init__(self, parent, runner=None, order_by='Date', descending=True, vehicle_id=None):
+        self.runner = runner
+        self.order_by = order_by
+        self.descending = descending
+        self.vehicle_id = vehicle_id
+
+        self.tree = ttk.Treeview(parent, columns=HISTORY_COLUMNS, show='headings', selectmode='extended')
+        for col in HISTORY_COLUMNS:
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
+            self.tree.column(col, width=80, anchor=tk.CENTER)
+        self.tree.column('Date', anchor=tk.W, width=90)
+        self.tree.column('ID', width=30)
+
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self._rows = deque()  # (sort key, iid) for each row in the tree, top to bottom
+        self._pending = False
+        self._generation = 0  # bumped on reload so late pages from an old order are ignored
+        self._on_loaded = None
+        self.reload()
+
+    def _key(self, entry):
+        return (entry[HISTORY_SORT_KEYS[self.order_by]], entry['id'])
+
+    def reload(self, on_loaded=None):
+        """Drops everything and loads the first page in the current order.
+
+        on_loaded is called once that page is in the tree; not if the load
+        fails or another reload overtakes it.
+        """
+        self._on_loaded = on_loaded
+        self.tree.delete(*self.tree.get_children())
+        self._rows.clear()
+        self._generation += 1
+        self._at_start = True
+        self._at_end = False
+        for col in HISTORY_COLUMNS:
+            arrow = (' ▼' if self.descending else ' ▲') if col == self.order_by else ''
+            self.tree.heading(col, text=col + arrow)
+        self._load_more(forward=True)
+
+    def sort_by(self, col):
+        if col == self.order_by:
+            self.descending = not self.descending
+        else:
+            self.order_by, self.descending = col, False
+        self.reload()
+
+    # --- Row-level changes (no reload) ---
+
+    def remove_rows(self, entry_ids):
+        """Drops deleted entries from the tree, wherever they are in the window."""
+        gone = {str(i) for i in entry_ids}
+        present = [iid for _, iid in self._rows if str(iid) in gone]
+        if present:
+            self.tree.delete(*present)
+            self._rows = deque(row for row in self._rows if str(row[1]) not in gone)
+
+    def update_rows(self, entries):
+        """Shows new values for edited entries that are loaded.
+
+        They keep their position (and paging key) until the next reload,
+        even if their sort key changed; a page that brings one back again
+        skips it.
+        """
+        moved = []
+        for entry in entries:
+            iid = str(entry['id'])
+            if not self.tree.exists(iid):
+                continue
+            if self.vehicle_id is not None and entry['vehicle_id'] != self.vehicle_id:
+                moved.append(entry['id'])
+            else:
+                self.tree.item(iid, values=format_entry_values(entry))
+        if moved:
+            self.remove_rows(moved)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._pending:
+            return
+        if float(last) >= 1 - self.EDGE and not self._at_end:
+            forward = True
+        elif float(first) <= self.EDGE and not self._at_start:
+            forward = False
+        else:
+            return
+        # Don't touch the tree from inside its own scroll callback.
+        self._pending = True
+        self.tree.after_idle(self._load_more, forward)
+
+    def _load_more(self, forward):
+        self._pending = True
+        order_by = HISTORY_SORT_KEYS[self.order_by]
+        if forward:
+            after = self._rows[-1][0] if self._rows else None
+            args = (order_by, self.descending, after, PAGE_SIZE, self.vehicle_id)
+        else:
+            # Walking backwards is the same query in the opposite direction.
+            args = (order_by, not self.descending, self._rows[0][0], PAGE_SIZE, self.vehicle_id)
+        generation = self._generation
+        on_done = lambda page: self._add_page(generation, forward, page)
+        if self.runner is None:
+            on_done(get_entries_page(*args))
+        else:
+            self.runner.submit(get_entries_page, *args, on_done=on_done,
+                               on_error=lambda e: self._page_failed(generation, e), owner=self.tree)
+
+    def _page_failed(self, generation, error):
+        # Clear the flag so scrolling can ask for the page again.
+        if generation == self._generation:
+            self._pending = False
+            self._on_loaded = None
+        messagebox.showerror("Error", f"Failed to load entries: {error}", parent=self.tree.winfo_toplevel())
+
+    @perf.timed("ui.history_page")
+    def _add_page(self, generation, forward, page):
+        if generation != self._generation:
+            return
+        self._pending = False
+        with perf.measure("ui.format_rows"):
+            rows = [(entry, format_entry_values(entry)) for entry in page]
+        if forward:
+            self._at_end = len(page) < PAGE_SIZE
+            for entry, values in rows:
+                if self.tree.exists(entry['id']):  # edited in place and met again further on
+                    continue
+                iid = self.tree.insert("", tk.END, iid=entry['id'], values=values)
+                self._rows.append((self._key(entry), iid))
+            dropped = 0
+            while len(self._rows) > self.MAX_ROWS:
+                self.tree.delete(self._rows.popleft()[1])
+                self._at_start = False
+                dropped += 1
+            # Keep the same rows on screen after removing rows above them.
+            if dropped:
+                self.tree.yview_scroll(-dropped, 'units')
+        else:
+            self._at_start = len(page) < PAGE_SIZE
+            for entry, values in rows:
+                if self.tree.exists(entry['id']):
+                    continue
+                iid = self.tree.insert("", 0, iid=entry['id'], values=values)
+                self._rows.appendleft((self._key(entry), iid))
+            while len(self._rows) > self.MAX_ROWS:
+                self.tree.delete(self._rows.pop()[1])
+                self._at_end = False
+            if page:
+                self.tree.yview_scroll(len(page), 'units')
+        if self._on_loaded is not None:
+            on_loaded, self._on_loaded = self._on_loaded, None
+            on_loaded()
+
+# --- Charts ---
+
+# Per vehicle: raw plot columns as arrays plus recently reduced ranges, keyed
+# on the data version, so reopening the dashboard doesn't refetch or recompute
+# anything. Only the most recently charted vehicles are kept. Created on first
+# use so NumPy isn't imported until the dashboard opens.
+SERIES_CACHE_VEHICLES = 8
+_series_caches = OrderedDict()  # vehicle_id -> SeriesCache
+_series_caches_lock = threading.Lock()
+
+@perf.timed("chart.load_series")
+def load_dashboard_series(vehicle_id, lo=None, hi=None):
+    """Returns (data version, PlotSeries) for epoch days [lo, hi]. Worker-thread safe."""
+    from columnar import load_plot_columns
+    from series import SeriesCache
+
+    with _series_caches_lock:
+        cache = _series_caches.get(vehicle_id)
+        if cache is None:
+            cache = _series_caches[vehicle_id] = SeriesCache(
+                lambda: load_plot_columns(vehicle_id, fuel_tracker.DB_FILE))
+            while len(_series_caches) > SERIES_CACHE_VEHICLES:
+                _series_caches.popitem(last=False)
+        _series_caches.move_to_end(vehicle_id)
+    db_file = fuel_tracker.DB_FILE
+    version = (db_file, storage.data_version(db_file))
+    return version, cache.series(version, lo, hi)
+
+def _load_dashboard(vehicle_id):
+    """First dashboard load: also imports matplotlib, off the Tk thread."""
+    import charts  # noqa: F401
+    import matplotlib.backends.backend_tkagg  # noqa: F401
+    return load_dashboard_series(vehicle_id)
+
+class DashboardView:
+    """Efficiency and cost charts that update their lines in place.
+
+    The Figure is built once. Zooming or panning with the toolbar re-requests
+    the visible range at a matching resolution, and a periodic data-version
+    check swaps in fresh data after entries change. Both go through
+    Line2D.set_data and draw_idle instead of rebuilding the figure.
+    """
+    REFRESH_MS = 2000
+    ZOOM_DEBOUNCE_MS = 150
+
+    def __init__(self, parent, runner, vehicle_id, version, series):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        import charts
+
+        self.runner = runner
+        self.vehicle_id = vehicle_id
+        self.version = version
+        self.range = None  # (lo, hi) epoch days currently loaded, None for everything
+        self._zoom_job = None
+        self._rescaling = False
+
+        # --- Create the Matplotlib Figure and Subplots (charts.py) ---
+        with perf.measure("chart.build_figure"):
+            fig = Figure(figsize=charts.FIGSIZE, dpi=charts.DPI)
+            self.lines = charts.build_dashboard(fig, series)
+        self.resolution = series.resolution
+
+        # --- Embed the Figure in the Tkinter Window ---
+        self.canvas = FigureCanvasTkAgg(fig, master=parent)
+        # draw_idle and resizes end up in canvas.draw(), so this times every redraw.
+        self.canvas.draw = perf.timed("chart.draw")(self.canvas.draw)
+        NavigationToolbar2Tk(self.canvas, parent).pack(side=tk.BOTTOM, fill=tk.X)
+        self.widget = self.canvas.get_tk_widget()
+        self.widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.canvas.draw_idle()
+
+        self.lines.ax1.callbacks.connect('xlim_changed', self._on_xlim_changed)
+        self.widget.after(self.REFRESH_MS, self._check_for_changes)
+
+    def _show(self, series, rescale):
+        from charts import set_series
+
+        self.resolution = series.resolution
+        self._rescaling = rescale
+        set_series(self.lines, series, rescale)
+        self._rescaling = False
+        self.canvas.draw_idle()
+
+    # --- Zoom / pan: reload the visible range at a finer resolution ---
+
+    def _on_xlim_changed(self, ax):
+        if self._rescaling:
+            return
+        if self._zoom_job is not None:
+            self.widget.after_cancel(self._zoom_job)
+        self._zoom_job = self.widget.after(self.ZOOM_DEBOUNCE_MS, self._load_visible_range)
+
+    def _load_visible_range(self):
+        from matplotlib.dates import num2date
+
+        self._zoom_job = None
+        lo, hi = (num2date(x).date().toordinal() - EPOCH_ORDINAL for x in self.lines.ax1.get_xlim())
+        # Load half a view either side so short pans don't show empty space
+        margin = (hi - lo) // 2 + 1
+        self.range = (lo - margin, hi + margin)
+        self.runner.submit(load_dashboard_series, self.vehicle_id, *self.range,
+                           on_done=self._on_range_loaded, owner=self.widget)
+
+    def _on_range_loaded(self, result):
+        version, series = result
+        self.version = version
+        self._show(series, rescale=False)
+
+    # --- Data changes: swap the lines' data, keep the figure ---
+
+    def _check_for_changes(self):
+        if not self.widget.winfo_exists():
+            return
+        lo, hi = self.range or (None, None)
+        self.runner.submit(load_dashboard_series, self.vehicle_id, lo, hi,
+                           on_done=self._on_refreshed, owner=self.widget)
+
+    def _on_refreshed(self, result):
+        version, series = result
+        if version != self.version:
+            self.version = version
+            self._show(series, rescale=self.range is None)
+        self.widget.after(self.REFRESH_MS, self._check_for_changes)
+
+# --- Main Application Class (Modified) ---
+
+class FuelTrackerApp:
+    def __init__(self, root, tasks=None):
+        self.root = root
+        self.root.title("🚗 Fuel & Expense Tracker")
+        # Queries and chart building run here, off the Tk thread
+        self.tasks = tasks or TaskRunner(root)
+        # Exports get their own worker (and so their own connection): a
+        # multi-million-row file would otherwise hold up every query above.
+        self.export_tasks = TaskRunner(root, inline=self.tasks.inline, thread_name_prefix="fuel-tracker-export")
+        
+        main_frame = ttk.Frame(root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # --- Vehicle ---
+        # New entries go to, and every window shows, the selected vehicle.
+        ttk.Label(main_frame, text="Vehicle:").grid(row=0, column=0, sticky=tk.W, pady=2)
+        vehicle_frame = ttk.Frame(main_frame)
+        vehicle_frame.grid(row=0, column=1, sticky=tk.W, pady=2)
+        self.vehicle_var = tk.StringVar()
+        self.vehicle_ids = {}  # name -> id
+        self.vehicle_combo = ttk.Combobox(vehicle_frame, textvariable=self.vehicle_var, state='readonly', width=18)
+        self.vehicle_combo.pack(side=tk.LEFT)
+        ttk.Button(vehicle_frame, text="New Vehicle…", command=self.new_vehicle).pack(side=tk.LEFT, padx=(5, 0))
+        self.load_vehicles()
+
+        # --- Input Fields ---
+        ttk.Label(main_frame, text="Date:").grid(row=1, column=0, sticky=tk.W, pady=2)
+        self.date_entry = ttk.Entry(main_frame, width=30)
+        self.date_entry.grid(row=1, column=1, sticky=tk.W, pady=2)
+        self.date_entry.insert(0, datetime.date.today().isoformat())
+
+        ttk.Label(main_frame, text="Amount (RM):").grid(row=2, column=0, sticky=tk.W, pady=2)
+        self.rm_entry = ttk.Entry(main_frame, width=30)
+        self.rm_entry.grid(row=2, column=1, sticky=tk.W, pady=2)
+
+        ttk.Label(main_frame, text="Price/Litre (RM):").grid(row=3, column=0, sticky=tk.W, pady=2)
+        self.price_entry = ttk.Entry(main_frame, width=30)
+        self.price_entry.grid(row=3, column=1, sticky=tk.W, pady=2)
+        self.price_entry.insert(0, "1.99")
+
+        ttk.Label(main_frame, text="Distance (km):").grid(row=4, column=0, sticky=tk.W, pady=2)
+        self.distance_entry = ttk.Entry(main_frame, width=30)
+        self.distance_entry.grid(row=4, column=1, sticky=tk.W, pady=2)
+        
+        # --- Buttons ---
+        self.add_button = ttk.Button(main_frame, text="Add Entry", command=self.submit_entry)
+        self.add_button.grid(row=5, column=0, columnspan=2, pady=10)
+
+        self.summary_button = ttk.Button(main_frame, text="Show Full History", command=self.show_summary_window)
+        self.summary_button.grid(row=6, column=0, columnspan=2, pady=5)
+        
+        # --- NEW: Dashboard Button ---
+        self.dashboard_button = ttk.Button(main_frame, text="📊 Show Dashboard", command=self.show_dashboard_window)
+        self.dashboard_button.grid(row=7, column=0, columnspan=2, pady=5)
+
+        self.export_button = ttk.Button(main_frame, text="Export…", command=self.show_export_window)
+        self.export_button.grid(row=8, column=0, columnspan=2, pady=5)
+
+        self.performance_button = ttk.Button(main_frame, text="Performance…", command=self.show_performance_window)
+        self.performance_button.grid(row=9, column=0, columnspan=2, pady=5)
+        
+        # --- Admin Section ---
+        ttk.Separator(main_frame, orient='horizontal').grid(row=10, column=0, columnspan=2, sticky='ew', pady=10)
+        
+        self.admin_button = ttk.Button(main_frame, text="Modify/Delete Entries (Admin)", command=self.open_admin_panel)
+        self.admin_button.grid(row=11, column=0, columnspan=2, pady=5)
+        
+        # --- Status & Result ---
+        self.status_label = ttk.Label(main_frame, text="Enter details and click 'Add Entry'")
+        self.status_label.grid(row=12, column=0, columnspan=2, pady=(10,5))
+        
+        ttk.Label(main_frame, text="Last Entry Metrics:", font=('Helvetica', 10, 'bold')).grid(row=13, column=0, columnspan=2, sticky=tk.W, pady=(5,0))
+        self.result_text = tk.Text(main_frame, height=6, width=45, wrap=tk.WORD)
+        self.result_text.grid(row=14, column=0, columnspan=2, pady=5)
+        self.result_text.config(state=tk.DISABLED)
+
+    # --- Vehicles ---
+
+    def load_vehicles(self, select=None):
+        """Refreshes the vehicle list, then selects `select` (a name) or keeps the current one."""
+        def on_done(vehicles):
+            self.vehicle_ids = {v['name']: v['id'] for v in vehicles}
+            self.vehicle_combo.config(values=list(self.vehicle_ids))
+            current = select or self.vehicle_var.get()
+            if current not in self.vehicle_ids:
+                by_id = {v['id']: v['name'] for v in vehicles}
+                current = by_id.get(DEFAULT_VEHICLE_ID) or next(iter(self.vehicle_ids), "")
+            self.vehicle_var.set(current)
+
+        self.tasks.submit(get_vehicles, on_done=on_done)
+
+    def selected_vehicle(self):
+        """(id, name) of the vehicle picked in the main window."""
+        name = self.vehicle_var.get()
+        return self.vehicle_ids.get(name, DEFAULT_VEHICLE_ID), name
+
+    def new_vehicle(self):
+        name = simpledialog.askstring("New Vehicle", "Vehicle name:")
+        if not name or not name.strip():
+            return
+        self.tasks.submit(
+            add_vehicle, name, on_done=lambda _: self.load_vehicles(select=name.strip()),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to add vehicle: {e}"))
+
+    def _loading_bar(self, parent):
+        """Indeterminate progress bar shown while a background task runs."""
+        bar = ttk.Progressbar(parent, mode='indeterminate')
+        bar.pack(fill=tk.X, padx=10, pady=5)
+        bar.start(10)
+        return bar
+
+    @perf.timed("ui.submit_entry")
+    def submit_entry(self):
+        try:
+            date = self.date_entry.get()
+            total_rm = float(self.rm_entry.get())
+            price_per_litre = float(self.price_entry.get())
+            distance_km = float(self.distance_entry.get())
+            
+            validate_entry(date, total_rm, price_per_litre, distance_km)
+        except ValueError as e:
+            messagebox.showerror("Input Error", f"Invalid input: {e}\nPlease enter valid numbers.")
+            return
+        vehicle_id, vehicle_name = self.selected_vehicle()
+        saved = perf.stopwatch("ui.entry_saved")
+
+        def on_done(metrics):
+            saved()
+            self.add_button.config(state=tk.NORMAL)
+            self.result_text.config(state=tk.NORMAL)
+            self.result_text.delete(1.0, tk.END)
+            result_str = (
+                f"Entry Added for {vehicle_name} on {date}:\n"
+                f"  Litres: {metrics['litres']:.2f} L\n"
+                f"  Efficiency: {metrics['km_per_litre']:.2f} km/L\n"
+                f"  Consumption: {metrics['l_per_100km']:.2f} L/100km\n"
+                f"  Cost: RM {metrics['rm_per_km']:.3f} per km"
+            )
+            self.result_text.insert(tk.END, result_str)
+            self.result_text.config(state=tk.DISABLED)
+            
+            self.status_label.config(text=f"✅ Entry added successfully for {date}!", foreground="green")
+            self.rm_entry.delete(0, tk.END)
+            self.distance_entry.delete(0, tk.END)
+
+        def on_error(e):
+            self.add_button.config(state=tk.NORMAL)
+            self.status_label.config(text="Enter details and click 'Add Entry'", foreground="")
+            messagebox.showerror("Database Error", f"Failed to add entry: {e}")
+
+        self.add_button.config(state=tk.DISABLED)
+        self.status_label.config(text="Saving...", foreground="")
+        self.tasks.submit(add_entry_to_db, date, total_rm, price_per_litre, distance_km, vehicle_id,
+                          on_done=on_done, on_error=on_error)
+
+    @perf.timed("ui.show_summary_window")
+    def show_summary_window(self):
+        vehicle_id, vehicle_name = self.selected_vehicle()
+        ready = perf.stopwatch("ui.summary_ready")
+        summary_win = tk.Toplevel(self.root)
+        summary_win.title(f"Full History & Summary - {vehicle_name}")
+        summary_win.geometry("800x600")
+        
+        frame = ttk.Frame(summary_win, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        summary_frame = ttk.LabelFrame(frame, text="Overall Averages")
+        summary_frame.pack(fill=tk.X, pady=5)
+        loading = self._loading_bar(summary_frame)
+        
+        def show_summary(summary):
+            ready()
+            loading.destroy()
+            avg_text = (
+                f"Total Entries: {summary['count']} | Total Distance: {summary['total_distance']:.2f} km | Total Spent: RM {summary['total_rm']:.2f}\n"
+                f"Avg. Efficiency: {summary['avg_km_l']:.2f} km/L | "
+                f"Avg. Consumption: {summary['avg_l_100km']:.2f} L/100km | "
+                f"Avg. Cost: RM {summary['avg_rm_km']:.3f}/km"
+            )
+            ttk.Label(summary_frame, text=avg_text, justify=tk.LEFT).pack(anchor=tk.W, padx=10, pady=5)
+
+        self.tasks.submit(get_summary, vehicle_id, on_done=show_summary, owner=summary_win)
+
+        history_frame = ttk.LabelFrame(frame, text="All Entries")
+        history_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        PagedTreeview(history_frame, self.tasks, vehicle_id=vehicle_id)
+
+    def open_admin_panel(self):
+        password = simpledialog.askstring("Password Required", "Enter Admin Password:", show='*')
+        
+        if password == ADMIN_PASSWORD:
+            self.create_admin_window()
+        elif password is not None:
+            messagebox.showerror("Access Denied", "Incorrect password.")
+            
+    def create_admin_window(self):
+        vehicle_id, vehicle_name = self.selected_vehicle()
+        admin_win = tk.Toplevel(self.root)
+        admin_win.title(f"🔒 Admin Panel - Modify/Delete Entries - {vehicle_name}")
+        admin_win.geometry("900x600")
+        admin_win.grab_set()
+        
+        frame = ttk.Frame(admin_win, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        tree_frame = ttk.Frame(frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Shift/Ctrl-click to select several rows
+        history = PagedTreeview(tree_frame, self.tasks, vehicle_id=vehicle_id)
+        tree = history.tree
+        
+        def refresh_tree():
+            # Timed until the first page is back and in the tree, not just the submit.
+            history.reload(on_loaded=perf.stopwatch("ui.refresh_tree"))
+
+        def refresh_rows(entry_ids):
+            """Re-reads just these entries and updates their rows in place."""
+            self.tasks.submit(get_entries, entry_ids, on_done=history.update_rows, owner=admin_win)
+
+        def selected_ids():
+            return [int(tree.item(item, 'values')[0]) for item in tree.selection()]
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X, pady=10)
+        
+        def on_modify():
+            selected_item = tree.focus()
+            if not selected_item:
+                messagebox.showwarning("No Selection", "Please select an entry to modify.")
+                return
+            item_data = tree.item(selected_item, 'values')
+            self.create_modify_window(admin_win, item_data, lambda: refresh_rows([int(item_data[0])]))
+
+        def on_bulk_edit():
+            entry_ids = selected_ids()
+            if not entry_ids:
+                messagebox.showwarning("No Selection", "Please select the entries to edit.", parent=admin_win)
+                return
+            self.create_bulk_edit_window(admin_win, entry_ids, history.update_rows)
+        
+        def on_delete():
+            entry_ids = selected_ids()
+            if not entry_ids:
+                messagebox.showwarning("No Selection", "Please select the entries to delete.", parent=admin_win)
+                return
+            
+            if len(entry_ids) == 1:
+                item_data = tree.item(tree.selection()[0], 'values')
+                question = f"Are you sure you want to permanently delete entry ID {entry_ids[0]} ({item_data[1]})?"
+            else:
+                question = f"Are you sure you want to permanently delete {len(entry_ids)} entries?"
+            if messagebox.askyesno("Confirm Delete", question, parent=admin_win):
+                def on_deleted(count):
+                    history.remove_rows(entry_ids)
+                    messagebox.showinfo("Success", f"{count} entries deleted.", parent=admin_win)
+                
+                self.tasks.submit(
+                    delete_entries, entry_ids, on_done=on_deleted, owner=admin_win,
+                    on_error=lambda e: messagebox.showerror("Error", f"Failed to delete entries: {e}", parent=admin_win))
+
+        def on_delete_by_filter():
+            self.create_delete_filter_window(admin_win, vehicle_id, vehicle_name, history.remove_rows)
+
+        modify_btn = ttk.Button(button_frame, text="Modify Selected Entry", command=on_modify)
+        modify_btn.pack(side=tk.LEFT, padx=5)
+        bulk_btn = ttk.Button(button_frame, text="Bulk Edit Selected…", command=on_bulk_edit)
+        bulk_btn.pack(side=tk.LEFT, padx=5)
+        delete_btn = ttk.Button(button_frame, text="Delete Selected", command=on_delete)
+        delete_btn.pack(side=tk.LEFT, padx=5)
+        filter_btn = ttk.Button(button_frame, text="Delete by Filter…", command=on_delete_by_filter)
+        filter_btn.pack(side=tk.LEFT, padx=5)
+        refresh_btn = ttk.Button(button_frame, text="Refresh", command=refresh_tree)
+        refresh_btn.pack(side=tk.RIGHT, padx=5)
+
+    def create_bulk_edit_window(self, parent_win, entry_ids, on_updated):
+        """Sets the filled-in fields on every selected entry; blank fields stay as they are."""
+        bulk_win = tk.Toplevel(parent_win)
+        bulk_win.title(f"Bulk Edit {len(entry_ids)} Entries")
+        bulk_win.grab_set()
+
+        frame = ttk.Frame(bulk_win, padding="15")
+        frame.pack()
+        ttk.Label(frame, text="Leave a field blank to keep each entry's own value.").grid(
+            row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+
+        fields = (("Date:", "date"), ("Amount (RM):", "total_rm"),
+                  ("Price/Litre (RM):", "price_per_litre"), ("Distance (km):", "distance_km"))
+        variables = {}
+        for row, (label, name) in enumerate(fields, start=1):
+            ttk.Label(frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=5)
+            variables[name] = tk.StringVar()
+            ttk.Entry(frame, textvariable=variables[name], width=25).grid(row=row, column=1)
+
+        def on_update():
+            changes = {}
+            try:
+                for name, var in variables.items():
+                    text = var.get().strip()
+                    if text:
+                        changes[name] = text if name == "date" else float(text)
+                if not changes:
+                    raise ValueError("Fill in at least one field.")
+            except ValueError as e:
+                messagebox.showerror("Input Error", f"Invalid data: {e}", parent=bulk_win)
+                return
+
+            def on_done(rows):
+                on_updated(rows)
+                bulk_win.destroy()
+                messagebox.showinfo("Success", f"{len(rows)} entries updated.", parent=parent_win)
+
+            def on_error(e):
+                update_btn.config(state=tk.NORMAL)
+                messagebox.showerror("Error", f"Failed to update entries: {e}", parent=bulk_win)
+
+            update_btn.config(state=tk.DISABLED)
+            self.tasks.submit(lambda: update_entries(entry_ids, **changes),
+                              on_done=on_done, on_error=on_error, owner=bulk_win)
+
+        update_btn = ttk.Button(frame, text=f"Update {len(entry_ids)} Entries", command=on_update)
+        update_btn.grid(row=len(fields) + 1, column=0, columnspan=2, pady=10)
+
+    def create_delete_filter_window(self, parent_win, vehicle_id, vehicle_name, on_deleted):
+        """Deletes every entry of the vehicle matching a date and/or ID range, after a count and confirm."""
+        filter_win = tk.Toplevel(parent_win)
+        filter_win.title("Delete by Filter")
+        filter_win.grab_set()
+
+        frame = ttk.Frame(filter_win, padding="15")
+        frame.pack()
+        ttk.Label(frame, text=f"Deletes {vehicle_name}'s entries matching every filled-in field.").grid(
+            row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+
+        fields = (("From date:", "start"), ("To date:", "end"), ("From ID:", "min_id"), ("To ID:", "max_id"))
+        variables = {}
+        for row, (label, name) in enumerate(fields, start=1):
+            ttk.Label(frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=5)
+            variables[name] = tk.StringVar()
+            ttk.Entry(frame, textvariable=variables[name], width=25).grid(row=row, column=1)
+
+        def on_delete():
+            filters = {}
+            try:
+                for name, var in variables.items():
+                    text = var.get().strip()
+                    if text:
+                        filters[name] = int(text) if name.endswith("_id") else text
+                if not filters:
+                    raise ValueError("Fill in at least one field.")
+            except ValueError as e:
+                messagebox.showerror("Input Error", f"Invalid data: {e}", parent=filter_win)
+                return
+            filters["vehicle_id"] = vehicle_id
+
+            def on_error(e):
+                delete_btn.config(state=tk.NORMAL)
+                messagebox.showerror("Error", f"Failed to delete entries: {e}", parent=filter_win)
+
+            def on_deleted_ids(entry_ids):
+                on_deleted(entry_ids)
+                filter_win.destroy()
+                messagebox.showinfo("Success", f"{len(entry_ids)} entries deleted.", parent=parent_win)
+
+            def on_counted(count):
+                if count == 0:
+                    delete_btn.config(state=tk.NORMAL)
+                    messagebox.showinfo("Nothing to Delete", "No entries match these filters.", parent=filter_win)
+                elif messagebox.askyesno("Confirm Delete", f"Permanently delete {count} entries?", parent=filter_win):
+                    self.tasks.submit(lambda: delete_entries_where(**filters),
+                                      on_done=on_deleted_ids, on_error=on_error, owner=filter_win)
+                else:
+                    delete_btn.config(state=tk.NORMAL)
+
+            delete_btn.config(state=tk.DISABLED)
+            self.tasks.submit(lambda: count_entries_where(**filters),
+                              on_done=on_counted, on_error=on_error, owner=filter_win)
+
+        delete_btn = ttk.Button(frame, text="Delete Matching Entries", command=on_delete)
+        delete_btn.grid(row=len(fields) + 1, column=0, columnspan=2, pady=10)
+
+    def create_modify_window(self, parent_win, item_data, refresh_callback):
+        entry_id = item_data[0]
+        modify_win = tk.Toplevel(parent_win)
+        modify_win.title(f"Edit Entry ID: {entry_id}")
+        modify_win.grab_set()
+        
+        frame = ttk.Frame(modify_win, padding="15")
+        frame.pack()
+        
+        ttk.Label(frame, text="Date:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        date_var = tk.StringVar(value=item_data[1])
+        date_e = ttk.Entry(frame, textvariable=date_var, width=25)
+        date_e.grid(row=0, column=1)
+        
+        ttk.Label(frame, text="Amount (RM):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        rm_var = tk.StringVar(value=item_data[2])
+        rm_e = ttk.Entry(frame, textvariable=rm_var, width=25)
+        rm_e.grid(row=1, column=1)
+
+        ttk.Label(frame, text="Price/Litre (RM):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        price_var = tk.StringVar(value=item_data[3])
+        price_e = ttk.Entry(frame, textvariable=price_var, width=25)
+        price_e.grid(row=2, column=1)
+        
+        ttk.Label(frame, text="Distance (km):").grid(row=3, column=0, sticky=tk.W, pady=5)
+        dist_var = tk.StringVar(value=item_data[4])
+        dist_e = ttk.Entry(frame, textvariable=dist_var, width=25)
+        dist_e.grid(row=3, column=1)
+        
+        def on_update():
+            try:
+                new_date = date_var.get()
+                new_rm = float(rm_var.get())
+                new_price = float(price_var.get())
+                new_dist = float(dist_var.get())
+
+                validate_entry(new_date, new_rm, new_price, new_dist)
+            except ValueError as e:
+                messagebox.showerror("Input Error", f"Invalid data: {e}", parent=modify_win)
+                return
+
+            def on_updated(_):
+                messagebox.showinfo("Success", f"Entry ID {entry_id} updated successfully.", parent=modify_win)
+                refresh_callback()
+                modify_win.destroy()
+
+            def on_error(e):
+                update_btn.config(state=tk.NORMAL)
+                messagebox.showerror("Error", f"Failed to update database: {e}", parent=modify_win)
+
+            # Disabled until the write is done, so a double click doesn't queue it twice.
+            update_btn.config(state=tk.DISABLED)
+            self.tasks.submit(
+                update_entry_in_db, entry_id, new_date, new_rm, new_price, new_dist,
+                on_done=on_updated, on_error=on_error, owner=modify_win)
+
+        update_btn = ttk.Button(frame, text="Update Entry", command=on_update)
+        update_btn.grid(row=4, column=0, columnspan=2, pady=10)
+
+    # --- Export ---
+
+    def show_export_window(self):
+        """Asks for a date range and file, then streams the export on the export worker."""
+        vehicle_id, vehicle_name = self.selected_vehicle()
+        export_win = tk.Toplevel(self.root)
+        export_win.title("Export Entries")
+
+        frame = ttk.Frame(export_win, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(frame, text="From (YYYY-MM-DD):").grid(row=0, column=0, sticky=tk.W, pady=5)
+        start_var = tk.StringVar()
+        ttk.Entry(frame, textvariable=start_var, width=20).grid(row=0, column=1)
+
+        ttk.Label(frame, text="To (YYYY-MM-DD):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        end_var = tk.StringVar()
+        ttk.Entry(frame, textvariable=end_var, width=20).grid(row=1, column=1)
+
+        only_vehicle = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frame, text=f"Only {vehicle_name}", variable=only_vehicle).grid(
+            row=2, column=0, columnspan=2, sticky=tk.W, pady=5)
+        ttk.Label(frame, text="Leave a date empty for no limit.", foreground="grey").grid(
+            row=3, column=0, columnspan=2, sticky=tk.W)
+
+        def on_export():
+            path = filedialog.asksaveasfilename(
+                parent=export_win, defaultextension=".csv",
+                filetypes=[("CSV", "*.csv"), ("Gzipped CSV", "*.csv.gz"),
+                           ("Parquet (needs pyarrow)", "*.parquet"), ("Arrow (needs pyarrow)", "*.arrow")])
+            if not path:
+                return
+            export_btn.config(state=tk.DISABLED)
+            loading = self._loading_bar(frame)
+
+            def on_done(count):
+                export_win.destroy()
+                messagebox.showinfo("Export Complete", f"Exported {count} entries to {path}")
+
+            def on_error(e):
+                loading.destroy()
+                export_btn.config(state=tk.NORMAL)
+                messagebox.showerror("Export Failed", str(e), parent=export_win)
+
+            self.export_tasks.submit(
+                export_file, path, None, fuel_tracker.DB_FILE,
+                start_var.get().strip() or None, end_var.get().strip() or None,
+                vehicle_id if only_vehicle.get() else None,
+                on_done=on_done, on_error=on_error, owner=export_win)
+
+        export_btn = ttk.Button(frame, text="Choose File & Export", command=on_export)
+        export_btn.grid(row=4, column=0, columnspan=2, pady=10)
+
+    # --- Performance ---
+
+    PERFORMANCE_REFRESH_MS = 1000
+
+    def show_performance_window(self):
+        """Timing histograms and slow SQL from perf.recorder, refreshed while open."""
+        perf_win = tk.Toplevel(self.root)
+        perf_win.title("Performance")
+        perf_win.geometry("900x600")
+
+        frame = ttk.Frame(perf_win, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        controls = ttk.Frame(frame)
+        controls.pack(fill=tk.X)
+        recording = tk.BooleanVar(value=perf.recorder.enabled)
+        ttk.Checkbutton(controls, text="Record timings", variable=recording,
+                        command=lambda: setattr(perf.recorder, 'enabled', recording.get())).pack(side=tk.LEFT)
+        ttk.Label(controls, text="Log SQL slower than (ms):").pack(side=tk.LEFT, padx=(15, 2))
+        slow_ms = tk.StringVar(value=f"{perf.recorder.slow_sql_ms:g}")
+        slow_entry = ttk.Entry(controls, textvariable=slow_ms, width=7)
+        slow_entry.pack(side=tk.LEFT)
+
+        def set_slow_ms(_event=None):
+            try:
+                perf.recorder.slow_sql_ms = max(float(slow_ms.get()), 0.0)
+            except ValueError:
+                pass
+            slow_ms.set(f"{perf.recorder.slow_sql_ms:g}")
+
+        slow_entry.bind('<Return>', set_slow_ms)
+        slow_entry.bind('<FocusOut>', set_slow_ms)
+        ttk.Button(controls, text="Reset", command=lambda: (perf.recorder.reset(), refresh(False))).pack(side=tk.RIGHT)
+        cache_label = ttk.Label(frame, foreground="grey")
+        cache_label.pack(anchor=tk.W, pady=(5, 0))
+
+        ops_frame = ttk.LabelFrame(frame, text="Operations (ms)")
+        ops_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        op_columns = ('Operation', 'Count', 'Total', 'Mean', 'p50', 'p95', 'p99', 'Max')
+        ops = ttk.Treeview(ops_frame, columns=op_columns, show='headings', height=12)
+        for col in op_columns:
+            ops.heading(col, text=col)
+            ops.column(col, width=80, anchor=tk.E)
+        ops.column('Operation', width=220, anchor=tk.W)
+        ops.pack(fill=tk.BOTH, expand=True)
+
+        slow_frame = ttk.LabelFrame(frame, text="Slow SQL (newest first)")
+        slow_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        slow = ttk.Treeview(slow_frame, columns=('Time', 'ms', 'SQL'), show='headings', height=8)
+        slow.heading('Time', text='Time')
+        slow.heading('ms', text='ms')
+        slow.heading('SQL', text='SQL')
+        slow.column('Time', width=70, stretch=False)
+        slow.column('ms', width=70, anchor=tk.E, stretch=False)
+        slow.column('SQL', width=700, anchor=tk.W)
+        slow.pack(fill=tk.BOTH, expand=True)
+
+        def refresh(repeat=True):
+            if not perf_win.winfo_exists():
+                return
+            ops.delete(*ops.get_children())
+            for op in perf.recorder.stats():
+                ops.insert("", tk.END, values=(op.name, op.count) + tuple(
+                    f"{ms:.2f}" for ms in op[2:]))
+            slow.delete(*slow.get_children())
+            for query in reversed(perf.recorder.slow_queries):
+                when = datetime.datetime.fromtimestamp(query.when).strftime("%H:%M:%S")
+                slow.insert("", tk.END, values=(when, f"{query.ms:.1f}", query.sql))
+            cache = fuel_tracker.query_cache.stats()
+            lookups = cache.hits + cache.misses
+            cache_label.config(text=(
+                f"Query cache: {cache.hits} hits, {cache.misses} misses"
+                f" ({cache.hits / lookups:.0%} hit rate), {cache.entries} entries / {cache.rows:,} rows"
+                if lookups else "Query cache: no lookups yet"))
+            if repeat:
+                perf_win.after(self.PERFORMANCE_REFRESH_MS, refresh)
+
+        refresh()
+
+    # --- NEW DASHBOARD/CHARTING METHOD ---
+
+    @perf.timed("ui.show_dashboard_window")
+    def show_dashboard_window(self):
+        """Creates a new window and displays Matplotlib charts."""
+        vehicle_id, vehicle_name = self.selected_vehicle()
+        ready = perf.stopwatch("ui.dashboard_ready")
+        dash_win = tk.Toplevel(self.root)
+        dash_win.title(f"📊 Data Dashboard - {vehicle_name}")
+        dash_win.geometry("900x700")
+
+        frame = ttk.Frame(dash_win, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        loading = self._loading_bar(frame)
+
+        def show_charts(result):
+            version, series = result
+            loading.destroy()
+            if len(series.days) < 2:
+                dash_win.destroy()
+                messagebox.showinfo("Not Enough Data", "You need at least two entries to draw a chart.")
+                return
+            DashboardView(frame, self.tasks, vehicle_id, version, series)
+            ready()
+
+        def on_error(e):
+            dash_win.destroy()
+            if isinstance(e, ImportError):
+                messagebox.showerror("Missing Library", "Matplotlib is required for charts. Please install it:\n\npip install matplotlib")
+            else:
+                messagebox.showerror("Error", f"Failed to build dashboard: {e}")
+
+        self.tasks.submit(_load_dashboard, vehicle_id, on_done=show_charts, on_error=on_error, owner=dash_win)
+        
+
+# --- Main execution ---
+
+def main():
+    try:
+        setup_database()
+    except sqlite3.NotSupportedError as e:
+        # The packaged app has no console to print this to.
+        root_window = tk.Tk()
+        root_window.withdraw()
+        messagebox.showerror("Fuel & Expense Tracker", str(e))
+        return 1
+    root_window = tk.Tk()
+    app = FuelTrackerApp(root_window)
+    root_window.mainloop()
+    app.tasks.shutdown()
+    app.export_tasks.shutdown()
+
+if __name__ == "__main__":
+    main()
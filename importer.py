@@ -0,0 +1,213 @@
+"""Bulk import of fuel-card exports (CSV or JSON Lines) into fuel_log.
+
+Usage: python importer.py FILE [--db fuel.db] [--chunk-size 10000] [--vehicle NAME]
+
+Records need date, total_rm, price_per_litre and distance_km, and may name
+a vehicle (created if it doesn't exist yet; records without one go to
+--vehicle, or the default vehicle). Rows are written with executemany, one
+transaction per chunk; SQLite derives the metrics (generated columns).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+import rollups
+import storage
+from fuel_tracker import validate_entry
+
+FIELDS = ("date", "total_rm", "price_per_litre", "distance_km")
+DEFAULT_CHUNK_SIZE = 10000
+# Only the first few bad rows are kept in full; the rest are just counted.
+MAX_REPORTED_ERRORS = 1000
+
+RowError = namedtuple("RowError", "line message")
+ImportResult = namedtuple("ImportResult", "inserted failed errors seconds")
+
+
+# --- Readers ---
+
+def iter_csv(path):
+    """Yields (line_number, record_dict) from a CSV file with a header row."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        for line_no, values in enumerate(reader, start=2):
+            if values:
+                yield line_no, dict(zip(header, values))
+
+
+def iter_jsonl(path):
+    """Yields (line_number, record_dict) from a JSON Lines file."""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if line:
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError as e:
+                    yield line_no, e
+
+
+def iter_records(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return iter_jsonl(path)
+    return iter_csv(path)
+
+
+# --- Validation ---
+
+def parse_record(record):
+    """Returns (date, total_rm, price_per_litre, distance_km, vehicle) or raises ValueError.
+
+    vehicle is the record's vehicle name, or None if it has none.
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"not a record: {record}")
+    try:
+        date, *amounts = (record[field] for field in FIELDS)
+    except KeyError as e:
+        raise ValueError(f"missing field {e}")
+    # JSON null and booleans would otherwise become "None" and 1.0.
+    if not isinstance(date, str):
+        raise ValueError(f"date must be a string, not {date!r}")
+    for field, value in zip(FIELDS[1:], amounts):
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError(f"{field} must be a number, not {value!r}")
+    date = storage.normalize_date(date)
+    total_rm, price_per_litre, distance_km = map(float, amounts)
+    validate_entry(date, total_rm, price_per_litre, distance_km)
+    vehicle = str(record.get("vehicle") or "").strip() or None
+    return date, total_rm, price_per_litre, distance_km, vehicle
+
+
+def build_rows(chunk, vehicle_ids):
+    """Turns a list of parsed records into fuel_log insert tuples.
+
+    vehicle_ids holds the vehicle id for each record. The derived metrics
+    are generated columns, so only the inputs are written.
+    """
+    return ((r[0], r[1], r[2], r[3], vehicle_id) for r, vehicle_id in zip(chunk, vehicle_ids))
+
+
+# --- Import ---
+
+INSERT_SQL = f"""
+INSERT INTO fuel_log (date, total_rm, price_per_litre, distance_km, vehicle_id, date_day)
+VALUES (?1, ?2, ?3, ?4, ?5, {storage.DATE_DAY_SQL.format("?1")})
+"""
+
+
+def resolve_vehicle(conn, name):
+    """Returns the id of the vehicle called name, creating it if needed."""
+    conn.execute("INSERT OR IGNORE INTO vehicles (name) VALUES (?)", (name,))
+    return conn.execute("SELECT id FROM vehicles WHERE name = ?", (name,)).fetchone()[0]
+
+
+def insert_records(conn, chunk, vehicle_id, vehicle_ids):
+    """Inserts parsed records inside the caller's transaction.
+
+    Records without a vehicle go to vehicle_id; vehicle_ids caches
+    name -> id across calls and gains any vehicles created here.
+    """
+    for name in {r[4] for r in chunk} - vehicle_ids.keys() - {None}:
+        vehicle_ids[name] = resolve_vehicle(conn, name)
+    ids = [vehicle_id if r[4] is None else vehicle_ids[r[4]] for r in chunk]
+    conn.executemany(INSERT_SQL, build_rows(chunk, ids))
+
+
+def import_records(records, db_file=storage.DB_FILE, chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+                   vehicle_id=storage.DEFAULT_VEHICLE_ID):
+    """Imports (line_number, record) pairs; bad rows are reported, not fatal.
+
+    Records without a vehicle go to vehicle_id. Each chunk is committed in
+    its own transaction, so a crash mid-import keeps every chunk written
+    before it. From the second chunk on, the rollup triggers are dropped
+    and the rollups rebuilt once at the end (even if the import fails),
+    as synthetic.generate does; an import that fits in one chunk keeps
+    updating them row by row.
+    """
+    conn = storage.get_connection(db_file)
+    storage.create_schema(conn)
+    start = time.perf_counter()
+    inserted = failed = 0
+    errors = []
+    chunk = []
+    vehicle_ids = {}  # name -> id, looked up once per import
+    triggers_dropped = False
+
+    def flush():
+        nonlocal inserted, triggers_dropped
+        if inserted and not triggers_dropped:
+            rollups.drop_triggers(conn)
+            triggers_dropped = True
+        with conn:
+            insert_records(conn, chunk, vehicle_id, vehicle_ids)
+        storage.bump_data_version(db_file)
+        inserted += len(chunk)
+        chunk.clear()
+        if progress:
+            progress(inserted, failed)
+
+    try:
+        for line_no, record in records:
+            try:
+                chunk.append(parse_record(record))
+            except (ValueError, TypeError) as e:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(RowError(line_no, str(e)))
+                continue
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    finally:
+        if triggers_dropped:
+            rollups.create_rollups(conn)
+            rollups.rebuild(conn)
+            storage.bump_data_version(db_file)
+    return ImportResult(inserted, failed, errors, time.perf_counter() - start)
+
+
+def import_file(path, db_file=storage.DB_FILE, chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+                vehicle_id=storage.DEFAULT_VEHICLE_ID):
+    """Streams a CSV or JSON Lines file into fuel_log."""
+    return import_records(iter_records(path), db_file, chunk_size, progress, vehicle_id)
+
+
+def print_report(result):
+    """Prints an ImportResult; returns the exit status (1 if any row failed)."""
+    rate = result.inserted / result.seconds if result.seconds else 0
+    print(f"Imported {result.inserted} rows in {result.seconds:.2f}s ({rate:,.0f} rows/sec)")
+    if result.failed:
+        print(f"Skipped {result.failed} invalid rows:", file=sys.stderr)
+        for err in result.errors:
+            print(f"  line {err.line}: {err.message}", file=sys.stderr)
+        if result.failed > len(result.errors):
+            print(f"  ... and {result.failed - len(result.errors)} more", file=sys.stderr)
+    return 1 if result.failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import fuel entries from CSV or JSON Lines.")
+    parser.add_argument("file")
+    parser.add_argument("--db", default=storage.DB_FILE)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--vehicle", help="vehicle for records that don't name one (created if new)")
+    args = parser.parse_args(argv)
+    vehicle_id = storage.DEFAULT_VEHICLE_ID
+    if args.vehicle:
+        conn = storage.get_connection(args.db)
+        storage.create_schema(conn)
+        with conn:
+            vehicle_id = resolve_vehicle(conn, args.vehicle)
+    return print_report(import_file(args.file, args.db, args.chunk_size, vehicle_id=vehicle_id))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
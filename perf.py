@@ -0,0 +1,218 @@
+"""Opt-in performance instrumentation: per-operation timing histograms and a slow-SQL log.
+
+Nothing is recorded until `recorder.enabled` is set (the CLI's --profile,
+FUEL_TRACKER_PROFILE=1 for the GUI, or its Performance window); until then
+a timed function costs one attribute check. Operations are named
+"area.what":
+
+    db.*      data functions in fuel_tracker (cache hits included)
+    sql.*     every statement on a pooled connection, by its first keyword
+    ui.*      Tk handlers and history rows (the time the event loop was held),
+              and refreshes and windows until their data is shown
+    chart.*   dashboard series, figure construction and canvas draws
+    report.*  checksums and whole runs of the report generator (reports.py)
+
+SQL is timed around execute(): for a SELECT that is the time to the first
+row (any sort or aggregate included), not the fetch that follows; the
+enclosing db.* operation covers that. Statements slower than
+slow_sql_ms are kept in slow_queries and logged as warnings.
+"""
+import bisect
+import functools
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+
+SLOW_SQL_MS = 100
+MAX_SLOW_QUERIES = 200
+# Histogram buckets: upper bounds from 10 us to ~60 s, 10 per decade, so a
+# percentile is read to within one bucket (~26%) and capped at the maximum.
+BUCKET_BOUNDS_MS = tuple(0.01 * 10 ** (i / 10) for i in range(69))
+
+OpStats = namedtuple("OpStats", "name count total_ms mean_ms p50_ms p95_ms p99_ms max_ms")
+SlowQuery = namedtuple("SlowQuery", "when ms sql")
+
+log = logging.getLogger(__name__)
+
+_KEYWORD = re.compile(r"\s*(?:--[^\n]*\n\s*)*(\w+)")  # first word after any -- comments
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q):
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else self.max_ms, self.max_ms)
+        return self.max_ms
+
+
+class Recorder:
+    def __init__(self, slow_sql_ms=SLOW_SQL_MS, max_slow=MAX_SLOW_QUERIES):
+        self.enabled = False
+        self.slow_sql_ms = slow_sql_ms
+        self.slow_queries = deque(maxlen=max_slow)
+        self._histograms = {}  # operation name -> Histogram
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        ms = seconds * 1000
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.add(ms)
+
+    def record_sql(self, sql, seconds):
+        keyword = _KEYWORD.match(sql)
+        self.record("sql." + (keyword.group(1).lower() if keyword else "other"), seconds)
+        ms = seconds * 1000
+        if ms >= self.slow_sql_ms:
+            sql = " ".join(sql.split())
+            self.slow_queries.append(SlowQuery(time.time(), ms, sql))
+            log.warning("slow SQL (%.1f ms): %s", ms, sql)
+
+    def timed(self, name):
+        """Decorator recording each call of fn under name."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def measure(self, name):
+        """Context manager recording the time spent in its block under name."""
+        return _Timer(self, name)
+
+    def stopwatch(self, name):
+        """Starts timing now; calling the returned function records the time
+        since under name. For spans that end in a callback, like a window
+        that fills in once its query is back."""
+        start = time.perf_counter()
+
+        def stop():
+            if self.enabled:
+                self.record(name, time.perf_counter() - start)
+        return stop
+
+    def stats(self):
+        """OpStats per operation, most total time first."""
+        with self._lock:
+            items = [(name, h, h.count, h.total_ms, h.max_ms) for name, h in self._histograms.items()]
+            stats = [OpStats(name, count, total, total / count, h.percentile(0.50), h.percentile(0.95),
+                             h.percentile(0.99), high) for name, h, count, total, high in items]
+        return sorted(stats, key=lambda s: s.total_ms, reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self.slow_queries.clear()
+
+    def report(self, limit=10):
+        """Text table of stats() and the slowest recent statements."""
+        lines = [f"{'Operation':<32}{'Count':>8}{'Total ms':>11}{'Mean':>9}{'p50':>9}{'p95':>9}"
+                 f"{'p99':>9}{'Max':>9}"]
+        for s in self.stats():
+            lines.append(f"{s.name:<32}{s.count:>8}{s.total_ms:>11.1f}{s.mean_ms:>9.2f}{s.p50_ms:>9.2f}"
+                         f"{s.p95_ms:>9.2f}{s.p99_ms:>9.2f}{s.max_ms:>9.2f}")
+        if len(lines) == 1:
+            lines.append("(nothing recorded)")
+        slow = sorted(self.slow_queries, key=lambda q: q.ms, reverse=True)[:limit]
+        if slow:
+            lines.append(f"\nSQL slower than {self.slow_sql_ms:g} ms ({len(self.slow_queries)} recorded):")
+            lines += [f"{q.ms:>9.1f} ms  {q.sql[:200]}" for q in slow]
+        return "\n".join(lines)
+
+
+class _Timer:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter() if self.recorder.enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            self.recorder.record(self.name, time.perf_counter() - self.start)
+
+
+recorder = Recorder()
+recorder.enabled = os.environ.get("FUEL_TRACKER_PROFILE", "") not in ("", "0")
+timed = recorder.timed
+measure = recorder.measure
+stopwatch = recorder.stopwatch
+
+
+# --- SQL Timing ---
+# storage opens its pooled connections with TimedConnection, whose cursors
+# (including the ones behind Connection.execute) time every statement.
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        if not recorder.enabled:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            recorder.record_sql(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not recorder.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            recorder.record_sql(sql, time.perf_counter() - start)
+
+    def executescript(self, sql_script):
+        if not recorder.enabled:
+            return super().executescript(sql_script)
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            recorder.record_sql(sql_script, time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
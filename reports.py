@@ -0,0 +1,384 @@
+"""Monthly fuel reports per vehicle, rendered headless and regenerated only when their data changes.
+
+Usage: python fuel_tracker.py report -o reports/ [--vehicle NAME] [--from 2025-01] [--to 2025-12]
+                                     [--format png pdf html] [--workers N] [--force]
+
+Every (vehicle, month) with fills gets <out>/<YYYY-MM>/vehicle-<id>.png,
+.pdf and .html: the dashboard's efficiency and cost charts for the
+month's fills (charts.py, drawn with Agg, so no display is needed) over a
+table of the month's totals, and in the HTML page the chart above the
+totals and every fill. <out>/index.html links each month's index.html,
+which lists its vehicles.
+
+Each run checksums every (vehicle, month) in scope: a sum of 64-bit
+hashes of each fill's id, date and entered values, so any insert, edit or
+delete in the month changes it. It is computed with NumPy over columnar
+arrays, ~4 s per million fills. <out>/state.json records the checksum
+each report was drawn from; only reports whose checksum differs, or whose
+files are missing, are drawn again, in a process pool with one task per
+vehicle. Reports for months that no longer have fills are deleted.
+"""
+import datetime
+import html
+import json
+import os
+import time
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import charts
+import columnar
+import perf
+import series
+import storage
+
+FORMATS = ("png", "pdf", "html")
+LAYOUT_VERSION = 1  # bump when the reports' content changes, so every report is drawn again
+STATE_FILE = "state.json"
+FIGSIZE = (8, 7.5)
+CHECKSUM_FIELDS = ("id", "date_day", "total_rm", "price_per_litre", "distance_km")
+REPORT_FIELDS = ("date_day", "total_rm", "price_per_litre", "distance_km", "litres", "km_per_litre",
+                 "l_per_100km", "rm_per_km")
+
+# (label, summary key, format) for the totals table
+SUMMARY_COLUMNS = (
+    ("Fills", "count", "{:,}"),
+    ("Distance (km)", "total_distance", "{:,.1f}"),
+    ("Spent (RM)", "total_rm", "{:,.2f}"),
+    ("Litres", "total_litres", "{:,.2f}"),
+    ("km/L", "avg_km_l", "{:.2f}"),
+    ("L/100km", "avg_l_100km", "{:.2f}"),
+    ("RM/km", "avg_rm_km", "{:.3f}"),
+)
+# (label, field, format) for the fills table
+FILL_COLUMNS = (
+    ("RM", "total_rm", "{:.2f}"),
+    ("RM/L", "price_per_litre", "{:.2f}"),
+    ("km", "distance_km", "{:.1f}"),
+    ("Litres", "litres", "{:.2f}"),
+    ("km/L", "km_per_litre", "{:.2f}"),
+    ("L/100km", "l_per_100km", "{:.2f}"),
+    ("RM/km", "rm_per_km", "{:.3f}"),
+)
+
+ReportResult = namedtuple("ReportResult", "generated unchanged removed seconds")
+ReportFigure = namedtuple("ReportFigure", "fig lines title table")
+
+
+# --- Months ---
+
+def parse_month(text):
+    try:
+        return str(np.datetime64(datetime.datetime.strptime(text, "%Y-%m"), "M"))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid month '{text}', expected YYYY-MM.")
+
+
+def month_days(period):
+    """(first, last) epoch days of a YYYY-MM month."""
+    month = np.datetime64(period, "M")
+    return (int(month.astype("datetime64[D]").astype(np.int64)),
+            int((month + 1).astype("datetime64[D]").astype(np.int64)) - 1)
+
+
+# --- Checksums ---
+
+_M1, _M2 = np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB)
+
+
+def _mix(x):
+    """splitmix64's finalizer, elementwise (uint64 arithmetic wraps)."""
+    x = (x ^ (x >> np.uint64(30))) * _M1
+    x = (x ^ (x >> np.uint64(27))) * _M2
+    return x ^ (x >> np.uint64(31))
+
+
+@perf.timed("report.checksums")
+def period_checksums(db_file=storage.DB_FILE, vehicle_id=None, start=None, end=None):
+    """{(vehicle_id, 'YYYY-MM'): checksum} for every month with fills.
+
+    start / end (YYYY-MM, inclusive) and vehicle_id narrow it. A month's
+    checksum is the count and wrapping sum of per-fill hashes, which
+    doesn't depend on row order; the vehicle's name is added in
+    generate_reports, as the reports show it.
+    """
+    days = None
+    if start is not None or end is not None:
+        days = (month_days(start)[0] if start else -2 ** 31, month_days(end)[1] if end else 2 ** 31 - 1)
+    columns = columnar.load_columns(CHECKSUM_FIELDS + ("vehicle_id",), vehicle_id, db_file, days=days)
+    hashes = np.zeros(len(columns["id"]), dtype=np.uint64)
+    for field in CHECKSUM_FIELDS:
+        values = columns[field]
+        bits = values.view(np.uint64) if values.dtype == np.float64 else values.astype(np.int64).view(np.uint64)
+        hashes = _mix(hashes ^ bits)
+    months = columns["date_day"].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    keys = columns["vehicle_id"].astype(np.int64) << 32 | (months & 0xFFFFFFFF)
+    order = np.argsort(keys, kind="stable")
+    keys, hashes = keys[order], hashes[order]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1)) if len(keys) else np.array([], np.int64)
+    counts = np.diff(np.append(starts, len(keys)))
+    sums = np.add.reduceat(hashes, starts) if len(keys) else hashes
+    periods = (keys[starts] & 0xFFFFFFFF).astype(np.int32).astype("datetime64[M]").astype(str)
+    return {(int(k >> 32), p): f"{n}:{s:016x}"
+            for k, p, n, s in zip(keys[starts].tolist(), periods.tolist(), counts.tolist(), sums.tolist())}
+
+
+# --- Rendering ---
+# Runs in the pool's worker processes. Each keeps one report figure and
+# swaps every report's data into it, as the dashboard does when it rescales.
+
+_report_figure = None
+
+
+def _figure():
+    global _report_figure
+    if _report_figure is None:
+        fig = Figure(figsize=FIGSIZE, dpi=charts.DPI)
+        FigureCanvasAgg(fig)
+        empty = np.array([], dtype=np.float64)
+        lines = charts.build_dashboard(fig, series.PlotSeries(empty.astype("datetime64[D]"), empty, empty, "raw"))
+        fig.subplots_adjust(top=0.9, bottom=0.27)
+        title = fig.suptitle("", fontsize="large")
+        ax = fig.add_axes((0.08, 0.03, 0.84, 0.08))
+        ax.axis("off")
+        table = ax.table(cellText=[[""] * len(SUMMARY_COLUMNS)], colLabels=[c[0] for c in SUMMARY_COLUMNS],
+                         loc="center", cellLoc="center")
+        table.auto_set_font_size(False)  # its search for a fitting size redid the layout on every draw
+        table.set_fontsize(9)
+        _report_figure = ReportFigure(fig, lines, title, table)
+    return _report_figure
+
+
+def summarize(columns):
+    """Totals and averages of a month's fills, as fuel_tracker's summaries."""
+    total_rm, litres, distance = (float(np.nansum(columns[f])) for f in ("total_rm", "litres", "distance_km"))
+    ok = distance and litres
+    return {
+        "count": len(columns["date_day"]), "total_rm": total_rm, "total_litres": litres, "total_distance": distance,
+        "avg_km_l": distance / litres if ok else 0, "avg_l_100km": litres / distance * 100 if ok else 0,
+        "avg_rm_km": total_rm / distance if ok else 0,
+    }
+
+
+def _summary_cells(summary):
+    return [fmt.format(summary[key]) for _, key, fmt in SUMMARY_COLUMNS]
+
+
+def _html_table(header, rows):
+    head = "".join(f"<th>{html.escape(h)}</th>" for h in header)
+    body = "\n".join("<tr>" + "".join(f"<td>{html.escape(c)}</td>" for c in row) + "</tr>" for row in rows)
+    return f"<table>\n<tr>{head}</tr>\n{body}\n</table>"
+
+
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin: 1em 0; }}
+th, td {{ border: 1px solid #ccc; padding: 0.25em 0.6em; text-align: right; }}
+th {{ background: #eee; }}
+</style></head>
+<body>
+<h1>{title}</h1>
+{body}
+</body></html>
+"""
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def render_report(columns, name, period, base, formats=FORMATS):
+    """Writes one month's report for a vehicle to base + '.png' / '.pdf' / '.html'.
+
+    columns are the month's REPORT_FIELDS, ordered by date. The HTML page
+    shows the PNG chart, so html implies png.
+    """
+    summary = summarize(columns)
+    report = _figure()
+    days = columns["date_day"].astype("datetime64[D]")
+    charts.set_series(report.lines, series.downsample(days, columns["km_per_litre"], columns["rm_per_km"]),
+                      rescale=True)
+    first, last = month_days(period)
+    report.lines.ax1.set_xlim(np.datetime64(first, "D"), np.datetime64(last + 1, "D"))
+    title = f"{name} — {period}"
+    report.title.set_text(title)
+    for i, text in enumerate(_summary_cells(summary)):
+        report.table[1, i].get_text().set_text(text)
+
+    if "png" in formats or "html" in formats:
+        report.fig.savefig(base + ".png")
+    if "pdf" in formats:
+        report.fig.savefig(base + ".pdf")
+    if "html" in formats:
+        fills = [[str(day)] + [fmt.format(columns[field][i]) for _, field, fmt in FILL_COLUMNS]
+                 for i, day in enumerate(days.tolist())]
+        body = "\n".join((
+            f'<p><a href="index.html">{html.escape(period)}</a></p>',
+            f'<img src="{html.escape(os.path.basename(base))}.png" alt="Efficiency and cost charts">',
+            "<h2>Totals</h2>",
+            _html_table([c[0] for c in SUMMARY_COLUMNS], [_summary_cells(summary)]),
+            "<h2>Fills</h2>",
+            _html_table(["Date"] + [c[0] for c in FILL_COLUMNS], fills),
+        ))
+        _write(base + ".html", _PAGE.format(title=html.escape(title), body=body))
+
+
+def _render_vehicle(job):
+    """Draws the given months' reports for one vehicle. Returns the job."""
+    db_file, vehicle_id, name, periods, out_dir, formats = job
+    columns = columnar.load_columns(REPORT_FIELDS, vehicle_id, db_file, order="date_day, id",
+                                    days=(month_days(periods[0])[0], month_days(periods[-1])[1]))
+    for period in periods:
+        first, last = month_days(period)
+        lo, hi = np.searchsorted(columns["date_day"], (first, last + 1))
+        os.makedirs(os.path.join(out_dir, period), exist_ok=True)
+        render_report({f: a[lo:hi] for f, a in columns.items()}, name, period,
+                      _report_base(out_dir, period, vehicle_id), formats)
+    return job
+
+
+def _report_base(out_dir, period, vehicle_id):
+    return os.path.join(out_dir, period, f"vehicle-{vehicle_id}")
+
+
+# --- Index Pages ---
+
+def _write_month_index(out_dir, period, vehicle_ids, names, db_file):
+    conn = storage.get_connection(db_file)
+    totals = {row[0]: row[1:] for row in conn.execute("""
+    SELECT vehicle_id, count, total_rm, total_litres, total_distance FROM fuel_rollup
+    WHERE granularity = 'month' AND period = ?
+    """, (period,))}
+    rows = []
+    for vehicle_id in sorted(vehicle_ids, key=lambda v: names.get(v, "")):
+        count, total_rm, litres, distance = totals.get(vehicle_id, (0, 0.0, 0.0, 0.0))
+        link = f'<a href="vehicle-{vehicle_id}.html">{html.escape(names.get(vehicle_id, str(vehicle_id)))}</a>'
+        rows.append(f"<tr><td>{link}</td><td>{count:,}</td><td>{distance:,.1f}</td><td>{total_rm:,.2f}</td>"
+                    f"<td>{distance / litres if litres else 0:.2f}</td></tr>")
+    body = ('<p><a href="../index.html">All months</a></p>\n<table>\n<tr><th>Vehicle</th><th>Fills</th>'
+            "<th>Distance (km)</th><th>Spent (RM)</th><th>km/L</th></tr>\n" + "\n".join(rows) + "\n</table>")
+    _write(os.path.join(out_dir, period, "index.html"), _PAGE.format(title=f"Fuel reports {period}", body=body))
+
+
+def _write_index(out_dir, reports):
+    rows = "\n".join(f'<tr><td><a href="{p}/index.html">{p}</a></td><td>{len(reports[p]):,}</td></tr>'
+                     for p in sorted(reports, reverse=True))
+    body = f"<table>\n<tr><th>Month</th><th>Vehicles</th></tr>\n{rows}\n</table>"
+    _write(os.path.join(out_dir, "index.html"), _PAGE.format(title="Fuel reports", body=body))
+
+
+# --- Generation ---
+
+def _load_state(out_dir):
+    try:
+        with open(os.path.join(out_dir, STATE_FILE)) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state["reports"] if state.get("layout") == LAYOUT_VERSION else {}
+
+
+def _save_state(out_dir, reports):
+    path = os.path.join(out_dir, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"layout": LAYOUT_VERSION, "reports": reports}, f)
+    os.replace(path + ".tmp", path)
+
+
+@perf.timed("report.generate")
+def generate_reports(out_dir, db_file=storage.DB_FILE, formats=FORMATS, vehicle_id=None, start=None, end=None,
+                     workers=None, force=False, progress=None):
+    """Brings the reports in out_dir up to date. Returns a ReportResult.
+
+    vehicle_id and start / end (YYYY-MM, inclusive) limit which reports
+    are checked; the rest of out_dir is left alone. force redraws every
+    report in scope. workers is the process pool size (default: one per
+    CPU; 1 draws in this process). progress(done, total) is called as
+    each vehicle's reports are finished.
+    """
+    started = time.perf_counter()
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown report format: {unknown[0]}")
+    start, end = (parse_month(m) if m else None for m in (start, end))
+    os.makedirs(out_dir, exist_ok=True)
+
+    conn = storage.get_connection(db_file)
+    names = {row[0]: row[1] for row in conn.execute("SELECT id, name FROM vehicles")}
+    checksums = {key: f"{value}:{zlib.crc32(names.get(key[0], '').encode()):08x}"
+                 for key, value in period_checksums(db_file, vehicle_id, start, end).items()}
+    reports = _load_state(out_dir)  # {period: {vehicle id (str): checksum}}
+    extensions = {"png", *formats} if "html" in formats else set(formats)
+
+    def current(key, checksum):
+        base = _report_base(out_dir, key[1], key[0])
+        return (not force and reports.get(key[1], {}).get(str(key[0])) == checksum
+                and all(os.path.exists(f"{base}.{ext}") for ext in extensions))
+
+    stale = {}  # vehicle id -> [(period, checksum)], oldest first
+    for key, checksum in sorted(checksums.items()):
+        if not current(key, checksum):
+            stale.setdefault(key[0], []).append((key[1], checksum))
+    touched = {period for jobs in stale.values() for period, _ in jobs}
+
+    # Reports in scope whose month has no fills any more.
+    removed = 0
+    for period in list(reports):
+        if (start and period < start) or (end and period > end):
+            continue
+        for vid in list(reports[period]):
+            if (vehicle_id is None or int(vid) == vehicle_id) and (int(vid), period) not in checksums:
+                for ext in FORMATS:
+                    path = f"{_report_base(out_dir, period, vid)}.{ext}"
+                    if os.path.exists(path):
+                        os.remove(path)
+                del reports[period][vid]
+                removed += 1
+                touched.add(period)
+        if not reports[period]:
+            del reports[period]
+            index = os.path.join(out_dir, period, "index.html")
+            if os.path.exists(index):
+                os.remove(index)
+            touched.discard(period)
+
+    jobs = [(db_file, vid, names.get(vid, str(vid)), [p for p, _ in months], out_dir, tuple(formats))
+            for vid, months in stale.items()]
+    total = sum(len(job[3]) for job in jobs)
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    done = 0
+    try:
+        if workers <= 1:
+            results = map(_render_vehicle, jobs)
+            pool = None
+        else:
+            # Forked workers mustn't share this process's SQLite connection;
+            # each opens its own.
+            storage.close_connection(db_file)
+            pool = ProcessPoolExecutor(workers)
+            results = pool.map(_render_vehicle, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+        try:
+            for _, vid, _, periods, _, _ in results:
+                for period, checksum in stale[vid]:
+                    reports.setdefault(period, {})[str(vid)] = checksum
+                done += len(periods)
+                if progress:
+                    progress(done, total)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    finally:
+        # Whatever was drawn is recorded, so an interrupted run resumes.
+        _save_state(out_dir, reports)
+        for period in touched & set(reports):
+            _write_month_index(out_dir, period, [int(v) for v in reports[period]], names, db_file)
+        _write_index(out_dir, reports)
+    return ReportResult(done, len(checksums) - total, removed, time.perf_counter() - started)
@@ -0,0 +1,222 @@
+"""Running totals for fuel_log, kept up to date by triggers.
+
+fuel_rollup holds one row per (vehicle_id, granularity, period):
+    ('all', '')          overall totals
+    ('year', 'YYYY')     per-year totals
+    ('month', 'YYYY-MM') per-month totals
+for every vehicle, plus the same rows under vehicle_id 0 (FLEET) for the
+whole fleet.
+
+Because triggers maintain it, every writer (the GUI, the importer, a plain
+sqlite3 shell) keeps it in sync, and summaries become single-row reads.
+
+Usage: python rollups.py [--db fuel.db] [--repair]   # consistency check
+"""
+import argparse
+import sys
+from collections import namedtuple
+
+GRANULARITIES = ("all", "year", "month")
+TOTAL_COLUMNS = ("count", "total_rm", "total_litres", "total_distance")
+FLEET = 0  # vehicle_id of the fleet-wide rows
+
+Drift = namedtuple("Drift", "vehicle_id granularity period column stored actual")
+
+# (granularity, period expression) for a fuel_log row referenced as {ref}
+_PERIODS = (
+    ("'all'", "''"),
+    ("'year'", "substr({ref}.date, 1, 4)"),
+    ("'month'", "substr({ref}.date, 1, 7)"),
+)
+
+
+def _apply_sql(ref, sign):
+    """Upserts {ref}'s contribution (sign +1 adds, -1 removes) into every period,
+    for both its vehicle and the fleet."""
+    values = ",\n        ".join(
+        f"({vehicle}, {g}, {p.format(ref=ref)}, {sign}, {sign} * {ref}.total_rm, "
+        f"{sign} * {ref}.litres, {sign} * {ref}.distance_km)"
+        for vehicle in (FLEET, f"{ref}.vehicle_id")
+        for g, p in _PERIODS
+    )
+    return f"""
+    INSERT INTO fuel_rollup (vehicle_id, granularity, period, count, total_rm, total_litres, total_distance)
+    VALUES
+        {values}
+    ON CONFLICT (vehicle_id, granularity, period) DO UPDATE SET
+        count = count + excluded.count,
+        total_rm = total_rm + excluded.total_rm,
+        total_litres = total_litres + excluded.total_litres,
+        total_distance = total_distance + excluded.total_distance;
+    """
+
+
+def _prune_sql(ref):
+    """Deletes the rows {ref} was just removed from if they are now empty.
+
+    One primary-key lookup per row, rather than a scan for count <= 0 over
+    the whole table on every delete. The fleet's overall row always stays;
+    once empty it is reset to exact zeros, so float residue from many
+    adds and subtracts doesn't linger as phantom totals.
+    """
+    deletes = "\n    ".join(
+        f"DELETE FROM fuel_rollup WHERE vehicle_id = {vehicle} AND granularity = {g} "
+        f"AND period = {p.format(ref=ref)} AND count <= 0;"
+        for vehicle in (FLEET, f"{ref}.vehicle_id")
+        for g, p in _PERIODS
+        if (vehicle, g) != (FLEET, "'all'")
+    )
+    return f"""
+    {deletes}
+    UPDATE fuel_rollup SET count = 0, total_rm = 0, total_litres = 0, total_distance = 0
+    WHERE vehicle_id = {FLEET} AND granularity = 'all' AND period = '' AND count <= 0;
+    """
+
+
+# An infinite amount would make the totals inf, and removing it again
+# inf - inf = NaN, which the NOT NULL totals refuse: every later delete of
+# the row would fail. NaN itself is stored as NULL and refused by fuel_log.
+# So rows whose amounts (or litres) aren't finite are rejected up front.
+_NOT_FINITE = " OR ".join(
+    f"abs({expr}) >= 9e999"  # 9e999 is SQLite's literal for infinity
+    for expr in ("NEW.total_rm", "NEW.price_per_litre", "NEW.distance_km", "NEW.total_rm / NEW.price_per_litre"))
+
+
+def drop_triggers(conn):
+    """Removes the rollup triggers, so create_rollups installs the current ones."""
+    conn.executescript("""
+    DROP TRIGGER IF EXISTS fuel_log_finite_insert;
+    DROP TRIGGER IF EXISTS fuel_log_finite_update;
+    DROP TRIGGER IF EXISTS fuel_log_rollup_insert;
+    DROP TRIGGER IF EXISTS fuel_log_rollup_delete;
+    DROP TRIGGER IF EXISTS fuel_log_rollup_update;
+    """)
+
+
+def drop_rollups(conn):
+    """Removes the rollup table and its triggers (before recreating a new shape)."""
+    drop_triggers(conn)
+    conn.executescript("DROP TABLE IF EXISTS fuel_rollup;")
+
+
+def create_rollups(conn):
+    """Creates the rollup table and triggers, building it from fuel_log if new.
+
+    Two more triggers reject non-finite amounts before they reach the totals.
+    """
+    conn.executescript(f"""
+    CREATE TABLE IF NOT EXISTS fuel_rollup (
+        vehicle_id INTEGER NOT NULL,
+        granularity TEXT NOT NULL,
+        period TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        total_rm REAL NOT NULL,
+        total_litres REAL NOT NULL,
+        total_distance REAL NOT NULL,
+        PRIMARY KEY (vehicle_id, granularity, period)
+    ) WITHOUT ROWID;
+
+    CREATE TRIGGER IF NOT EXISTS fuel_log_finite_insert BEFORE INSERT ON fuel_log
+    WHEN {_NOT_FINITE} BEGIN
+        SELECT RAISE(ABORT, 'fuel_log amounts must be finite numbers');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS fuel_log_finite_update
+    BEFORE UPDATE OF total_rm, price_per_litre, distance_km ON fuel_log
+    WHEN {_NOT_FINITE} BEGIN
+        SELECT RAISE(ABORT, 'fuel_log amounts must be finite numbers');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS fuel_log_rollup_insert AFTER INSERT ON fuel_log BEGIN
+        {_apply_sql("NEW", 1)}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS fuel_log_rollup_delete AFTER DELETE ON fuel_log BEGIN
+        {_apply_sql("OLD", -1)}
+        {_prune_sql("OLD")}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS fuel_log_rollup_update
+    AFTER UPDATE OF date, total_rm, price_per_litre, distance_km, vehicle_id ON fuel_log BEGIN
+        {_apply_sql("OLD", -1)}
+        {_apply_sql("NEW", 1)}
+        {_prune_sql("OLD")}
+    END;
+    """)
+    if conn.execute(f"SELECT 1 FROM fuel_rollup WHERE vehicle_id = {FLEET} AND granularity = 'all'").fetchone() is None:
+        rebuild(conn)
+
+
+def _aggregate_sql(vehicle_expr, granularity, period_expr):
+    group = [] if vehicle_expr == str(FLEET) else ["1"]
+    if granularity != "all":
+        group.append("3")
+    return f"""
+    SELECT {vehicle_expr}, '{granularity}', {period_expr}, COUNT(*), COALESCE(SUM(total_rm), 0),
+           COALESCE(SUM(litres), 0), COALESCE(SUM(distance_km), 0)
+    FROM fuel_log
+    """ + (f"GROUP BY {', '.join(group)}" if group else "")
+
+
+_AGGREGATES = tuple(
+    _aggregate_sql(vehicle, granularity, period)
+    for vehicle in (str(FLEET), "vehicle_id")
+    for granularity, period in (("all", "''"), ("year", "substr(date, 1, 4)"), ("month", "substr(date, 1, 7)"))
+)
+
+
+def rebuild(conn):
+    """Recomputes every rollup row from fuel_log with a full scan."""
+    with conn:
+        conn.execute("DELETE FROM fuel_rollup")
+        for sql in _AGGREGATES:
+            conn.execute("INSERT INTO fuel_rollup " + sql)
+
+
+def check(conn, repair=False, rel_tol=1e-9):
+    """Compares stored rollups against a fresh aggregate of fuel_log.
+
+    Returns a list of Drift tuples (empty when consistent). With repair=True
+    the rollups are rebuilt after any drift is found.
+    """
+    stored = {tuple(r[:3]): tuple(r[3:]) for r in conn.execute("SELECT * FROM fuel_rollup")}
+    actual = {}
+    for sql in _AGGREGATES:
+        for r in conn.execute(sql):
+            actual[tuple(r[:3])] = tuple(r[3:])
+
+    drift = []
+    for key in sorted(set(stored) | set(actual)):
+        s = stored.get(key, (0, 0.0, 0.0, 0.0))
+        a = actual.get(key, (0, 0.0, 0.0, 0.0))
+        for col, sv, av in zip(TOTAL_COLUMNS, s, a):
+            if abs(sv - av) > rel_tol * max(abs(sv), abs(av), 1.0):
+                drift.append(Drift(*key, col, sv, av))
+    if drift and repair:
+        rebuild(conn)
+    return drift
+
+
+def main(argv=None):
+    import storage
+
+    parser = argparse.ArgumentParser(description="Check fuel_rollup against fuel_log.")
+    parser.add_argument("--db", default=storage.DB_FILE)
+    parser.add_argument("--repair", action="store_true", help="rebuild the rollups if they drifted")
+    args = parser.parse_args(argv)
+
+    conn = storage.get_connection(args.db)
+    storage.create_schema(conn)
+    drift = check(conn, repair=args.repair)
+    for d in drift:
+        print(f"vehicle {d.vehicle_id:<5} {d.granularity:<5} {d.period or '-':<8} {d.column:<15} "
+              f"stored={d.stored} actual={d.actual}")
+    if not drift:
+        print("Rollups are consistent.")
+    elif args.repair:
+        print(f"{len(drift)} drifted values; rollups rebuilt.")
+    return 1 if drift and not args.repair else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Downsampled time series for the dashboard.
+
+Plotting every fill of a multi-year fleet log is slow to draw and to pan,
+and wastes points that land on the same pixel. SeriesCache keeps the raw
+plot columns from columnar.load_plot_columns (reloaded only when the data
+version changes) and reduces the visible range to at most max_points per
+line, by averaging into day/week/month buckets or, if even monthly buckets
+are too many, with LTTB (Largest-Triangle-Three-Buckets).
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+MAX_POINTS = 1000
+
+# Bucket resolutions, finest first.
+BUCKETS = ("day", "week", "month")
+
+# days: datetime64[D] array of x values; km_l / rm_km: float64 arrays
+PlotSeries = namedtuple("PlotSeries", "days km_l rm_km resolution")
+
+
+def choose_resolution(days, max_points=MAX_POINTS):
+    """Finest resolution that leaves at most max_points points. days sorted."""
+    if len(days) <= max_points:
+        return "raw"
+    for name in BUCKETS:
+        keys = _bucket_keys(days, name)
+        if 1 + np.count_nonzero(np.diff(keys)) <= max_points:
+            return name
+    return "lttb"
+
+
+def _bucket_keys(days, resolution):
+    if resolution == "day":
+        return days
+    if resolution == "week":
+        return (days + 3) // 7  # 1970-01-01 was a Thursday; weeks start Monday
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def bucket_mean(days, values, resolution):
+    """Averages values per bucket. days must be sorted ascending.
+
+    Returns (bucket_days, means), each bucket placed at its first day.
+    """
+    if len(days) == 0:
+        return days, values
+    keys = _bucket_keys(days, resolution)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    counts = np.diff(np.append(starts, len(days)))
+    means = [np.add.reduceat(v, starts) / counts for v in values]
+    return days[starts], means
+
+
+def lttb_indices(x, y, n_out):
+    """Indices of the points LTTB keeps when reducing (x, y) to n_out points."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        # Average of the next bucket is the third triangle corner.
+        cx, cy = x[hi:nxt_hi].mean(), y[hi:nxt_hi].mean()
+        ax_, ay = x[prev], y[prev]
+        area = np.abs((ax_ - cx) * (y[lo:hi] - ay) - (ax_ - x[lo:hi]) * (cy - ay))
+        prev = lo + int(area.argmax())
+        keep[i + 1] = prev
+    return keep
+
+
+def downsample(days, km_l, rm_km, lo=None, hi=None, max_points=MAX_POINTS):
+    """Cuts the arrays to [lo, hi] (epoch days, inclusive) and downsamples them."""
+    start = 0 if lo is None else np.searchsorted(days, lo, side="left")
+    stop = len(days) if hi is None else np.searchsorted(days, hi, side="right")
+    days, km_l, rm_km = days[start:stop], km_l[start:stop], rm_km[start:stop]
+
+    resolution = choose_resolution(days, max_points)
+    if resolution == "lttb":
+        # Monthly means first, then LTTB on those; both lines share the
+        # efficiency line's picks so their x values stay aligned.
+        days, (km_l, rm_km) = bucket_mean(days, (km_l, rm_km), "month")
+        keep = lttb_indices(days.astype(np.float64), km_l, max_points)
+        days, km_l, rm_km = days[keep], km_l[keep], rm_km[keep]
+    elif resolution != "raw":
+        days, (km_l, rm_km) = bucket_mean(days, (km_l, rm_km), resolution)
+    return PlotSeries(days.astype("datetime64[D]"), km_l, rm_km, resolution)
+
+
+class SeriesCache:
+    """Memoizes reduced series per (data version, range, max_points).
+
+    loader() must return (days, km_per_litre, rm_per_km) arrays ordered by
+    day, e.g. columnar.load_plot_columns; it's called again only when the
+    version passed in changes.
+    """
+
+    def __init__(self, loader, maxsize=16):
+        self.loader = loader
+        self.maxsize = maxsize
+        self._version = None
+        self._arrays = None
+        self._reduced = OrderedDict()
+        self._lock = threading.Lock()
+
+    def arrays(self, version):
+        with self._lock:
+            if version != self._version:
+                self._arrays = self.loader()
+                self._version = version
+                self._reduced.clear()
+            return self._arrays
+
+    def series(self, version, lo=None, hi=None, max_points=MAX_POINTS):
+        days, km_l, rm_km = self.arrays(version)
+        key = (version, lo, hi, max_points)
+        with self._lock:
+            if key in self._reduced:
+                self._reduced.move_to_end(key)
+                return self._reduced[key]
+        result = downsample(days, km_l, rm_km, lo, hi, max_points)
+        with self._lock:
+            if version == self._version:
+                self._reduced[key] = result
+                while len(self._reduced) > self.maxsize:
+                    self._reduced.popitem(last=False)
+        return result
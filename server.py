@@ -0,0 +1,436 @@
+"""Local HTTP/JSON ingestion service for fuel-card terminals and telematics.
+
+Usage: python server.py [--db fuel.db] [--host 127.0.0.1] [--port 8095]
+
+Endpoints (all JSON):
+
+    POST /fills                 one record, or a list of records
+    GET  /summary[?vehicle=]    overall totals and averages
+    GET  /stats[?by=month|year&vehicle=]
+    GET  /plot[?vehicle=&from=&to=&points=]   downsampled efficiency/cost series
+    GET  /vehicles
+    GET  /health                queue depth, writer and query cache counters
+
+Records use the import fields (date, total_rm, price_per_litre,
+distance_km, optional vehicle) and the rules of validate_entry; a request
+with any invalid record is rejected as a whole with the reasons per index.
+Valid records go to an in-memory queue that a single writer thread commits
+in one transaction once FLUSH_ROWS records are waiting or the oldest has
+waited FLUSH_INTERVAL seconds. POST /fills answers once its records are committed.
+If that transaction fails, its requests are retried one by one, so only the
+request at fault gets the error: 400 if the database refused its records
+(a constraint or trigger), 500 for anything else.
+When more than MAX_PENDING records are waiting, new fills get 503 with
+Retry-After instead of growing the queue.
+
+Standard library only (asyncio streams); HTTP/1.1 with keep-alive.
+"""
+import argparse
+import asyncio
+import datetime
+import http
+import json
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import fuel_tracker
+import importer
+import storage
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8095
+FLUSH_ROWS = 1000
+FLUSH_INTERVAL = 0.005  # seconds; longer only adds latency on localhost
+MAX_PENDING = 50000  # records queued or being written
+MAX_BATCH = 10000  # records per request
+MAX_BODY = 8 * 2**20
+RETRY_AFTER = 1  # seconds, sent with 503
+SERIES_CACHE_VEHICLES = 8
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, payload=None, headers=()):
+        super().__init__(message)
+        self.status = status
+        self.payload = payload or {"error": message}
+        self.headers = tuple(headers)
+
+
+# --- Write batching ---
+
+class BatchWriter:
+    """Groups queued records into one transaction per flush, on one thread.
+
+    submit() is called on the event loop and resolves to the number of
+    records written once their transaction commits (or raises what the
+    write raised). run() is the flushing task.
+    """
+
+    def __init__(self, db_file, flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING,
+                 vehicle_id=storage.DEFAULT_VEHICLE_ID):
+        self.db_file = db_file
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.vehicle_id = vehicle_id
+        self.batches = self.rows_written = 0
+        self._items = []  # (records, future, queued at) waiting for the next flush
+        self._queued = 0  # records in _items
+        self._writing = 0  # records in the transaction being written
+        self._arrived = asyncio.Event()
+        self._full = asyncio.Event()
+        self._vehicle_ids = {}  # writer thread only
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fuel-writer")
+
+    @property
+    def pending(self):
+        return self._queued + self._writing
+
+    async def submit(self, records):
+        if self.pending + len(records) > self.max_pending:
+            raise HTTPError(503, "Too many fills waiting to be written; retry shortly.",
+                            headers=[("Retry-After", str(RETRY_AFTER))])
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append((records, future, loop.time()))
+        self._queued += len(records)
+        self._arrived.set()
+        if self._queued >= self.flush_rows:
+            self._full.set()
+        return await future
+
+    async def run(self):
+        while True:
+            await self._arrived.wait()
+            linger = self._items[0][2] + self.flush_interval - asyncio.get_running_loop().time()
+            if self._queued < self.flush_rows and linger > 0:
+                try:
+                    await asyncio.wait_for(self._full.wait(), linger)
+                except asyncio.TimeoutError:
+                    pass
+            await self.flush()
+
+    async def flush(self):
+        """Writes queued requests, oldest first, in one transaction of about
+        flush_rows records (a request's records are never split)."""
+        take = rows = 0
+        while take < len(self._items) and rows < self.flush_rows:
+            rows += len(self._items[take][0])
+            take += 1
+        items, self._items = self._items[:take], self._items[take:]
+        self._writing, self._queued = rows, self._queued - rows
+        if not self._items:
+            self._arrived.clear()
+        if self._queued < self.flush_rows:
+            self._full.clear()
+        if not items:
+            return
+        # Shielded so a shutdown that cancels flush still lets a started
+        # write finish and answer its requests.
+        write = asyncio.ensure_future(self._write_groups(items))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            await asyncio.wait([write])
+            raise
+        finally:
+            self._writing = 0
+            # Only if the write itself was cancelled: these requests can't
+            # know whether their fills were committed.
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(HTTPError(503, "The server stopped while writing these fills; "
+                                                        "check before sending them again."))
+
+    async def _write_groups(self, items):
+        """Commits the items' records in one transaction. If that fails, each
+        request is retried in its own, so one client's bad records can't fail
+        the others' fills."""
+        loop = asyncio.get_running_loop()
+        groups = [items]
+        while groups:
+            group = groups.pop(0)
+            records = [r for batch, _, _ in group for r in batch]
+            try:
+                await loop.run_in_executor(self._executor, self._write, records)
+            except Exception as e:
+                if len(group) > 1:
+                    groups += [[item] for item in group]
+                    continue
+                future = group[0][1]
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self.batches += 1
+                self.rows_written += len(records)
+                for batch, future, _ in group:
+                    if not future.done():
+                        future.set_result(len(batch))
+
+    def _write(self, records):
+        conn = storage.get_connection(self.db_file)
+        try:
+            with conn:
+                importer.insert_records(conn, records, self.vehicle_id, self._vehicle_ids)
+        except sqlite3.Error:
+            self._vehicle_ids.clear()  # ids created in the rolled-back transaction are gone
+            raise
+        storage.bump_data_version(self.db_file)
+
+    async def close(self):
+        while self._items:
+            await self.flush()
+        self._executor.shutdown()
+
+
+# --- Request handlers ---
+
+def _one(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+def _vehicle_id(query):
+    name = _one(query, "vehicle")
+    if not name:
+        return None
+    try:
+        return fuel_tracker.get_vehicle_id(name)
+    except ValueError as e:
+        raise HTTPError(404, str(e))
+
+
+def _epoch_day(text):
+    try:
+        return datetime.date.fromisoformat(storage.normalize_date(text)).toordinal() - fuel_tracker.EPOCH_ORDINAL
+    except ValueError:
+        raise HTTPError(400, f"Invalid date '{text}', expected YYYY-MM-DD.")
+
+
+class FuelServer:
+    """Routes requests; reads run on the default executor, writes on the BatchWriter."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.routes = {
+            ("POST", "/fills"): self.post_fills,
+            ("GET", "/summary"): self.get_summary,
+            ("GET", "/stats"): self.get_stats,
+            ("GET", "/plot"): self.get_plot,
+            ("GET", "/vehicles"): self.get_vehicles,
+            ("GET", "/health"): self.get_health,
+        }
+        self._series_caches = OrderedDict()  # vehicle_id -> SeriesCache
+        self._series_lock = threading.Lock()
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                raise HTTPError(405, f"{method} not allowed on {url.path}")
+            raise HTTPError(404, f"No such endpoint: {url.path}")
+        return await handler(parse_qs(url.query), body)
+
+    @staticmethod
+    async def _read(fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def post_fills(self, query, body):
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise HTTPError(400, "The body must be a JSON record or a list of records.")
+        records = payload if isinstance(payload, list) else [payload]
+        if not records:
+            raise HTTPError(400, "No records given.")
+        if len(records) > MAX_BATCH:
+            raise HTTPError(413, f"At most {MAX_BATCH} records per request.")
+        parsed, errors = [], []
+        for index, record in enumerate(records):
+            try:
+                parsed.append(importer.parse_record(record))
+            except (ValueError, TypeError) as e:
+                errors.append({"index": index, "error": str(e)})
+        if errors:
+            raise HTTPError(400, "Invalid records.", {"error": "Invalid records.", "invalid": errors})
+        return 201, {"inserted": await self.writer.submit(parsed)}
+
+    async def get_summary(self, query, body):
+        vehicle_id = await self._read(_vehicle_id, query)
+        return 200, await self._read(fuel_tracker.get_summary, vehicle_id)
+
+    async def get_stats(self, query, body):
+        granularity = _one(query, "by", "month")
+        if granularity not in ("month", "year"):
+            raise HTTPError(400, f"Unknown granularity: {granularity}")
+        vehicle_id = await self._read(_vehicle_id, query)
+        periods = await self._read(fuel_tracker.get_period_summaries, granularity, vehicle_id)
+        return 200, [dict(summary, period=period) for period, summary in periods]
+
+    async def get_vehicles(self, query, body):
+        return 200, [dict(v) for v in await self._read(fuel_tracker.get_vehicles)]
+
+    async def get_health(self, query, body):
+        w = self.writer
+        return 200, {"pending": w.pending, "batches": w.batches, "rows_written": w.rows_written,
+                     "query_cache": fuel_tracker.query_cache.stats()._asdict()}
+
+    def _series(self, vehicle_id, lo, hi, max_points):
+        from columnar import load_plot_columns
+        from series import SeriesCache
+
+        with self._series_lock:
+            cache = self._series_caches.get(vehicle_id)
+            if cache is None:
+                cache = self._series_caches[vehicle_id] = SeriesCache(
+                    lambda: load_plot_columns(vehicle_id, fuel_tracker.DB_FILE))
+                while len(self._series_caches) > SERIES_CACHE_VEHICLES:
+                    self._series_caches.popitem(last=False)
+            self._series_caches.move_to_end(vehicle_id)
+        return cache.series(storage.data_version(fuel_tracker.DB_FILE), lo, hi, max_points)
+
+    async def get_plot(self, query, body):
+        from series import MAX_POINTS
+
+        lo, hi = (_one(query, name) for name in ("from", "to"))
+        lo = None if lo is None else _epoch_day(lo)
+        hi = None if hi is None else _epoch_day(hi)
+        try:
+            max_points = int(_one(query, "points", MAX_POINTS))
+        except ValueError:
+            raise HTTPError(400, "points must be a whole number.")
+        if max_points < 3:
+            raise HTTPError(400, "points must be at least 3.")
+        vehicle_id = await self._read(_vehicle_id, query)
+        s = await self._read(self._series, vehicle_id, lo, hi, max_points)
+        return 200, {
+            "resolution": s.resolution,
+            "date": s.days.astype(str).tolist(),
+            "km_per_litre": s.km_l.tolist(),
+            "rm_per_km": s.rm_km.tolist(),
+        }
+
+
+# --- HTTP ---
+
+async def _read_request(reader):
+    """Returns (method, target, version, headers, body), or None at EOF."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line.")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400, "Bad Content-Length.")
+    if length > MAX_BODY:
+        raise HTTPError(413, f"Request bodies are limited to {MAX_BODY} bytes.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, version, headers, body
+
+
+def _response(status, payload, headers=(), close=False):
+    body = json.dumps(payload).encode()
+    head = [f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}"]
+    head += [f"{name}: {value}" for name, value in headers]
+    if close:
+        head.append("Connection: close")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def handle_connection(server, reader, writer):
+    try:
+        while True:
+            close = True
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                connection = headers.get("connection", "").lower()
+                close = connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive")
+                status, payload = await server.dispatch(method, target, body)
+                response = _response(status, payload, close=close)
+            except HTTPError as e:
+                response = _response(e.status, e.payload, e.headers, close)
+            except (ValueError, sqlite3.IntegrityError) as e:
+                # An IntegrityError here was raised by this request's own records.
+                response = _response(400, {"error": str(e)}, close=close)
+            except sqlite3.Error as e:
+                response = _response(500, {"error": str(e)}, close=True)
+                close = True
+            writer.write(response)
+            await writer.drain()
+            if close:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, db_file=None, flush_rows=FLUSH_ROWS,
+                flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING, ready=None):
+    """Runs the service until cancelled; queued fills are written before it returns.
+
+    ready(port) is called once the socket is listening.
+    """
+    if db_file is not None:
+        fuel_tracker.DB_FILE = db_file
+    fuel_tracker.setup_database()
+    batch_writer = BatchWriter(fuel_tracker.DB_FILE, flush_rows, flush_interval, max_pending)
+    server = FuelServer(batch_writer)
+    listener = await asyncio.start_server(lambda r, w: handle_connection(server, r, w), host, port)
+    flusher = asyncio.create_task(batch_writer.run())
+    if ready:
+        ready(listener.sockets[0].getsockname()[1])
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        flusher.cancel()
+        await asyncio.wait([flusher])  # its flush answers the requests it took
+        await batch_writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accept fuel fills over HTTP/JSON.")
+    parser.add_argument("--db", default=storage.DB_FILE)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--flush-rows", type=int, default=FLUSH_ROWS, help="records per transaction")
+    parser.add_argument("--flush-ms", type=float, default=FLUSH_INTERVAL * 1000,
+                        help="longest a record waits for its transaction")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING, help="queued records before 503")
+    args = parser.parse_args(argv)
+
+    def ready(port):
+        print(f"Listening on http://{args.host}:{port}", flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.flush_rows, args.flush_ms / 1000,
+                          args.max_pending, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+import sqlite3
+import threading
+import atexit
+import datetime
+
+import perf
+import rollups
+
+# --- Connection Layer ---
+# One long-lived connection per (thread, database file). Opening a connection
+# and running the journal setup on every call was the main cost of each data
+# function, so everything shares these instead.
+
+DB_FILE = "fuel.db"
+
+# Cached prepared statements per connection (sqlite3 keeps an LRU of them).
+STATEMENT_CACHE_SIZE = 128
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",      # readers don't block the writer
+    "PRAGMA synchronous = NORMAL",    # fsync on checkpoint, not every commit
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",     # ~16 MB page cache
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA foreign_keys = ON",
+)
+
+_local = threading.local()
+_all_connections = []
+_lock = threading.Lock()
+
+
+def _open(db_file):
+    # TimedConnection feeds perf's SQL timings and slow log when profiling is on.
+    conn = sqlite3.connect(db_file, cached_statements=STATEMENT_CACHE_SIZE, factory=perf.TimedConnection)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_connection(db_file=DB_FILE):
+    """Returns the shared connection for this thread, opening it on first use."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_file)
+    if conn is None:
+        conn = conns[db_file] = _open(db_file)
+        getattr(_local, "pragma_versions", {}).pop(db_file, None)
+        with _lock:
+            _all_connections.append(conn)
+    return conn
+
+
+def close_connection(db_file=DB_FILE):
+    """Closes this thread's connection to db_file, if one is open."""
+    conns = getattr(_local, "conns", {})
+    conn = conns.pop(db_file, None)
+    if conn is not None:
+        with _lock:
+            if conn in _all_connections:
+                _all_connections.remove(conn)
+        conn.close()
+
+
+def close_all():
+    """Closes every pooled connection (checkpoints the WAL back into the db)."""
+    with _lock:
+        conns = list(_all_connections)
+        _all_connections.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            # Owned by another thread; SQLite cleans it up at process exit.
+            pass
+    _local.conns = {}
+
+
+atexit.register(close_all)
+
+
+# --- Data Version ---
+# Caches key their results on data_version(). Our own writers call
+# bump_data_version() after committing; PRAGMA data_version catches commits
+# made through any other connection (another thread or process).
+
+_write_counters = {}
+
+
+def bump_data_version(db_file=DB_FILE):
+    with _lock:
+        _write_counters[db_file] = _write_counters.get(db_file, 0) + 1
+
+
+def data_version(db_file=DB_FILE):
+    """Returns a number that increases whenever fuel_log may have changed.
+
+    One counter per file for the whole process, so caches shared between
+    threads agree on it. PRAGMA data_version is per connection: when this
+    thread's value differs from the last one it saw (or it hasn't looked
+    yet), something else may have committed, and the counter is bumped.
+    """
+    conn = get_connection(db_file)
+    pragma = conn.execute("PRAGMA data_version").fetchone()[0]
+    seen = _local.__dict__.setdefault("pragma_versions", {})
+    if seen.get(db_file) != (id(conn), pragma):
+        seen[db_file] = (id(conn), pragma)
+        bump_data_version(db_file)
+    return _write_counters.get(db_file, 0)
+
+
+# --- Schema & Migrations ---
+# PRAGMA user_version records which migrations a database file has had.
+# Each step runs once, in order, so old fuel.db files are upgraded in place.
+
+SCHEMA_VERSION = 6
+
+# Generated columns (v5) need SQLite 3.31 and RETURNING (add_entry_to_db,
+# delete_entries_where) 3.35. Python ships its own SQLite on Windows and
+# macOS; on Linux it is the system library.
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+# Days since 1970-01-01 for an ISO date; NULL for dates SQLite can't parse.
+# Format with the date expression, e.g. DATE_DAY_SQL.format("?").
+DATE_DAY_SQL = "CAST(julianday(date({})) - 2440587.5 AS INTEGER)"
+
+
+def normalize_date(text):
+    """Returns text as a zero-padded ISO date ('2025-10-8' -> '2025-10-08').
+
+    Anything that isn't a Y-M-D date is returned unchanged (stripped).
+    """
+    text = text.strip()
+    # Most dates already are ISO; fromisoformat checks those ~10x faster than strptime.
+    if len(text) == 10 and text[4] == text[7] == "-":
+        try:
+            datetime.date.fromisoformat(text)
+            return text
+        except ValueError:
+            pass
+    try:
+        return datetime.datetime.strptime(text, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        return text
+
+
+def _migrate_v1(conn):
+    """Base fuel_log table."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS fuel_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,
+        total_rm REAL NOT NULL,
+        price_per_litre REAL NOT NULL,
+        distance_km REAL NOT NULL,
+        litres REAL NOT NULL,
+        km_per_litre REAL NOT NULL,
+        l_per_100km REAL NOT NULL,
+        rm_per_km REAL NOT NULL
+    )
+    """)
+    conn.commit()
+
+
+def _migrate_v2(conn):
+    """Integer date_day column with indexes for the history and plot orderings.
+
+    date_day is a plain column rather than a generated one because SQLite
+    won't treat an index on a generated column as covering. Our writers
+    fill it in their INSERT/UPDATE; the triggers only fire for writers
+    that don't (e.g. a sqlite3 shell).
+    """
+    if "date_day" not in _columns(conn, "fuel_log"):
+        conn.execute("ALTER TABLE fuel_log ADD COLUMN date_day INTEGER")
+    # Older versions stored dates as typed, e.g. '2025-10-8', which SQLite's
+    # date functions reject. Rewrite those to ISO so they get a date_day.
+    fixes = []
+    for row_id, date in conn.execute("SELECT id, date FROM fuel_log"):
+        normalized = normalize_date(date)
+        if normalized != date:
+            fixes.append((normalized, row_id))
+    with conn:
+        conn.executemany("UPDATE fuel_log SET date = ? WHERE id = ?", fixes)
+        conn.execute(f"UPDATE fuel_log SET date_day = {DATE_DAY_SQL.format('date')}")
+    conn.executescript(";".join(_DATE_DAY_TRIGGERS) + """;
+    -- History: ORDER BY date_day DESC, id DESC walks this backwards.
+    CREATE INDEX IF NOT EXISTS idx_fuel_log_date_day ON fuel_log (date_day, id);
+    -- Plot: covering index, the query never touches the table.
+    CREATE INDEX IF NOT EXISTS idx_fuel_log_plot ON fuel_log (date_day, km_per_litre, rm_per_km);
+    """)
+
+
+_DATE_DAY_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fuel_log_date_day_insert AFTER INSERT ON fuel_log
+    WHEN NEW.date_day IS NOT {DATE_DAY_SQL.format("NEW.date")} BEGIN
+        UPDATE fuel_log SET date_day = {DATE_DAY_SQL.format("NEW.date")} WHERE id = NEW.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fuel_log_date_day_update AFTER UPDATE OF date, date_day ON fuel_log
+    WHEN NEW.date_day IS NOT {DATE_DAY_SQL.format("NEW.date")} BEGIN
+        UPDATE fuel_log SET date_day = {DATE_DAY_SQL.format("NEW.date")} WHERE id = NEW.id;
+    END
+    """,
+)
+
+
+DEFAULT_VEHICLE_ID = 1
+
+
+def _migrate_v3(conn):
+    """Vehicles table, fuel_log.vehicle_id and per-vehicle indexes and rollups.
+
+    Existing entries (and writers that don't name a vehicle) belong to
+    vehicle 1. Rollups are rebuilt with a vehicle dimension; files from
+    before this version may carry the older fleet-only shape.
+    """
+    conn.executescript(f"""
+    CREATE TABLE IF NOT EXISTS vehicles (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );
+    INSERT OR IGNORE INTO vehicles (id, name) VALUES ({DEFAULT_VEHICLE_ID}, 'My Vehicle');
+    """)
+    if "vehicle_id" not in _columns(conn, "fuel_log"):
+        # SQLite only allows a non-NULL default on a REFERENCES column
+        # added while foreign keys are off.
+        conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute(f"""
+        ALTER TABLE fuel_log ADD COLUMN vehicle_id INTEGER NOT NULL
+        DEFAULT {DEFAULT_VEHICLE_ID} REFERENCES vehicles (id)
+        """)
+        conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript("""
+    -- Per-vehicle history and plot queries are range scans on these.
+    CREATE INDEX IF NOT EXISTS idx_fuel_log_vehicle_date_day ON fuel_log (vehicle_id, date_day, id);
+    CREATE INDEX IF NOT EXISTS idx_fuel_log_vehicle_plot
+        ON fuel_log (vehicle_id, date_day, km_per_litre, rm_per_km);
+    """)
+    rollups.drop_rollups(conn)
+    rollups.create_rollups(conn)
+
+
+def _migrate_v4(conn):
+    """Rollup triggers that prune only the rows a delete touched."""
+    rollups.drop_triggers(conn)
+    rollups.create_rollups(conn)
+
+
+# Derived metrics, computed by SQLite from the three inputs on every read.
+# The only copy of these formulas: writers store date, total_rm,
+# price_per_litre, distance_km (and date_day, vehicle_id) and nothing else.
+DERIVED_COLUMNS = {
+    "litres": "total_rm / price_per_litre",
+    "km_per_litre": "distance_km / litres",
+    "l_per_100km": "litres / distance_km * 100",
+    "rm_per_km": "total_rm / distance_km",
+}
+# Metrics to keep on disk (STORED) rather than compute on read (VIRTUAL).
+# Only worth it for a metric with its own index; none has one, because
+# SQLite never treats an index holding a generated column as covering.
+STORED_COLUMNS = ()
+
+
+def fuel_log_sql(table="fuel_log", stored=STORED_COLUMNS):
+    """CREATE TABLE for fuel_log with the derived metrics as generated columns."""
+    derived = ",\n".join(
+        f"        {name} REAL GENERATED ALWAYS AS ({expr}) {'STORED' if name in stored else 'VIRTUAL'}"
+        for name, expr in DERIVED_COLUMNS.items())
+    return f"""
+    CREATE TABLE {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,
+        total_rm REAL NOT NULL,
+        price_per_litre REAL NOT NULL,
+        distance_km REAL NOT NULL,
+{derived},
+        date_day INTEGER,
+        vehicle_id INTEGER NOT NULL DEFAULT {DEFAULT_VEHICLE_ID} REFERENCES vehicles (id)
+    )
+    """
+
+
+def _migrate_v5(conn):
+    """Derived metrics as generated columns instead of stored values.
+
+    SQLite can't turn a column into a generated one, so fuel_log is rebuilt
+    in one transaction: copy the inputs into a new table, swap it in, and
+    recreate the triggers and indexes (the rollups are rebuilt too, since
+    their litres now come from the formula), then VACUUM. The plot indexes are dropped:
+    with generated metrics they can no longer cover the plot query, and
+    (vehicle_id,) date_day serves its range and order as well.
+    """
+    if _hidden_columns(conn, "fuel_log").get("litres"):
+        return  # already rebuilt (the version bump didn't get to commit)
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'fuel_log'").fetchone()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(fuel_log_sql("fuel_log_v5"))
+        conn.execute("""
+        INSERT INTO fuel_log_v5 (id, date, total_rm, price_per_litre, distance_km, date_day, vehicle_id)
+        SELECT id, date, total_rm, price_per_litre, distance_km, date_day, vehicle_id FROM fuel_log
+        """)
+        conn.execute("DROP TABLE fuel_log")  # and its indexes and triggers
+        conn.execute("ALTER TABLE fuel_log_v5 RENAME TO fuel_log")
+        if seq is not None:  # keep ids of deleted newest entries from being reused
+            conn.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'fuel_log'", (seq[0],))
+        for sql in _DATE_DAY_TRIGGERS + (
+            "CREATE INDEX idx_fuel_log_date_day ON fuel_log (date_day, id)",
+            "CREATE INDEX idx_fuel_log_vehicle_date_day ON fuel_log (vehicle_id, date_day, id)",
+        ):
+            conn.execute(sql)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    rollups.create_rollups(conn)
+    rollups.rebuild(conn)
+    conn.execute("VACUUM")  # hand back the pages the old table and its indexes held
+
+
+def _migrate_v6(conn):
+    """Triggers refusing non-finite amounts, which would poison the rollups."""
+    rollups.drop_triggers(conn)
+    rollups.create_rollups(conn)
+
+
+MIGRATIONS = {
+    1: _migrate_v1,
+    2: _migrate_v2,
+    3: _migrate_v3,
+    4: _migrate_v4,
+    5: _migrate_v5,
+    6: _migrate_v6,
+}
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+
+
+def _hidden_columns(conn, table):
+    """{column: hidden} from table_xinfo; 2 or 3 marks a generated column."""
+    return {row[1]: row[6] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=SCHEMA_VERSION):
+    """Applies pending migrations up to target. Returns the version the file started at."""
+    start = schema_version(conn)
+    for version in range(start + 1, target + 1):
+        MIGRATIONS[version](conn)
+        with conn:
+            conn.execute(f"PRAGMA user_version = {version}")
+    return start
+
+
+def check_sqlite_version(version=sqlite3.sqlite_version_info):
+    """Raises sqlite3.NotSupportedError if SQLite is older than MIN_SQLITE_VERSION."""
+    if version < MIN_SQLITE_VERSION:
+        raise sqlite3.NotSupportedError(
+            f"SQLite {'.'.join(map(str, version))} is too old; the tracker needs "
+            f"{'.'.join(map(str, MIN_SQLITE_VERSION))} or newer (Python's sqlite3 module links against it).")
+
+
+def create_schema(conn):
+    """Creates or upgrades the schema to SCHEMA_VERSION.
+
+    Checks the SQLite version first, so an old library fails with a clear
+    error instead of half way through a migration.
+    """
+    check_sqlite_version()
+    migrate(conn)
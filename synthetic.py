@@ -0,0 +1,215 @@
+"""Seeded synthetic fleets for testing the tracker at scale.
+
+Usage: python synthetic.py --db big.db [--rows 1000000] [--vehicles N] [--seed 1]
+
+Writes `rows` fills for a fleet of cars, vans and trucks straight into a
+fuel_log database. The same arguments always give the same data. Each
+vehicle has its own tank size, base efficiency and daily distance; it
+refuels when the tank is mostly empty (so trucks fill less often than
+their distance suggests), its efficiency varies with the season, and
+every fill pays the fleet-wide pump price of its day, a mean-reverting
+random walk with occasional jumps. A small share of fills are
+deliberately wrong, the way real fuel logs are: a forgotten fill (double
+distance), a partial fill, an amount typed with an extra zero and a
+distance off by a factor of ten.
+
+Without --vehicles the fleet grows with the row count (one vehicle per
+FILLS_PER_VEHICLE fills, so ~20 vehicles for 10k rows and ~20,000 for
+10M), which keeps the date spans realistic. A vehicle whose log would go
+back more than MAX_YEARS (few vehicles for many rows) has its fills
+packed closer together instead.
+"""
+import argparse
+import datetime
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import importer
+import rollups
+import storage
+
+FILLS_PER_VEHICLE = 500  # ~7 years of weekly fills
+MAX_YEARS = 30
+END_DATE = "2025-12-31"
+OUTLIER_RATE = 0.005
+CHUNK_SIZE = 50000  # rows per executemany
+
+# name, share of the fleet, tank litres, base km/L, km per day (low, high)
+VEHICLE_CLASSES = (
+    ("Car", 0.6, (40, 55), (12, 18), (30, 90)),
+    ("Van", 0.3, (60, 80), (8, 11), (80, 160)),
+    ("Truck", 0.1, (150, 300), (3, 5), (200, 450)),
+)
+OUTLIER_KINDS = ("missed_fill", "partial_fill", "amount_typo", "distance_typo")
+
+# Pump price: log deviation from BASE_PRICE reverts at PRICE_REVERSION per
+# day with PRICE_VOLATILITY daily noise, plus a PRICE_JUMP_RATE chance per
+# day of a jump of up to PRICE_JUMP (a subsidy or tax change).
+BASE_PRICE = 2.05
+PRICE_REVERSION = 0.002
+PRICE_VOLATILITY = 0.004
+PRICE_JUMP_RATE = 1 / 180
+PRICE_JUMP = 0.10
+
+Fleet = namedtuple("Fleet", "names days vehicle total_rm price_per_litre distance_km outliers")
+GenerateResult = namedtuple("GenerateResult", "rows vehicles outliers first last seconds")
+
+
+def default_vehicles(rows):
+    return max(1, -(-rows // FILLS_PER_VEHICLE))
+
+
+def _vehicle_profiles(rng, count):
+    """Class index, tank litres, base km/L and km per day for each vehicle."""
+    shares = np.array([c[1] for c in VEHICLE_CLASSES])
+    kind = rng.choice(len(VEHICLE_CLASSES), size=count, p=shares / shares.sum())
+    profile = np.empty((3, count))
+    for i, (_, _, *ranges) in enumerate(VEHICLE_CLASSES):
+        mask = kind == i
+        for row, (low, high) in enumerate(ranges):
+            profile[row, mask] = rng.uniform(low, high, mask.sum())
+    return kind, profile[0], profile[1], profile[2]
+
+
+def _pump_prices(rng, days):
+    """Daily pump price for days 0 .. days-1 (RM per litre)."""
+    shocks = rng.normal(0, PRICE_VOLATILITY, days)
+    jumps = rng.random(days) < PRICE_JUMP_RATE
+    shocks[jumps] += rng.uniform(-PRICE_JUMP, PRICE_JUMP, jumps.sum())
+    log_dev = np.empty(days)
+    level = 0.0
+    for i, shock in enumerate(shocks.tolist()):  # sequential, but only one value per day
+        level += shock - PRICE_REVERSION * level
+        log_dev[i] = level
+    return BASE_PRICE * np.exp(log_dev)
+
+
+def fleet(rows, vehicles=None, seed=1, end=END_DATE, outlier_rate=OUTLIER_RATE):
+    """Generates the fills as a Fleet of arrays sorted by day (then vehicle).
+
+    days are epoch days (as date_day), vehicle indexes into names, and
+    outliers counts the deliberately wrong fills per OUTLIER_KINDS. It is
+    all built in memory: ~130 bytes per row at the peak, 1.3 GB for 10M.
+    """
+    if rows < 1:
+        raise ValueError("rows must be at least 1.")
+    vehicles = default_vehicles(rows) if vehicles is None else vehicles
+    if not 1 <= vehicles <= rows:
+        raise ValueError("vehicles must be between 1 and rows.")
+    rng = np.random.default_rng(seed)
+    end_day = datetime.date.fromisoformat(end).toordinal() - datetime.date(1970, 1, 1).toordinal()
+
+    kind, tank, base_km_l, km_per_day = _vehicle_profiles(rng, vehicles)
+    names = [f"{VEHICLE_CLASSES[k][0]} {i + 1:0{len(str(vehicles))}d}" for i, k in enumerate(kind.tolist())]
+
+    # One row of fills per vehicle, newest first; the first `short`
+    # vehicles have one fill fewer so the total comes out at `rows`.
+    per_vehicle = -(-rows // vehicles)
+    short = vehicles * per_vehicle - rows
+    keep = np.ones((vehicles, per_vehicle), dtype=bool)
+    keep[:short, -1] = False
+
+    litres = tank[:, None] * rng.beta(8, 2, (vehicles, per_vehicle))
+    gap_days = litres * base_km_l[:, None] / km_per_day[:, None] * rng.gamma(4, 0.25, (vehicles, per_vehicle))
+    # Some vehicles left the fleet before the end date.
+    retired = np.where(rng.random(vehicles) < 0.2, rng.uniform(0, 0.3, vehicles), 0.0)
+    back = np.cumsum(gap_days, axis=1)
+    back += (retired * back[:, -1])[:, None] + rng.uniform(0, 1, vehicles)[:, None] * gap_days[:, :1]
+    oldest = np.where(keep[:, -1], back[:, -1], back[:, -2] if per_vehicle > 1 else back[:, -1])
+    back *= np.minimum(1.0, MAX_YEARS * 365.25 / oldest)[:, None]
+    days = end_day - back.astype(np.int64)
+    del gap_days, back
+
+    vehicle = np.broadcast_to(np.arange(vehicles, dtype=np.int32)[:, None], keep.shape)[keep]
+    days, litres = days[keep], litres[keep]
+    del keep
+    order = np.lexsort((vehicle, days))
+    days, vehicle, litres = days[order], vehicle[order], litres[order]
+    del order
+
+    first_day = int(days[0])
+    prices = _pump_prices(rng, end_day - first_day + 1)[days - first_day]
+    price = np.round(prices + rng.normal(0, 0.02, rows), 2).clip(0.5, None)
+    season = 1 + 0.04 * np.cos(2 * np.pi * ((days - 196) % 365.25) / 365.25)  # best in mid July
+    km_l = base_km_l[vehicle] * season * rng.lognormal(0, 0.05, rows)
+    distance = litres * km_l
+    total_rm = litres * price
+    del prices, season, km_l
+
+    kinds = np.where(rng.random(rows) < outlier_rate, rng.integers(0, len(OUTLIER_KINDS), rows), -1)
+    distance[kinds == 0] *= rng.uniform(1.8, 3.0, np.count_nonzero(kinds == 0))
+    total_rm[kinds == 1] *= rng.uniform(0.1, 0.3, np.count_nonzero(kinds == 1))
+    total_rm[kinds == 2] *= 10
+    distance[kinds == 3] *= 0.1
+    outliers = dict(zip(OUTLIER_KINDS, np.bincount(kinds[kinds >= 0], minlength=len(OUTLIER_KINDS)).tolist()))
+
+    return Fleet(names, days.astype(np.int32), vehicle, np.round(total_rm, 2).clip(0.01, None), price,
+                 np.round(distance, 1).clip(0.1, None), outliers)
+
+
+def generate(db_file, rows, vehicles=None, seed=1, end=END_DATE, outlier_rate=OUTLIER_RATE,
+             chunk_size=CHUNK_SIZE, progress=None):
+    """Adds a generated fleet to db_file (creating it if needed). Returns a GenerateResult.
+
+    Vehicles are added by name (existing ones are reused). Rows are
+    committed chunk_size at a time; progress(done, total) is called after
+    each. The rollup triggers are dropped for the load, which makes it ~1.6x
+    faster, and reinstalled with a full rollup rebuild at the end, even if
+    the load fails or is interrupted.
+    """
+    start = time.perf_counter()
+    data = fleet(rows, vehicles, seed, end, outlier_rate)
+    conn = storage.get_connection(db_file)
+    storage.create_schema(conn)
+    with conn:
+        vehicle_ids = np.array([importer.resolve_vehicle(conn, name) for name in data.names], dtype=np.int64)
+    rollups.drop_triggers(conn)
+    try:
+        for i in range(0, rows, chunk_size):
+            part = slice(i, i + chunk_size)
+            dates = data.days[part].astype("datetime64[D]").astype(str).tolist()
+            with conn:
+                conn.executemany(importer.INSERT_SQL, zip(
+                    dates, data.total_rm[part].tolist(), data.price_per_litre[part].tolist(),
+                    data.distance_km[part].tolist(), vehicle_ids[data.vehicle[part]].tolist()))
+            if progress:
+                progress(min(i + chunk_size, rows), rows)
+    finally:
+        rollups.create_rollups(conn)
+        rollups.rebuild(conn)
+        storage.bump_data_version(db_file)
+    first, last = (str(np.datetime64(int(d), "D")) for d in (data.days[0], data.days[-1]))
+    return GenerateResult(rows, len(data.names), data.outliers, first, last, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True, help="database to add the fleet to")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--vehicles", type=int, help=f"default: one per {FILLS_PER_VEHICLE} rows")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--end", default=END_DATE, help="date of the newest fills (default: %(default)s)")
+    parser.add_argument("--outlier-rate", type=float, default=OUTLIER_RATE)
+    args = parser.parse_args(argv)
+
+    def progress(done, total):
+        print(f"\r{done:,} / {total:,} rows", end="", file=sys.stderr, flush=True)
+
+    try:
+        result = generate(args.db, args.rows, args.vehicles, args.seed, args.end, args.outlier_rate,
+                          progress=progress)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+    print(f"Generated {result.rows:,} fills for {result.vehicles:,} vehicles, {result.first} to {result.last}, "
+          f"in {result.seconds:.1f}s ({result.rows / result.seconds:,.0f} rows/sec)")
+    print("Outliers: " + ", ".join(f"{kind} {n:,}" for kind, n in result.outliers.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
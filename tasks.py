@@ -0,0 +1,161 @@
+"""Background work for the Tk GUI.
+
+TaskRunner runs database queries and figure building on a worker thread
+and hands results back to the Tk thread through root.after polling, so the
+event loop never waits on SQLite or matplotlib. EventLoopMonitor measures
+how long the loop actually stays blocked.
+"""
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Task:
+    """Handle for submitted work. cancel() drops the result when it arrives."""
+
+    def __init__(self, on_done, on_error):
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TaskRunner:
+    """Runs callables off the Tk thread and calls back on it.
+
+    One worker by default: SQLite allows a single writer anyway, and a
+    serial queue keeps writes in the order the user made them. Each worker
+    thread gets its own pooled connection from storage.get_connection().
+
+    With inline=True everything runs synchronously on the Tk thread (the
+    old behaviour), which is what the event-loop benchmark compares against.
+    """
+    POLL_MS = 25
+
+    def __init__(self, root, max_workers=1, inline=False, thread_name_prefix="fuel-tracker-worker"):
+        self.root = root
+        self.inline = inline
+        self._executor = None if inline else ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._results = queue.Queue()
+        self._outstanding = 0
+        self._owned = {}  # owner widget -> set of its Tasks
+
+    def submit(self, fn, *args, on_done=None, on_error=None, owner=None):
+        """Runs fn(*args) in the background.
+
+        on_done(result) / on_error(exc) are called on the Tk thread. If owner
+        (a widget) is destroyed first, the task is cancelled and neither runs.
+        """
+        task = Task(on_done, on_error)
+        if owner is not None:
+            self._own(owner, task)
+        if self.inline:
+            self._finish(task, *self._call(fn, args))
+            return task
+        self._outstanding += 1
+        self._executor.submit(self._run, task, fn, args)
+        if self._outstanding == 1:
+            self.root.after(self.POLL_MS, self._poll)
+        return task
+
+    def cancel_owned(self, owner):
+        for task in self._owned.pop(str(owner), ()):
+            task.cancel()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def busy(self):
+        return self._outstanding > 0
+
+    # --- Internals ---
+
+    def _own(self, owner, task):
+        key = str(owner)
+        if key not in self._owned:
+            self._owned[key] = set()
+            # <Destroy> also fires for every child; only react to the owner itself.
+            owner.bind("<Destroy>", lambda e, k=key: self.cancel_owned(k) if str(e.widget) == k else None, add="+")
+        self._owned[key].add(task)
+
+    @staticmethod
+    def _call(fn, args):
+        try:
+            return fn(*args), None
+        except Exception as e:
+            return None, e
+
+    def _run(self, task, fn, args):
+        # Always report back, even when cancelled, so _outstanding stays accurate.
+        if task.cancelled:
+            self._results.put((task, None, None))
+        else:
+            self._results.put((task, *self._call(fn, args)))
+
+    def _poll(self):
+        while True:
+            try:
+                task, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._outstanding -= 1
+            self._finish(task, result, error)
+        if self._outstanding:
+            self.root.after(self.POLL_MS, self._poll)
+
+    def _finish(self, task, result, error):
+        for tasks in self._owned.values():
+            tasks.discard(task)
+        if task.cancelled:
+            return
+        if error is not None:
+            if task.on_error:
+                task.on_error(error)
+            else:
+                self.root.report_callback_exception(type(error), error, error.__traceback__)
+        elif task.on_done:
+            task.on_done(result)
+
+
+class EventLoopMonitor:
+    """Measures event-loop stalls by scheduling a tick every interval_ms.
+
+    A tick that fires late means something held the Tk thread; the lateness
+    is the time the UI was frozen.
+    """
+
+    def __init__(self, root, interval_ms=10):
+        self.root = root
+        self.interval = interval_ms / 1000
+        self.lags = []
+        self._expected = None
+        self._after_id = None
+
+    def start(self):
+        self.lags.clear()
+        self._expected = time.perf_counter() + self.interval
+        self._after_id = self.root.after(int(self.interval * 1000), self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.lags.append(max(0.0, now - self._expected))
+        self._expected = now + self.interval
+        self._after_id = self.root.after(int(self.interval * 1000), self._tick)
+
+    def stats(self):
+        """Returns (max_ms, p99_ms, mean_ms) of the recorded lags."""
+        if not self.lags:
+            return 0.0, 0.0, 0.0
+        lags = sorted(self.lags)
+        p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+        return lags[-1] * 1000, p99 * 1000, sum(lags) / len(lags) * 1000